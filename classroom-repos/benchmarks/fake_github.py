@@ -0,0 +1,555 @@
+"""
+本地模拟的 GitHub API 服务，数据来自 synthetic_classroom.py 生成的仓库和 classroom.json。
+覆盖爬虫(_run_query / GitHubSession)和 GitHubDashboardCollector(request / paginate)用到的接口：
+- GraphQL: 组织成员、PR/Issue/分支连接（含 @include 合并查询）、按SHA查询提交作者（含别名批量查询）、
+  search issueCount、rateLimit 字段
+- REST: accepted_assignments、classrooms、仓库信息、branches、commits(since/until)、compare、issues、pulls
+
+REST列表按 page/per_page 分页并返回 Link 头，响应带 ETag，If-None-Match 命中时返回304且不消耗额度。
+每个请求按 core/graphql 分别扣减额度，额度用完时 REST 返回403、GraphQL 返回 RATE_LIMITED 错误，
+并带上 X-RateLimit-* 响应头，与 GitHub 的行为一致。stats() 返回各接口的请求数与响应字节数。
+"""
+
+import argparse
+import base64
+import hashlib
+import json
+import os
+import re
+import subprocess
+import threading
+import time
+import urllib.parse
+from collections import Counter
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from synthetic_classroom import CONFIG, MANIFEST_FILE
+
+REPOSITORY_PATTERN = re.compile(r"(?:(\w+)\s*:\s*)?repository\(owner:\s*\$(\w+),\s*name:\s*\$(\w+)\)")
+OBJECT_PATTERN = re.compile(r"(?:(\w+)\s*:\s*)?object\(expression:\s*\$(\w+)\)")
+CONNECTION_PATTERN = re.compile(r"\b(pullRequests|issues|refs)\(([^)]*)\)\s*(?:@include\(if:\s*\$(\w+)\))?")
+SEARCH_PATTERN = re.compile(r"(\w+)\s*:\s*search\(query:\s*\$(\w+)")
+REST_ROUTES = [
+    (re.compile(r"/assignments/(?P<assignment_id>[^/]+)/accepted_assignments"), "accepted_assignments"),
+    (re.compile(r"/classrooms"), "classrooms"),
+    (re.compile(r"/classrooms/(?P<classroom_id>[^/]+)/assignments"), "assignments"),
+    (re.compile(r"/repos/(?P<owner>[^/]+)/(?P<repo>[^/]+)"), "repo"),
+    (re.compile(r"/repos/(?P<owner>[^/]+)/(?P<repo>[^/]+)/branches"), "branches"),
+    (re.compile(r"/repos/(?P<owner>[^/]+)/(?P<repo>[^/]+)/commits"), "commits"),
+    (re.compile(r"/repos/(?P<owner>[^/]+)/(?P<repo>[^/]+)/compare/(?P<basehead>.+)"), "compare"),
+    (re.compile(r"/repos/(?P<owner>[^/]+)/(?P<repo>[^/]+)/issues"), "issues"),
+    (re.compile(r"/repos/(?P<owner>[^/]+)/(?P<repo>[^/]+)/pulls"), "pulls"),
+]
+
+
+def parse_time(value):
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def utc_z(value):
+    return parse_time(value).astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def encode_cursor(offset):
+    return base64.b64encode(f"cursor:{offset}".encode("ascii")).decode("ascii")
+
+
+def decode_cursor(cursor):
+    if not cursor:
+        return 0
+    return int(base64.b64decode(cursor).decode("ascii").split(":", 1)[1])
+
+
+class RepoHistory:
+    """从本地git仓库读取分支和commit，供 REST/GraphQL 响应使用，首次访问时加载"""
+
+    def __init__(self, path):
+        self.path = path
+        self.commits = {}  # sha -> (作者名, 作者邮箱, 作者时间, 提交时间)
+        self.tips = {}  # 分支名 -> (sha, 提交时间)
+        self._branch_commits = {}
+        self._lock = threading.Lock()
+        refs = self._git("for-each-ref", "--format=%(refname:short)%09%(objectname)%09%(committerdate:iso-strict)",
+                         "refs/heads")
+        for line in refs.splitlines():
+            name, sha, committed = line.split("\t")
+            self.tips[name] = (sha, committed)
+        log = self._git("log", "--all", "--format=%H%x1f%an%x1f%ae%x1f%aI%x1f%cI")
+        for line in log.splitlines():
+            sha, name, email, authored, committed = line.split("\x1f")
+            self.commits[sha] = (name, email, authored, committed)
+
+    def _git(self, *args):
+        return subprocess.run(
+            ["git", "-C", self.path, *args], capture_output=True, text=True, check=True
+        ).stdout
+
+    def branch_commits(self, branch):
+        # 与 GitHub commits 接口相同，按时间倒序
+        with self._lock:
+            if branch not in self._branch_commits:
+                self._branch_commits[branch] = self._git("rev-list", branch, "--").split()
+            return self._branch_commits[branch]
+
+
+class FakeGitHub:
+    def __init__(self, root, latency=0.0, rate_limit=5000, rate_limit_window=3600, port=0):
+        with open(os.path.join(root, MANIFEST_FILE), "r", encoding="utf-8") as f:
+            self.manifest = json.load(f)
+        self.root = root
+        self.organization = self.manifest["organization"]
+        self.latency = latency  # 每个请求额外的模拟网络延迟（秒）
+        self.rate_limit = rate_limit
+        self.rate_limit_window = rate_limit_window
+        self.port = port
+        self.users_by_email = {}
+        for repo in self.manifest["repos"].values():
+            for student in repo["students"]:
+                self.users_by_email[student["email"]] = student
+                if student.get("alt_email"):
+                    self.users_by_email[student["alt_email"]] = student
+        for member in self.manifest["members"]:
+            self.users_by_email.setdefault(member["email"], member)
+        self._histories = {}
+        self._lock = threading.Lock()
+        self._budgets = {}  # 额度类别 -> [剩余额度, 重置时间戳]
+        self._stats = Counter()
+        self._server = None
+        self._thread = None
+
+    # ---------- 服务生命周期 ----------
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._server = ThreadingHTTPServer(("127.0.0.1", self.port), make_handler(self))
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self.url
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats)
+
+    # ---------- 请求分发 ----------
+    def handle(self, handler, method):
+        parsed = urllib.parse.urlsplit(handler.path)
+        query = dict(urllib.parse.parse_qsl(parsed.query))
+        body = handler.rfile.read(int(handler.headers.get("Content-Length") or 0))
+        if self.latency:
+            time.sleep(self.latency)
+        headers = {}
+        if method == "POST" and parsed.path == "/graphql":
+            resource = "graphql"
+            kind, status, payload = self.graphql(json.loads(body or b"{}"))
+        elif method == "GET":
+            resource = "core"
+            kind, status, payload, link = self.rest(parsed.path, query)
+            if link:
+                headers["Link"] = link
+        else:
+            resource, kind, status, payload = "core", "unsupported", 404, {"message": "Not Found"}
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        etag = f'W/"{hashlib.sha1(data).hexdigest()}"'
+        if method == "GET" and status == 200:
+            headers["ETag"] = etag
+            if handler.headers.get("If-None-Match") == etag:
+                self._count(f"{resource}:{kind}", not_modified=1)
+                self._send(handler, 304, b"", headers)
+                return
+        remaining, reset_at = self._consume(resource)
+        headers.update(
+            {
+                "X-RateLimit-Limit": str(self.rate_limit),
+                "X-RateLimit-Remaining": str(max(remaining, 0)),
+                "X-RateLimit-Reset": str(int(reset_at)),
+                "X-RateLimit-Resource": resource,
+            }
+        )
+        if remaining < 0:
+            self._count(f"{resource}:{kind}", rate_limited=1)
+            if resource == "graphql":
+                status, payload = 200, {"errors": [{"type": "RATE_LIMITED", "message": "API rate limit exceeded"}]}
+            else:
+                status, payload = 403, {"message": "API rate limit exceeded"}
+            headers.pop("ETag", None)
+            headers.pop("Link", None)
+            data = json.dumps(payload).encode("utf-8")
+        elif resource == "graphql" and isinstance(payload.get("data"), dict) and "rateLimit" in payload["data"]:
+            payload["data"]["rateLimit"] = {
+                "cost": 1,
+                "remaining": remaining,
+                "resetAt": datetime.fromtimestamp(reset_at, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            }
+            data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self._count(f"{resource}:{kind}", bytes=len(data))
+        self._send(handler, status, data, headers)
+
+    def _send(self, handler, status, data, headers):
+        handler.send_response(status)
+        if data:
+            handler.send_header("Content-Type", "application/json; charset=utf-8")
+        handler.send_header("Content-Length", str(len(data)))
+        for name, value in headers.items():
+            handler.send_header(name, value)
+        handler.end_headers()
+        if data:
+            handler.wfile.write(data)
+
+    def _count(self, kind, bytes=0, not_modified=0, rate_limited=0):
+        with self._lock:
+            self._stats["requests"] += 1
+            self._stats[f"requests.{kind}"] += 1
+            self._stats["bytes"] += bytes
+            self._stats["not_modified"] += not_modified
+            self._stats["rate_limited"] += rate_limited
+
+    def _consume(self, resource):
+        # 返回扣减后的剩余额度（额度已用完时为-1）和重置时间
+        with self._lock:
+            now = time.time()
+            budget = self._budgets.get(resource)
+            if budget is None or now >= budget[1]:
+                budget = self._budgets[resource] = [self.rate_limit, now + self.rate_limit_window]
+            if budget[0] == 0:
+                return -1, budget[1]
+            budget[0] -= 1
+            return budget[0], budget[1]
+
+    def history(self, repo_name):
+        with self._lock:
+            if repo_name not in self._histories:
+                repo = self.manifest["repos"][repo_name]
+                self._histories[repo_name] = RepoHistory(os.path.join(self.root, repo["path"]))
+            return self._histories[repo_name]
+
+    def _repo(self, owner, name):
+        if owner != self.organization:
+            return None
+        return self.manifest["repos"].get(name)
+
+    # ---------- REST ----------
+    def rest(self, path, query):
+        for pattern, kind in REST_ROUTES:
+            match = pattern.fullmatch(path)
+            if match:
+                params = match.groupdict()
+                if "repo" in params and self._repo(params["owner"], params["repo"]) is None:
+                    return kind, 404, {"message": "Not Found"}, None
+                result = getattr(self, f"rest_{kind}")(query=query, **params)
+                if isinstance(result, list):
+                    items, link = self._paginate(path, query, result)
+                    return kind, 200, items, link
+                status, payload, *link = result
+                return kind, status, payload, link[0] if link else None
+        return "unsupported", 404, {"message": "Not Found"}, None
+
+    def _paginate(self, path, query, items, default_per_page=30):
+        page = max(int(query.get("page", 1)), 1)
+        per_page = min(int(query.get("per_page", default_per_page)), 100)
+        start = (page - 1) * per_page
+        last_page = max((len(items) + per_page - 1) // per_page, 1)
+        links = []
+        if page < last_page:
+            for rel, number in (("next", page + 1), ("last", last_page)):
+                page_url = f"{self.url}{path}?{urllib.parse.urlencode({**query, 'page': number})}"
+                links.append(f'<{page_url}>; rel="{rel}"')
+        return items[start : start + per_page], ", ".join(links)
+
+    def rest_classrooms(self, query):
+        return [
+            {"id": int(classroom_id), "name": f"CS304 {semestar}", "archived": False}
+            for semestar, classroom_id in CONFIG["classroom_id"].items()
+        ]
+
+    def rest_assignments(self, query, classroom_id):
+        return [
+            {"id": int(CONFIG["assignment_id"][semestar]), "title": f"team-project-{semestar}", "type": "group"}
+            for semestar, value in CONFIG["classroom_id"].items()
+            if value == classroom_id
+        ]
+
+    def rest_accepted_assignments(self, query, assignment_id):
+        for semestar in self.manifest["semestars"].values():
+            if semestar["assignment_id"] != assignment_id:
+                continue
+            accepted = []
+            for number, repo_name in enumerate(semestar["repos"], start=1):
+                repo = self.manifest["repos"][repo_name]
+                accepted.append(
+                    {
+                        "id": number,
+                        "submitted": False,
+                        "passing": False,
+                        "commit_count": 0,
+                        "grade": None,
+                        "students": [
+                            {"id": s["database_id"], "login": s["login"], "name": s["name"]}
+                            for s in repo["students"]
+                        ],
+                        "repository": {
+                            "id": number,
+                            "name": repo_name,
+                            "full_name": f"{self.organization}/{repo_name}",
+                            "default_branch": "main",
+                        },
+                    }
+                )
+            return accepted
+        return 404, {"message": "Not Found"}
+
+    def rest_repo(self, query, owner, repo):
+        return 200, {"name": repo, "full_name": f"{owner}/{repo}", "default_branch": "main"}
+
+    def rest_branches(self, query, owner, repo):
+        history = self.history(repo)
+        return [
+            {"name": name, "commit": {"sha": sha}, "protected": False}
+            for name, (sha, _) in sorted(history.tips.items())
+        ]
+
+    def _rest_commit(self, history, sha):
+        name, email, authored, committed = history.commits[sha]
+        user = self.users_by_email.get(email)
+        return {
+            "sha": sha,
+            "commit": {
+                "author": {"name": name, "email": email, "date": utc_z(authored)},
+                "committer": {"name": name, "email": email, "date": utc_z(committed)},
+            },
+            "author": {"login": user["login"]} if user and "login" in user else None,
+        }
+
+    def rest_commits(self, query, owner, repo):
+        history = self.history(repo)
+        branch = query.get("sha", "main")
+        if branch not in history.tips:
+            return 404, {"message": "No commit found for SHA"}
+        since = parse_time(query["since"]) if query.get("since") else None
+        until = parse_time(query["until"]) if query.get("until") else None
+        items = []
+        for sha in history.branch_commits(branch):
+            committed = parse_time(history.commits[sha][3])
+            if (since and committed < since) or (until and committed > until):
+                continue
+            items.append(self._rest_commit(history, sha))
+        return items
+
+    def rest_compare(self, query, owner, repo, basehead):
+        history = self.history(repo)
+        base, _, head = urllib.parse.unquote(basehead).partition("...")
+        if base not in history.tips or head not in history.tips:
+            return 404, {"message": "Not Found"}
+        in_base = set(history.branch_commits(base))
+        in_head = set(history.branch_commits(head))
+        # 与 GitHub 相同，按时间正序返回 head 上有而 base 上没有的commit
+        ahead = [sha for sha in reversed(history.branch_commits(head)) if sha not in in_base]
+        behind = len(in_base - in_head)
+        page = max(int(query.get("page", 1)), 1)
+        per_page = min(int(query.get("per_page", 250)), 100)
+        commits = ahead[(page - 1) * per_page : page * per_page]
+        payload = {
+            "status": "ahead" if not behind else "diverged",
+            "ahead_by": len(ahead),
+            "behind_by": behind,
+            "total_commits": len(ahead),
+            "commits": [self._rest_commit(history, sha) for sha in commits],
+        }
+        _, link = self._paginate(f"/repos/{owner}/{repo}/compare/{basehead}", query, ahead, per_page)
+        return 200, payload, link
+
+    def _rest_issue(self, item, is_pr):
+        closed = item.get("closedAt")
+        issue = {
+            "number": item["number"],
+            "title": item["title"],
+            "state": "closed" if closed else "open",
+            "created_at": item["createdAt"],
+            "updated_at": closed or item["createdAt"],
+            "closed_at": closed,
+            "user": {"login": item["author"]["login"]},
+        }
+        if is_pr:
+            issue["merged_at"] = item.get("mergedAt")
+        return issue
+
+    def rest_issues(self, query, owner, repo):
+        data = self.manifest["repos"][repo]
+        since = parse_time(query["since"]) if query.get("since") else None
+        items = []
+        for item in data["issues"]:
+            items.append(self._rest_issue(item, False))
+        for item in data["pull_requests"]:
+            issue = self._rest_issue(item, True)
+            issue["pull_request"] = {"merged_at": issue.pop("merged_at")}
+            items.append(issue)
+        if query.get("state", "open") != "all":
+            items = [item for item in items if item["state"] == query.get("state", "open")]
+        if since:
+            items = [item for item in items if parse_time(item["updated_at"]) >= since]
+        return sorted(items, key=lambda item: item["created_at"], reverse=True)
+
+    def rest_pulls(self, query, owner, repo):
+        items = [self._rest_issue(item, True) for item in self.manifest["repos"][repo]["pull_requests"]]
+        if query.get("state", "open") != "all":
+            items = [item for item in items if item["state"] == query.get("state", "open")]
+        return sorted(items, key=lambda item: item["created_at"], reverse=True)
+
+    # ---------- GraphQL ----------
+    def graphql(self, request):
+        query = request.get("query", "")
+        variables = request.get("variables") or {}
+        data = {}
+        errors = []
+        kind = "unsupported"
+        if "rateLimit" in query:
+            data["rateLimit"] = None  # 由 handle 在扣减额度后填入
+        if "membersWithRole" in query:
+            kind = "members"
+            members = self.manifest["members"]
+            offset = decode_cursor(variables.get("after"))
+            first = variables.get("first", 100)
+            page = members[offset : offset + first]
+            data["organization"] = {
+                "membersWithRole": {
+                    "pageInfo": {
+                        "hasNextPage": offset + first < len(members),
+                        "endCursor": encode_cursor(offset + len(page)),
+                    },
+                    "nodes": page,
+                }
+            }
+        searches = SEARCH_PATTERN.findall(query)
+        if searches:
+            kind = "search"
+            for alias, variable in searches:
+                data[alias] = {"issueCount": self._search_count(variables.get(variable, ""))}
+        repositories = list(REPOSITORY_PATTERN.finditer(query))
+        for index, match in enumerate(repositories):
+            alias, owner_var, name_var = match.groups()
+            end = repositories[index + 1].start() if index + 1 < len(repositories) else len(query)
+            segment = query[match.end() : end]
+            repo_name = variables.get(name_var)
+            repo = self._repo(variables.get(owner_var), repo_name)
+            if repo is None:
+                data[alias or "repository"] = None
+                errors.append({"type": "NOT_FOUND", "message": f"Could not resolve to a Repository {repo_name}"})
+                continue
+            repo_data = {}
+            objects = OBJECT_PATTERN.findall(segment)
+            if objects:
+                kind = "commit_authors" if alias else "commit_author"
+                history = self.history(repo_name)
+                for object_alias, sha_var in objects:
+                    repo_data[object_alias or "object"] = self._commit_author(history, variables.get(sha_var))
+            for connection, args, include_var in CONNECTION_PATTERN.findall(segment):
+                kind = "activity" if include_var else {"pullRequests": "pull_requests", "refs": "refs"}.get(
+                    connection, connection
+                )
+                if include_var and not variables.get(include_var):
+                    continue
+                first = variables[re.search(r"first:\s*\$(\w+)", args).group(1)]
+                after_match = re.search(r"after:\s*\$(\w+)", args)
+                after = variables.get(after_match.group(1)) if after_match else None
+                repo_data[connection] = self._connection(repo_name, repo, connection, first, after)
+            data[alias or "repository"] = repo_data
+        result = {"data": data}
+        if kind == "unsupported":
+            errors.append({"message": "Query not supported by the benchmark server"})
+        if errors:
+            result["errors"] = errors
+        return kind, 200, result
+
+    def _commit_author(self, history, sha):
+        if sha not in history.commits:
+            return None
+        name, email, _, _ = history.commits[sha]
+        user = self.users_by_email.get(email)
+        return {"author": {"user": {"id": user["id"]} if user else None, "name": name, "email": email}}
+
+    def _connection(self, repo_name, repo, connection, first, after):
+        if connection == "pullRequests":
+            nodes = repo["pull_requests"]
+        elif connection == "issues":
+            nodes = repo["issues"]
+        else:
+            history = self.history(repo_name)
+            nodes = [
+                {"name": name, "target": {"committedDate": utc_z(committed)}}
+                for name, (_, committed) in sorted(history.tips.items())
+            ]
+        offset = decode_cursor(after)
+        page = nodes[offset : offset + first]
+        return {
+            "pageInfo": {
+                "hasNextPage": offset + first < len(nodes),
+                "endCursor": encode_cursor(offset + len(page)) if page else after,
+            },
+            "nodes": page,
+        }
+
+    def _search_count(self, search):
+        terms = dict(term.split(":", 1) for term in search.split() if ":" in term)
+        owner, _, repo_name = terms.get("repo", "").partition("/")
+        repo = self._repo(owner, repo_name)
+        if repo is None:
+            return 0
+        items = repo["pull_requests"] if terms.get("is") == "pr" else repo["issues"]
+        start, _, end = terms.get("created", "..").partition("..")
+        count = 0
+        for item in items:
+            created = parse_time(item["createdAt"])
+            if (not start or created >= parse_time(start)) and (not end or created <= parse_time(end)):
+                count += 1
+        return count
+
+
+def make_handler(fake):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            fake.handle(self, "GET")
+
+        def do_POST(self):
+            fake.handle(self, "POST")
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="启动本地模拟的 GitHub API 服务")
+    parser.add_argument("root", help="synthetic_classroom.py 生成的目录")
+    parser.add_argument("--port", type=int, default=8304)
+    parser.add_argument("--latency", type=float, default=0.0, help="每个请求的模拟网络延迟（秒）")
+    parser.add_argument("--rate-limit", type=int, default=5000, help="每个额度窗口内每类额度的请求数")
+    parser.add_argument("--rate-limit-window", type=int, default=3600, help="额度重置周期（秒）")
+    args = parser.parse_args()
+    fake = FakeGitHub(
+        args.root, latency=args.latency, rate_limit=args.rate_limit,
+        rate_limit_window=args.rate_limit_window, port=args.port,
+    )
+    url = fake.start()
+    print(f"模拟 GitHub API 已启动: {url}，使用 GITHUB_API_URL={url} 运行爬虫，Ctrl+C 退出")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        fake.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+"""
+离线基准测试：生成合成 Classroom，启动本地模拟的 GitHub API，
+依次运行爬虫各阶段和 dashboard 采集，输出每个阶段的耗时、请求数与峰值内存。
+
+用法（在 classroom-repos 目录下）：
+    python benchmarks/run_benchmarks.py --teams 40 --commits 200 --latency 0.02
+    python benchmarks/run_benchmarks.py --backends thread process --json bench.json
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime
+
+from fake_github import FakeGitHub
+from synthetic_classroom import CONFIG, generate_classroom
+
+# synthetic_classroom 已把 classroom-repos 目录加入 sys.path
+from github_classroom_api_dashboard import GitHubDashboardCollector, parse_date
+from github_classroom_spider import GithubClassroomSpider
+from http_cassette import Cassette
+from run_report import METRICS
+
+
+def children_cpu():
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+class StageTimer:
+    """
+    记录每个阶段的耗时、CPU时间、模拟服务收到的请求数和内存峰值；
+    传入被测对象的 RunReport 时，同时汇总其中的git子进程数、重试和限流等待等指标
+    """
+
+    def __init__(self, fake, quiet=True, trace_memory=False):
+        self.fake = fake
+        self.quiet = quiet
+        self.trace_memory = trace_memory
+        self.results = []
+
+    def run(self, suite, stage, func, report=None):
+        before = self.fake.stats()
+        before_stages = list(report.stages) if report is not None else []
+        before_run = report.run_id if report is not None else None
+        before_unscoped = Counter(report.unscoped) if report is not None else Counter()
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+        start_wall, start_cpu, start_children = time.perf_counter(), time.process_time(), children_cpu()
+        with open(os.devnull, "w") as devnull:
+            with contextlib.redirect_stdout(devnull) if self.quiet else contextlib.nullcontext():
+                func()
+        wall, cpu = time.perf_counter() - start_wall, time.process_time() - start_cpu
+        children = children_cpu() - start_children
+        after = self.fake.stats()
+        delta = {key: value - before.get(key, 0) for key, value in after.items() if value != before.get(key, 0)}
+        result = {
+            "suite": suite,
+            "stage": stage,
+            "wall_seconds": round(wall, 3),
+            "cpu_seconds": round(cpu, 3),
+            # 并发运行的阶段各自的子进程CPU时间互相包含，这里只取整个被测调用的差值
+            "children_cpu_seconds": round(children, 3),
+            "requests": delta.get("requests", 0),
+            "not_modified": delta.get("not_modified", 0),
+            "rate_limited": delta.get("rate_limited", 0),
+            "bytes": delta.get("bytes", 0),
+            "requests_by_endpoint": {
+                key.split(".", 1)[1]: value for key, value in delta.items() if key.startswith("requests.")
+            },
+            # ru_maxrss 为进程启动以来的峰值（Linux单位KB），子进程含git和本地扫描进程池
+            "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+            "children_peak_rss_mb": round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024, 1),
+        }
+        if report is not None:
+            # begin() 会重置 stages，因此按对象身份找出本次新增的阶段记录
+            new_stages = [r for r in report.stages if not any(r is b for b in before_stages)]
+            # 没有阶段上下文的计数；begin() 开始新的一次运行时会清空 unscoped
+            unscoped = report.unscoped if report.run_id != before_run else report.unscoped - before_unscoped
+            for metric in METRICS:
+                result[metric] = round(sum(r[metric] for r in new_stages) + unscoped.get(metric, 0), 3)
+        if self.trace_memory:
+            result["traced_peak_mb"] = round(tracemalloc.get_traced_memory()[1] / 1024 / 1024, 1)
+        self.results.append(result)
+        print(f"  {suite} / {stage}: {wall:.2f}s, {result['requests']} 个请求", file=sys.stderr)
+        return result
+
+
+def bench_spider(timer, manifest, classroom_root, api_url, run_dir, backend):
+    suite = f"spider[{backend}]"
+    if os.path.isdir(run_dir):
+        shutil.rmtree(run_dir)
+    os.makedirs(run_dir)
+    cwd = os.getcwd()
+    # 爬虫的中间数据、图表和统计缓存都使用相对路径，切换到独立目录保证每次都是冷启动
+    os.chdir(run_dir)
+    try:
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            spider = GithubClassroomSpider(
+                organization=manifest["organization"],
+                repos_dir=os.path.join(classroom_root, "repos"),
+                api_url=api_url,
+            )
+        spider.LOCAL_SCAN_BACKEND = backend
+        semestars = list(manifest["semestars"])
+        stages = [
+            ("get_classroom_members", spider.get_classroom_members),
+            ("get_accepted_assignments", lambda: spider.get_accepted_assignments(semestars)),
+            ("join_classroom_members_with_group_members", spider.join_classroom_members_with_group_members),
+            ("gather_data_from_local_repos", spider.gather_data_from_local_repos),
+            ("gather_data_from_local_repos(无变化重跑)", spider.gather_data_from_local_repos),
+            ("fetch_commit_authors", spider.fetch_commit_authors),
+            ("filter_commits_by_classroom_user", spider.filter_commits_by_classroom_user),
+            ("build_commit_rollup", spider.build_commit_rollup),
+            ("fetch_repo_activity", spider.fetch_repo_activity),
+            ("generate_chart_data", spider.generate_chart_data),
+            ("save_all", spider.save_all),
+        ]
+        for stage, func in stages:
+
+            def staged(stage=stage, func=func):
+                with spider.report.stage(stage):
+                    func()
+
+            timer.run(suite, stage, staged, report=spider.report)
+
+        # 完整的 auto_run：先按声明顺序串行，再按依赖并发（都不跳过阶段），最后跳过输入未变化的阶段
+        spider.AUTO_RUN_STAGES = None
+        runs = [
+            ("auto_run(串行)", 1, False),
+            ("auto_run(按依赖并发)", 4, False),
+            ("auto_run(跳过未变化阶段)", 4, True),
+        ]
+        for stage, workers, skip_unchanged in runs:
+            spider.AUTO_RUN_WORKERS = workers
+            spider.SKIP_UNCHANGED_STAGES = skip_unchanged
+            timer.run(suite, stage, spider.auto_run, report=spider.report)
+        # 录制一次全部请求，再只用录制的响应回放（不访问模拟服务）
+        spider.SKIP_UNCHANGED_STAGES = False
+        for stage, mode in [("auto_run(录制)", "record"), ("auto_run(回放)", "replay")]:
+            spider.http.cassette = Cassette(os.path.join(run_dir, "http_cassette.sqlite"), mode)
+            timer.run(suite, stage, spider.auto_run, report=spider.report)
+        spider.http.cassette = None
+    finally:
+        os.chdir(cwd)
+
+
+def bench_dashboard(timer, manifest, api_url, run_dir, concurrency):
+    suite = f"dashboard[concurrency={concurrency}]"
+    if os.path.isdir(run_dir):
+        shutil.rmtree(run_dir)
+    os.makedirs(run_dir)
+    semestar, info = next(iter(manifest["semestars"].items()))
+    options = dict(
+        token="benchmark",
+        organization=manifest["organization"],
+        semester=semestar,
+        start=parse_date(datetime.fromisoformat(info["start"]).date().isoformat()),
+        end=parse_date(datetime.fromisoformat(info["end"]).date().isoformat(), end_of_day=True),
+        cache_path=os.path.join(run_dir, "dashboard_cache.json"),
+        concurrency=concurrency,
+        http_cache_path=os.path.join(run_dir, "dashboard_http_cache.sqlite"),
+        api_url=api_url,
+    )
+    # 最后两次先录制全部请求，再只用录制的响应回放（不访问模拟服务）
+    runs = [
+        ("collect(冷启动)", {"resume": False}, None),
+        ("collect(条件请求重验证)", {"resume": False}, None),
+        ("collect(仓库检查点)", {}, None),
+        ("collect(录制)", {"resume": False}, "record"),
+        ("collect(回放)", {"resume": False}, "replay"),
+    ]
+    for stage, extra, cassette_mode in runs:
+        if cassette_mode:
+            extra["cassette"] = Cassette(os.path.join(run_dir, "dashboard_cassette.sqlite"), cassette_mode)
+        collector = GitHubDashboardCollector(**options, **extra)
+        timer.run(suite, stage, lambda: collector.collect(info["assignment_id"]), report=collector.report)
+
+
+def print_table(results):
+    headers = [
+        "套件", "阶段", "耗时(s)", "CPU(s)", "子进程CPU(s)", "git", "请求", "304", "限流", "重试",
+        "限流等待(s)", "响应KB", "峰值RSS(MB)",
+    ]
+    traced = any("traced_peak_mb" in r for r in results)
+    if traced:
+        headers.append("Python峰值(MB)")
+    rows = []
+    for r in results:
+        row = [
+            r["suite"], r["stage"], f"{r['wall_seconds']:.2f}", f"{r['cpu_seconds']:.2f}",
+            f"{r.get('children_cpu_seconds', 0):.2f}", str(r.get("git_processes", 0)),
+            str(r["requests"]), str(r["not_modified"]), str(r["rate_limited"]), str(r.get("http_retries", 0)),
+            f"{r.get('rate_limit_sleep_seconds', 0):.1f}", f"{r['bytes'] / 1024:.0f}", f"{r['peak_rss_mb']:.0f}",
+        ]
+        if traced:
+            row.append(f"{r.get('traced_peak_mb', 0):.1f}")
+        rows.append(row)
+
+    def width(text):
+        # 中文字符在终端中占两列
+        return sum(2 if ord(ch) > 0x2E80 else 1 for ch in text)
+
+    widths = [max(width(row[i]) for row in rows + [headers]) for i in range(len(headers))]
+    for row in [headers] + rows:
+        print("  ".join(cell + " " * (widths[i] - width(cell)) for i, cell in enumerate(row)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="用合成数据和本地模拟API离线测量爬虫与dashboard的性能")
+    parser.add_argument("--root", default=os.path.join(tempfile.gettempdir(), "classroom-bench"),
+                        help="合成数据和运行目录，参数不变时复用已生成的仓库")
+    parser.add_argument("--semestars", nargs="+", default=["25spring"], choices=sorted(CONFIG["assignment_id"]))
+    parser.add_argument("--teams", type=int, default=10)
+    parser.add_argument("--members", type=int, default=4)
+    parser.add_argument("--branches", type=int, default=3)
+    parser.add_argument("--commits", type=int, default=60)
+    parser.add_argument("--files", type=int, default=20)
+    parser.add_argument("--template-commits", type=int, default=10)
+    parser.add_argument("--prs", type=int, default=8)
+    parser.add_argument("--issues", type=int, default=12)
+    parser.add_argument("--seed", type=int, default=304)
+    parser.add_argument("--latency", type=float, default=0.01, help="模拟API每个请求的延迟（秒）")
+    parser.add_argument("--rate-limit", type=int, default=5000, help="模拟API每个额度窗口的请求数")
+    parser.add_argument("--rate-limit-window", type=int, default=3600, help="模拟API额度重置周期（秒）")
+    parser.add_argument("--backends", nargs="+", default=["thread"], choices=["thread", "process"],
+                        help="爬虫本地扫描的执行方式，每种各跑一遍")
+    parser.add_argument("--dashboard-concurrency", nargs="+", type=int, default=[1, 8],
+                        help="dashboard采集的并发数，每个取值各跑一遍")
+    parser.add_argument("--skip-spider", action="store_true")
+    parser.add_argument("--skip-dashboard", action="store_true")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="用tracemalloc记录每个阶段的Python内存峰值（会明显拖慢运行）")
+    parser.add_argument("--verbose", action="store_true", help="显示爬虫与dashboard自身的日志")
+    parser.add_argument("--json", help="把结果写入该JSON文件")
+    args = parser.parse_args()
+
+    os.environ.setdefault("GITHUB_TOKEN", "benchmark")
+    classroom_root = os.path.abspath(os.path.join(args.root, "classroom"))
+    start = time.perf_counter()
+    manifest = generate_classroom(
+        classroom_root, semestars=args.semestars, teams=args.teams, members=args.members,
+        branches=args.branches, commits=args.commits, files=args.files,
+        template_commits=args.template_commits, prs=args.prs, issues=args.issues, seed=args.seed,
+    )
+    print(f"合成数据就绪: {len(manifest['repos'])} 个仓库 ({time.perf_counter() - start:.1f}s)", file=sys.stderr)
+
+    fake = FakeGitHub(
+        classroom_root, latency=args.latency, rate_limit=args.rate_limit,
+        rate_limit_window=args.rate_limit_window,
+    )
+    api_url = fake.start()
+    if args.trace_memory:
+        tracemalloc.start()
+    timer = StageTimer(fake, quiet=not args.verbose, trace_memory=args.trace_memory)
+    try:
+        if not args.skip_spider:
+            for backend in args.backends:
+                run_dir = os.path.join(os.path.abspath(args.root), f"spider-{backend}")
+                bench_spider(timer, manifest, classroom_root, api_url, run_dir, backend)
+        if not args.skip_dashboard:
+            for concurrency in args.dashboard_concurrency:
+                run_dir = os.path.join(os.path.abspath(args.root), f"dashboard-{concurrency}")
+                bench_dashboard(timer, manifest, api_url, run_dir, concurrency)
+    finally:
+        fake.stop()
+
+    print_table(timer.results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(
+                {"options": manifest["options"], "latency": args.latency, "results": timer.results},
+                f, indent=2, ensure_ascii=False,
+            )
+
+
+if __name__ == "__main__":
+    main()
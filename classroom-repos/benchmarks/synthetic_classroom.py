@@ -0,0 +1,386 @@
+"""
+生成合成的 GitHub Classroom 数据，用于离线基准测试：
+- 在本地磁盘上按 gather_data_from_local_repos 期望的目录结构生成N个团队仓库
+  (repos/team-project-<学期>-submissions/<仓库名>)，分支数、commit数、文件数、模板commit可配置
+- 同时写出 classroom.json，记录组织成员、小组成员、PR、Issue等远程数据，供 fake_github.py 模拟API
+
+仓库通过 git fast-import 一次性写入，所有随机数由 seed 和仓库名决定，相同参数生成的数据完全相同。
+模板commit在同一学期的所有仓库中内容、作者、时间都一致，因此SHA相同，与 Classroom 从模板仓库创建的真实情况一致。
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+from datetime import timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from github_classroom_spider import CONFIG  # noqa: E402
+
+MANIFEST_FILE = "classroom.json"
+TEMPLATE_AUTHOR = ("CS304 Template", "template@sustech-cs304.example")
+TA_MEMBER = {"id": "U_ta", "login": "cs304-ta", "name": "CS304 TA", "email": "ta@sustech-cs304.example"}
+EXTERNAL_AUTHOR = ("Outside Contributor", "contributor@example.com")  # 不是GitHub用户
+SOURCE_EXTENSIONS = [".py", ".java", ".js", ".ts", ".vue", ".md", ".json", ".css"]
+MESSAGES = [
+    "fix bug in login page",
+    "add unit tests for service layer",
+    "update README",
+    "refactor: extract common utils",
+    "feat: support file upload",
+    "merge latest changes",
+    "WIP",
+    "修复登录页面的问题",
+    "新增用户管理模块",
+    "更新文档",
+    "feat: 新增项目看板页面",
+    "fix: 修复分页查询bug",
+    "docs: update 接口文档 and deployment guide",
+    "Implement the sprint 2 backlog items: task board, notifications, comment threads, "
+    "and the admin statistics page with charts",
+    "完成第二次迭代的全部需求，包括任务看板、消息通知、评论功能以及管理员统计页面的图表展示",
+]
+PR_TITLES = ["Feature: task board", "Fix login bug", "Add CI workflow", "Refactor API", "新增通知功能"]
+ISSUE_TITLES = ["Login fails on Safari", "Add dark mode", "文档缺少部署说明", "Sprint 2 planning", "Bug: 分页错误"]
+ISSUE_LABELS = ["bug", "enhancement", "documentation", "question"]
+# 一天中各小时提交的相对权重（北京时间），下午和深夜较多
+HOUR_WEIGHTS = [4, 3, 2, 1, 1, 1, 1, 1, 2, 4, 6, 6, 4, 5, 7, 8, 8, 7, 6, 7, 9, 10, 9, 7]
+
+
+def repo_name_for(semestar, team):
+    # 与 extract_team_name_from_repo 识别的仓库名保持一致
+    if semestar == "23spring":
+        return f"team-project-{team}"
+    return f"team-project-{semestar}-team{team}"
+
+
+def github_time(dt):
+    # GitHub API 的时间格式：UTC，秒级，以Z结尾
+    return (dt - dt.utcoffset()).replace(tzinfo=None).isoformat() + "Z"
+
+
+class FastImportStream:
+    """拼装 git fast-import 输入流，每个文件保存完整内容（按分支各自维护）"""
+
+    def __init__(self):
+        self.chunks = []
+        self.next_mark = 1
+
+    def data(self, payload):
+        raw = payload.encode("utf-8")
+        self.chunks.append(f"data {len(raw)}\n".encode("ascii"))
+        self.chunks.append(raw)
+        self.chunks.append(b"\n")
+
+    def commit(self, ref, author, when, message, parent=None, merge=None, changes=()):
+        mark = self.next_mark
+        self.next_mark += 1
+        name, email = author
+        stamp = f"{int(when.timestamp())} {when.strftime('%z')}"
+        self.chunks.append(f"commit {ref}\nmark :{mark}\n".encode("utf-8"))
+        self.chunks.append(f"author {name} <{email}> {stamp}\n".encode("utf-8"))
+        self.chunks.append(f"committer {name} <{email}> {stamp}\n".encode("utf-8"))
+        self.data(message)
+        if parent is not None:
+            self.chunks.append(f"from :{parent}\n".encode("ascii"))
+        if merge is not None:
+            self.chunks.append(f"merge :{merge}\n".encode("ascii"))
+        for path, content in changes:
+            if content is None:
+                self.chunks.append(f"D {path}\n".encode("utf-8"))
+            else:
+                self.chunks.append(f"M 100644 inline {path}\n".encode("utf-8"))
+                self.data(content)
+        return mark
+
+    def reset(self, ref, mark):
+        self.chunks.append(f"reset {ref}\nfrom :{mark}\n\n".encode("utf-8"))
+
+    def bytes(self):
+        return b"".join(self.chunks)
+
+
+class BranchState:
+    def __init__(self, files, tip):
+        self.files = dict(files)  # 路径 -> 行列表（修改时整体替换，分支之间可共享）
+        self.tip = tip
+        self.touched = set()
+
+
+def edit_file(rng, lines, tag):
+    # 在文件末尾追加若干行，偶尔删除一段，返回新的行列表
+    lines = list(lines)
+    if lines and rng.random() < 0.3:
+        start = rng.randrange(len(lines))
+        del lines[start : start + rng.randint(1, 8)]
+    lines.extend(f"{tag}_{i} = {rng.randint(0, 10**6)}" for i in range(rng.randint(1, 40)))
+    return lines
+
+
+def render(lines):
+    return "\n".join(lines) + "\n" if lines else ""
+
+
+def template_stream(stream, options, start):
+    """同一学期所有仓库共用的模板提交，时间在学期开始之前，因此不会被计入学期数据"""
+    rng = random.Random(f"{options['seed']}-template")
+    files = {}
+    tip = None
+    for i in range(options["template_commits"]):
+        when = start - timedelta(days=30) + timedelta(hours=6 * i)
+        changes = []
+        for _ in range(min(3, options["files"])):
+            path = f"src/module{rng.randrange(options['files'])}{rng.choice(SOURCE_EXTENSIONS)}"
+            files[path] = edit_file(rng, files.get(path, []), f"template{i}")
+            changes.append((path, render(files[path])))
+        tip = stream.commit(
+            "refs/heads/main", TEMPLATE_AUTHOR, when, f"template: initial project skeleton {i}",
+            parent=tip, changes=changes,
+        )
+    return files, tip
+
+
+def build_repo(path, repo_name, students, options, window):
+    """用 fast-import 生成一个团队仓库，返回该仓库的分支列表"""
+    start, end = window
+    rng = random.Random(f"{options['seed']}-{repo_name}")
+    stream = FastImportStream()
+    files, template_tip = template_stream(stream, options, start)
+    branch_names = ["main"] + [
+        f"feature/{word}-{i}"
+        for i, word in enumerate(
+            rng.sample(["login", "board", "upload", "notify", "admin", "search", "chat", "api"] * 4,
+                       options["branches"]),
+            start=1,
+        )
+    ]
+    # 作者：组员按 1/(k+1) 加权，偶尔有助教和外部贡献者；部分组员还用第二个邮箱提交
+    authors = [(s["name"], s["email"]) for s in students]
+    weights = [1 / (k + 1) for k in range(len(authors))]
+    authors += [(TA_MEMBER["name"], TA_MEMBER["email"]), EXTERNAL_AUTHOR]
+    weights += [0.05, 0.03]
+    alias_emails = {s["email"]: s["alt_email"] for s in students if s.get("alt_email")}
+
+    # 提交时间：大部分均匀分布在学期内，约30%集中在最后两周（ddl）
+    span_days = max((end - start).days, 1)
+    times = []
+    for _ in range(options["commits"]):
+        if rng.random() < 0.3:
+            day = span_days - rng.random() * min(14, span_days)
+        else:
+            day = rng.random() * span_days
+        date = start + timedelta(days=int(day))
+        hour = rng.choices(range(24), weights=HOUR_WEIGHTS)[0]
+        times.append(date + timedelta(hours=hour, minutes=rng.randrange(60), seconds=rng.randrange(60)))
+    times.sort()
+
+    main = BranchState(files, template_tip)
+    branches = {"main": main}
+    last_commit_index = {}
+    assignment = []
+    for i in range(len(times)):
+        name = "main" if rng.random() < 0.5 or len(branch_names) == 1 else rng.choice(branch_names[1:])
+        assignment.append(name)
+        last_commit_index[name] = i
+    merge_back = {name for name in branch_names[1:] if rng.random() < 0.7}
+
+    big_files = 0
+    for i, when in enumerate(times):
+        name = assignment[i]
+        if name not in branches:
+            branches[name] = BranchState(main.files, main.tip)
+        state = branches[name]
+        author = rng.choices(authors, weights=weights)[0]
+        if author[1] in alias_emails and rng.random() < 0.3:
+            author = (author[0], alias_emails[author[1]])
+        changes = []
+        for _ in range(rng.randint(1, 3)):
+            file_path = f"src/module{rng.randrange(options['files'])}{rng.choice(SOURCE_EXTENSIONS)}"
+            state.files[file_path] = edit_file(rng, state.files.get(file_path, []), f"c{i}")
+            state.touched.add(file_path)
+            changes.append((file_path, render(state.files[file_path])))
+        if rng.random() < 0.01:
+            # 超过 single_file_insertion_limit 的生成文件
+            big_files += 1
+            file_path = f"assets/bundle{big_files}.js"
+            state.files[file_path] = [f"var b{k} = {k};" for k in range(2500)]
+            state.touched.add(file_path)
+            changes.append((file_path, render(state.files[file_path])))
+        state.tip = stream.commit(
+            f"refs/heads/{name}", author, when, rng.choice(MESSAGES), parent=state.tip, changes=changes
+        )
+        if name != "main" and last_commit_index[name] == i and name in merge_back:
+            # 分支最后一个commit之后合并回main，冲突文件以分支版本为准
+            merged = [(p, render(state.files[p])) for p in sorted(state.touched)]
+            for p in state.touched:
+                main.files[p] = state.files[p]
+            main.tip = stream.commit(
+                "refs/heads/main", author, when + timedelta(minutes=5),
+                f"Merge branch '{name}' into main", parent=main.tip, merge=state.tip, changes=merged,
+            )
+    for name in branch_names[1:]:
+        if name not in branches:
+            # 没有提交的分支直接指向main
+            stream.reset(f"refs/heads/{name}", main.tip)
+
+    os.makedirs(path, exist_ok=True)
+    subprocess.run(["git", "init", "-q", "--initial-branch=main", path], check=True)
+    subprocess.run(
+        ["git", "-C", path, "fast-import", "--quiet"], input=stream.bytes(), check=True
+    )
+    return branch_names
+
+
+def remote_activity(rng, students, options, window):
+    """生成一个仓库的PR和Issue，字段与爬虫GraphQL查询的节点一致"""
+    start, end = window
+    span = (end - start).total_seconds()
+
+    def moment():
+        return start + timedelta(seconds=rng.random() * span)
+
+    def closed_after(created):
+        return github_time(created + timedelta(hours=rng.randint(1, 240)))
+
+    number = 0
+    prs, issues = [], []
+    for _ in range(rng.randint(options["prs"] // 2, options["prs"])):
+        number += 1
+        created = moment()
+        state = rng.random()
+        closed = closed_after(created) if state < 0.8 else None
+        prs.append(
+            {
+                "title": rng.choice(PR_TITLES),
+                "createdAt": github_time(created),
+                "closedAt": closed,
+                "mergedAt": closed if state < 0.65 else None,
+                "number": number,
+                "author": {"login": rng.choice(students)["login"]},
+                "commits": {"totalCount": rng.randint(1, 12)},
+            }
+        )
+    for _ in range(rng.randint(options["issues"] // 2, options["issues"])):
+        number += 1
+        created = moment()
+        issues.append(
+            {
+                "title": rng.choice(ISSUE_TITLES),
+                "createdAt": github_time(created),
+                "closedAt": closed_after(created) if rng.random() < 0.6 else None,
+                "number": number,
+                "author": {"login": rng.choice(students)["login"]},
+                "comments": {"totalCount": rng.randint(0, 6)},
+                "labels": {"nodes": [{"name": n} for n in rng.sample(ISSUE_LABELS, rng.randint(0, 2))]},
+            }
+        )
+    for items in (prs, issues):
+        items.sort(key=lambda item: item["createdAt"])
+    return prs, issues
+
+
+def generate_classroom(root, semestars=("25spring",), teams=10, members=4, branches=3, commits=60,
+                       files=20, template_commits=10, prs=8, issues=12, organization="bench-org", seed=304):
+    """
+    在 root 下生成 repos/ 和 classroom.json，返回 manifest。
+    root 已存在且参数相同时直接复用，参数不同时重新生成。
+    """
+    options = {
+        "semestars": list(semestars), "teams": teams, "members": members, "branches": branches,
+        "commits": commits, "files": files, "template_commits": template_commits, "prs": prs,
+        "issues": issues, "organization": organization, "seed": seed,
+    }
+    manifest_path = os.path.join(root, MANIFEST_FILE)
+    if os.path.exists(manifest_path):
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest["options"] == options:
+            return manifest
+    if os.path.isdir(root):
+        shutil.rmtree(root)
+    os.makedirs(root)
+
+    manifest = {
+        "options": options,
+        "organization": organization,
+        "members": [dict(TA_MEMBER)],
+        "semestars": {},
+        "repos": {},
+    }
+    user_number = 0
+    for semestar in semestars:
+        window = CONFIG["semestar_range"][semestar]
+        assignment_id = CONFIG["assignment_id"][semestar]
+        semestar_dir = os.path.join("repos", f"team-project-{semestar}-submissions")
+        manifest["semestars"][semestar] = {
+            "assignment_id": assignment_id,
+            "start": window[0].isoformat(),
+            "end": window[1].isoformat(),
+            "repos": [],
+        }
+        for team in range(1, teams + 1):
+            repo_name = repo_name_for(semestar, team)
+            rng = random.Random(f"{seed}-{repo_name}-people")
+            students = []
+            for k in range(members):
+                user_number += 1
+                login = f"stu{semestar}-{team:02d}-{k + 1}"
+                student = {
+                    "id": f"U_{user_number:06d}",
+                    "database_id": 100000 + user_number,
+                    "login": login,
+                    "name": f"Student {semestar} {team}-{k + 1}",
+                    "email": f"{login}@mail.sustech.edu.cn",
+                }
+                if rng.random() < 0.25:
+                    student["alt_email"] = f"{student['database_id']}+{login}@users.noreply.github.com"
+                students.append(student)
+            manifest["members"].extend(
+                {"id": s["id"], "login": s["login"], "name": s["name"], "email": s["email"]}
+                for s in students
+            )
+            relative_path = os.path.join(semestar_dir, repo_name)
+            branch_names = build_repo(os.path.join(root, relative_path), repo_name, students, options, window)
+            prs_data, issues_data = remote_activity(rng, students, options, window)
+            manifest["semestars"][semestar]["repos"].append(repo_name)
+            manifest["repos"][repo_name] = {
+                "path": relative_path,
+                "semestar": semestar,
+                "students": students,
+                "branches": branch_names,
+                "pull_requests": prs_data,
+                "issues": issues_data,
+            }
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False)
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="生成用于基准测试的合成 GitHub Classroom 仓库与远程数据")
+    parser.add_argument("root", help="输出目录，生成 repos/ 与 classroom.json")
+    parser.add_argument("--semestars", nargs="+", default=["25spring"], choices=sorted(CONFIG["assignment_id"]))
+    parser.add_argument("--teams", type=int, default=10, help="每个学期的团队仓库数")
+    parser.add_argument("--members", type=int, default=4, help="每个团队的成员数")
+    parser.add_argument("--branches", type=int, default=3, help="每个仓库main以外的分支数")
+    parser.add_argument("--commits", type=int, default=60, help="每个仓库学期内的commit数（不含合并commit）")
+    parser.add_argument("--files", type=int, default=20, help="每个仓库的源文件数")
+    parser.add_argument("--template-commits", type=int, default=10, help="同一学期所有仓库共享的模板commit数")
+    parser.add_argument("--prs", type=int, default=8, help="每个仓库PR数上限")
+    parser.add_argument("--issues", type=int, default=12, help="每个仓库Issue数上限")
+    parser.add_argument("--seed", type=int, default=304)
+    args = parser.parse_args()
+    manifest = generate_classroom(
+        args.root, semestars=args.semestars, teams=args.teams, members=args.members,
+        branches=args.branches, commits=args.commits, files=args.files,
+        template_commits=args.template_commits, prs=args.prs, issues=args.issues, seed=args.seed,
+    )
+    print(f"已生成 {len(manifest['repos'])} 个仓库: {os.path.abspath(args.root)}")
+
+
+if __name__ == "__main__":
+    main()
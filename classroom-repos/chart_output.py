@@ -0,0 +1,87 @@
+import gzip
+import hashlib
+import json
+import os
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+MANIFEST_FILE = "manifest.json"
+# 拆分输出中由本模块管理的文件后缀，清理旧文件时只删除这些
+SPLIT_SUFFIXES = (".json", ".json.gz", ".json.br")
+
+
+def write_split_chart_data(chart_data, out_dir, log=print):
+    """
+    把 chart_data 按 学期/图表 拆分输出到 out_dir，网站每个图表只需下载自己的那一份：
+    - <学期>/<图表>.<内容哈希>.json：紧凑JSON，内容变化时文件名随之变化，可以设置永久缓存
+    - 每个文件旁预压缩的 .gz，安装了 brotli 时还有 .br，静态服务器可直接返回（压缩后不更小时不生成）
+    - manifest.json：{"version": 1, "charts": {学期: {图表: 相对路径}}}，每次运行后指向最新文件
+    内容未变的文件不会重写，manifest 不再引用的旧文件会被删除。返回 manifest。
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    manifest = {"version": 1, "charts": {}}
+    keep = set()
+    written = 0
+    for semester, charts in sorted(chart_data.items()):
+        semester_dir = os.path.join(out_dir, semester)
+        os.makedirs(semester_dir, exist_ok=True)
+        for chart, value in sorted(charts.items()):
+            payload = json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+            digest = hashlib.blake2b(payload, digest_size=6).hexdigest()
+            name = f"{semester}/{chart}.{digest}.json"
+            path = os.path.join(out_dir, name)
+            manifest["charts"].setdefault(semester, {})[chart] = name
+            variants = {path: lambda: payload, f"{path}.gz": lambda: gzip.compress(payload, 9, mtime=0)}
+            if brotli is not None:
+                variants[f"{path}.br"] = lambda: brotli.compress(payload, quality=11)
+            for variant_path, encode in variants.items():
+                if os.path.exists(variant_path):
+                    keep.add(os.path.abspath(variant_path))
+                    continue
+                data = encode()
+                if variant_path != path and len(data) >= len(payload):
+                    continue  # 很小的图表压缩后反而更大，不生成压缩版本
+                _write_bytes(variant_path, data)
+                keep.add(os.path.abspath(variant_path))
+                written += 1
+    manifest_bytes = (json.dumps(manifest, indent=2, ensure_ascii=False) + "\n").encode("utf-8")
+    manifest_path = os.path.join(out_dir, MANIFEST_FILE)
+    if _read_bytes(manifest_path) != manifest_bytes:
+        _write_bytes(manifest_path, manifest_bytes)
+    removed = _remove_stale(out_dir, keep)
+    log(f"Split chart data into {out_dir}: {written} files written, {removed} stale files removed")
+    return manifest
+
+
+def _remove_stale(out_dir, keep):
+    removed = 0
+    for semester in os.listdir(out_dir):
+        semester_dir = os.path.join(out_dir, semester)
+        if not os.path.isdir(semester_dir):
+            continue
+        for file_name in os.listdir(semester_dir):
+            path = os.path.abspath(os.path.join(semester_dir, file_name))
+            if file_name.endswith(SPLIT_SUFFIXES) and path not in keep:
+                os.remove(path)
+                removed += 1
+        if not os.listdir(semester_dir):
+            os.rmdir(semester_dir)
+    return removed
+
+
+def _read_bytes(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def _write_bytes(path, data):
+    # 先写临时文件再替换，网站不会读到写了一半的文件
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
@@ -0,0 +1,77 @@
+from collections import Counter
+from datetime import datetime, timedelta
+
+# Asia/Shanghai 自1991年起没有夏令时，按固定的 UTC+8 换算本地日期和小时
+CHINA_UTC_OFFSET_SECONDS = 8 * 3600
+CELL_DIMS = ("team", "author", "day", "hour")
+MESSAGE_DIMS = ("team", "lang", "length")
+
+
+def day_to_date(day):
+    """北京时间的天数（自1970-01-01起）-> ISO 日期字符串"""
+    return (datetime(1970, 1, 1) + timedelta(days=day)).date().isoformat()
+
+
+class CommitRollup:
+    """
+    commit 的预聚合立方体，图表序列都由它分组求和得到，不再扫描原始commit：
+    - cells: (小组, 作者, 日, 小时) -> [commit数, 增加行数, 删除行数]，日/小时为北京时间
+    - messages: (小组, message语言, message长度) -> commit数
+    commit 逐个 add 进来；每个小组可以单独导出/导入（records/add_records），只重新聚合有变化的小组。
+    """
+
+    def __init__(self):
+        self.cells = {}
+        self.messages = Counter()
+
+    def add(self, team, author, timestamp, insertions=0, deletions=0, lang=None, length=None):
+        """加入一个commit，timestamp 为 epoch 秒；lang 为 None 时不计入 message 统计"""
+        local_seconds = int(timestamp) + CHINA_UTC_OFFSET_SECONDS
+        key = (team, author, local_seconds // 86400, local_seconds % 86400 // 3600)
+        cell = self.cells.setdefault(key, [0, 0, 0])
+        cell[0] += 1
+        cell[1] += insertions
+        cell[2] += deletions
+        if lang is not None:
+            self.messages[(team, lang, length)] += 1
+
+    def records(self, team):
+        """
+        一个小组的聚合结果，紧凑且顺序固定，可直接存为JSON：
+        {"cells": [[作者, 日, 小时, commit数, 增加行数, 删除行数]], "messages": [[语言, 长度, commit数]]}
+        """
+        cells = [[author, day, hour, *values] for (t, author, day, hour), values in self.cells.items() if t == team]
+        messages = [[lang, length, count] for (t, lang, length), count in self.messages.items() if t == team]
+        cells.sort(key=lambda cell: (cell[1], cell[2], str(cell[0])))
+        messages.sort()
+        return {"cells": cells, "messages": messages}
+
+    def add_records(self, team, records):
+        """合并 records 导出的一个小组的结果"""
+        for author, day, hour, commits, insertions, deletions in records["cells"]:
+            cell = self.cells.setdefault((team, author, day, hour), [0, 0, 0])
+            cell[0] += commits
+            cell[1] += insertions
+            cell[2] += deletions
+        for lang, length, count in records["messages"]:
+            self.messages[(team, lang, length)] += count
+
+    def totals(self, *dims):
+        """按 CELL_DIMS 中的若干维度分组求和：{键: [commit数, 增加行数, 删除行数]}，只有一个维度时键不是元组"""
+        index = [CELL_DIMS.index(dim) for dim in dims]
+        grouped = {}
+        for key, values in self.cells.items():
+            group = key[index[0]] if len(index) == 1 else tuple(key[i] for i in index)
+            total = grouped.setdefault(group, [0, 0, 0])
+            total[0] += values[0]
+            total[1] += values[1]
+            total[2] += values[2]
+        return grouped
+
+    def message_totals(self, *dims):
+        """按 MESSAGE_DIMS 中的若干维度分组统计 commit 数，只有一个维度时键不是元组"""
+        index = [MESSAGE_DIMS.index(dim) for dim in dims]
+        grouped = Counter()
+        for key, count in self.messages.items():
+            grouped[key[index[0]] if len(index) == 1 else tuple(key[i] for i in index)] += count
+        return grouped
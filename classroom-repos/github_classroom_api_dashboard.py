@@ -1,13 +1,16 @@
 import argparse
+import asyncio
 import json
 import os
 import re
+import sqlite3
 import time
 import urllib.error
 import urllib.parse
 import urllib.request
 import ssl
-from collections import Counter
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 
 try:
@@ -15,14 +18,23 @@ try:
 except ImportError:
     dotenv = None
 
+from chart_output import write_split_chart_data
+from commit_rollup import CommitRollup, day_to_date
+from http_cassette import MODES as CASSETTE_MODES, Cassette, CassetteMiss, ReplayedResponse
+from run_report import RunReport
+
 
 DEFAULT_ORG = "sustech-cs304"
+DEFAULT_API_URL = "https://api.github.com"
 DEFAULT_SEMESTER = "26spring"
 DEFAULT_START = "2026-02-01"
 DEFAULT_END = "2026-06-30"
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 DEFAULT_OUTPUT = os.path.abspath(os.path.join(SCRIPT_DIR, "..", "static", "chart_data.json"))
 DEFAULT_CACHE = os.path.abspath(os.path.join(SCRIPT_DIR, f"dashboard_cache_{DEFAULT_SEMESTER}.json"))
+DEFAULT_HTTP_CACHE = os.path.abspath(os.path.join(SCRIPT_DIR, f"dashboard_http_cache_{DEFAULT_SEMESTER}.sqlite"))
+DEFAULT_REPORT = os.path.abspath(os.path.join(SCRIPT_DIR, f"dashboard_report_{DEFAULT_SEMESTER}.jsonl"))
+DEFAULT_CASSETTE = os.path.abspath(os.path.join(SCRIPT_DIR, f"dashboard_cassette_{DEFAULT_SEMESTER}.sqlite"))
 
 
 def parse_date(value, end_of_day=False):
@@ -63,6 +75,13 @@ def extract_team_name(semester_key, repo_name):
     return repo_name
 
 
+def with_params(url, params):
+    if not params:
+        return url
+    separator = "&" if "?" in url else "?"
+    return f"{url}{separator}{urllib.parse.urlencode(params)}"
+
+
 def parse_next_link(link_header):
     for item in link_header.split(","):
         match = re.match(r'\s*<([^>]+)>;\s*rel="([^"]+)"', item)
@@ -71,14 +90,79 @@ def parse_next_link(link_header):
     return None
 
 
+class HttpCache:
+    # One SQLite row per page URL, written as soon as the page is fetched instead of rewriting a JSON file.
+    def __init__(self, path):
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, timeout=60, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            "url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, link TEXT NOT NULL, body TEXT NOT NULL)"
+        )
+
+    def get(self, url):
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT etag, last_modified, link, body FROM pages WHERE url = ?", (url,)
+            ).fetchone()
+        if row is None:
+            return None
+        return dict(zip(("etag", "last_modified", "link", "body"), row))
+
+    def put(self, url, etag, last_modified, link, body):
+        with self.lock, self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO pages (url, etag, last_modified, link, body) VALUES (?, ?, ?, ?, ?)",
+                (url, etag, last_modified, link, body),
+            )
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+
 class GitHubDashboardCollector:
-    def __init__(self, token, organization, semester, start, end, cache_path=None):
+    def __init__(
+        self,
+        token,
+        organization,
+        semester,
+        start,
+        end,
+        cache_path=None,
+        concurrency=1,
+        http_cache_path=None,
+        resume=True,
+        count_mode="search",
+        branch_crawl="compare",
+        api_url=DEFAULT_API_URL,
+        report_path=None,
+        profile=None,
+        cassette=None,
+    ):
         self.organization = organization
+        self.api_url = api_url.rstrip("/")
         self.semester = semester.lower()
         self.start = start
         self.end = end
         self.cache_path = cache_path
         self.cache = load_existing_json(cache_path) if cache_path else {}
+        self.concurrency = max(1, concurrency)
+        # ETag/Last-Modified per page URL; 304 responses reuse the stored body and are free of rate limit.
+        self.http_cache = HttpCache(http_cache_path) if http_cache_path else None
+        # Reuse per-repository checkpoints of an earlier run; False revalidates every page via conditional requests.
+        self.resume = resume
+        # "search": one GraphQL search request per repo for issue/PR counts; "page": page through every item.
+        self.count_mode = count_mode
+        # "compare": crawl the default branch, then only what each other branch adds on top of it; "full": every branch.
+        self.branch_crawl = branch_crawl
+        # Records every response to an on-disk cassette, or replays recorded responses without any network access.
+        self.cassette = cassette
+        # Per-stage and per-repo timings, request counts, retries and rate-limit sleeps as JSON lines.
+        self.report = RunReport(
+            path=report_path, profile=profile, profile_dir=os.path.join(SCRIPT_DIR, "profiles"), log=self.log
+        )
         self.headers = {
             "Authorization": f"Bearer {token}",
             "Accept": "application/vnd.github+json",
@@ -89,22 +173,49 @@ class GitHubDashboardCollector:
     def log(self, message):
         print(f"[api-dashboard] {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} - {message}")
 
-    def request(self, url, params=None):
-        if params:
-            separator = "&" if "?" in url else "?"
-            url = f"{url}{separator}{urllib.parse.urlencode(params)}"
+    def request(self, url, params=None, headers=None, data=None):
+        url = with_params(url, params)
+        method = "POST" if data is not None else "GET"
+        if self.cassette is not None and self.cassette.replaying:
+            self.report.count("http_replayed")
+            return ReplayedResponse(url, *self.cassette.replay(method, url, data))
+        if self.cassette is not None:
+            # A conditional request may come back as a bodiless 304, so always record full responses.
+            headers = {
+                name: value
+                for name, value in (headers or {}).items()
+                if name not in ("If-None-Match", "If-Modified-Since")
+            }
         for attempt in range(4):
-            request = urllib.request.Request(url, headers=self.headers, method="GET")
+            request = urllib.request.Request(
+                url,
+                data=data,
+                headers={**self.headers, **(headers or {})},
+                method=method,
+            )
+            self.report.count("http_requests")
             try:
-                return urllib.request.urlopen(request, timeout=30)
+                response = urllib.request.urlopen(request, timeout=30)
+                if self.cassette is None:
+                    return response
+                with response:
+                    content = response.read()
+                self.cassette.record(method, url, data, response.status, response.headers.items(), content)
+                return ReplayedResponse(url, response.status, response.headers.items(), content)
             except urllib.error.HTTPError as error:
+                if error.code == 304 and headers:
+                    # Conditional request hit: the caller reuses its stored body.
+                    return error
                 if error.code == 403 and error.headers.get("X-RateLimit-Remaining") == "0":
                     reset_at = int(error.headers.get("X-RateLimit-Reset", "0"))
                     wait_seconds = max(reset_at - int(time.time()) + 5, 5)
                     self.log(f"Rate limit reached. Sleeping {wait_seconds}s.")
+                    self.report.count("http_retries")
+                    self.report.count("rate_limit_sleep_seconds", wait_seconds)
                     time.sleep(wait_seconds)
                     continue
                 if error.code in {500, 502, 503, 504} and attempt < 3:
+                    self.report.count("http_retries")
                     time.sleep(2**attempt)
                     continue
                 raise
@@ -112,6 +223,7 @@ class GitHubDashboardCollector:
                 if attempt < 3:
                     wait_seconds = 2**attempt
                     self.log(f"Request failed ({error}). Retrying in {wait_seconds}s.")
+                    self.report.count("http_retries")
                     time.sleep(wait_seconds)
                     continue
                 raise
@@ -121,14 +233,39 @@ class GitHubDashboardCollector:
         params = dict(params or {})
         params.setdefault("per_page", 100)
         while url:
-            response = self.request(url, params=params)
-            with response:
-                yield from json.loads(response.read().decode("utf-8"))
-                url = parse_next_link(response.headers.get("Link", ""))
+            page_url = with_params(url, params)
+            body, link = self.fetch_page(page_url)
+            yield from json.loads(body)
+            url = parse_next_link(link)
             params = None
 
+    def fetch_page(self, url):
+        if self.http_cache is None:
+            with self.request(url) as response:
+                body = response.read()
+                self.report.count("http_bytes", len(body))
+                return body.decode("utf-8"), response.headers.get("Link", "")
+        cached = self.http_cache.get(url)
+        headers = {}
+        if cached and cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached and cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+        with self.request(url, headers=headers) as response:
+            if response.status == 304:
+                return cached["body"], cached["link"]
+            raw_body = response.read()
+            self.report.count("http_bytes", len(raw_body))
+            body = raw_body.decode("utf-8")
+            link = response.headers.get("Link", "")
+            etag = response.headers.get("ETag")
+            last_modified = response.headers.get("Last-Modified")
+        if etag or last_modified:
+            self.http_cache.put(url, etag, last_modified, link, body)
+        return body, link
+
     def get_accepted_repositories(self, assignment_id):
-        url = f"https://api.github.com/assignments/{assignment_id}/accepted_assignments"
+        url = f"{self.api_url}/assignments/{assignment_id}/accepted_assignments"
         repos = []
         for item in self.paginate(url):
             repo = item.get("repository") or {}
@@ -145,32 +282,140 @@ class GitHubDashboardCollector:
         return repos
 
     def get_branches(self, repo_name):
-        url = f"https://api.github.com/repos/{self.organization}/{repo_name}/branches"
+        url = f"{self.api_url}/repos/{self.organization}/{repo_name}/branches"
         return [branch["name"] for branch in self.paginate(url)]
 
+    def get_default_branch(self, repo_name):
+        url = f"{self.api_url}/repos/{self.organization}/{repo_name}"
+        body, _ = self.fetch_page(url)
+        return json.loads(body).get("default_branch")
+
     def get_unique_commits_from_all_branches(self, repo_name, branches):
-        commits_by_sha = {}
-        since = self.start.astimezone(timezone.utc).isoformat().replace("+00:00", "Z")
-        until = self.end.astimezone(timezone.utc).isoformat().replace("+00:00", "Z")
-
-        for branch in branches:
-            url = f"https://api.github.com/repos/{self.organization}/{repo_name}/commits"
-            params = {"sha": branch, "since": since, "until": until}
-            for item in self.paginate(url, params=params):
-                sha = item.get("sha")
-                commit = item.get("commit") or {}
-                author = commit.get("author") or {}
-                date_value = author.get("date")
-                if not sha or not date_value:
-                    continue
-                committed_at = parse_github_time(date_value)
-                if self.start <= committed_at.astimezone(self.start.tzinfo) <= self.end:
-                    commits_by_sha[sha] = committed_at
+        if self.branch_crawl == "compare":
+            base = self.get_default_branch(repo_name)
+            if base in branches:
+                return merge_branch_commits(
+                    [self.get_branch_commits(repo_name, base)]
+                    + [
+                        self.get_branch_commits_beyond(repo_name, base, branch)
+                        for branch in branches
+                        if branch != base
+                    ]
+                )
+        return merge_branch_commits(
+            self.get_branch_commits(repo_name, branch) for branch in branches
+        )
 
-        return list(commits_by_sha.values())
+    def get_branch_commits(self, repo_name, branch):
+        url = f"{self.api_url}/repos/{self.organization}/{repo_name}/commits"
+        params = {"sha": branch, "since": self.since_param(), "until": self.until_param()}
+        commits = []
+        for item in self.paginate(url, params=params):
+            commit = self.commit_in_window(item)
+            if commit:
+                commits.append(commit)
+        return commits
+
+    def get_branch_commits_beyond(self, repo_name, base, branch):
+        # Only the commits on branch that the base branch does not already contain.
+        try:
+            commits = self.compare_branch_commits(repo_name, base, branch)
+        except CassetteMiss as error:
+            self.log(f"Comparison {base}...{branch} of {repo_name} was not recorded ({error}).")
+            commits = None
+        if commits is None:
+            self.log(f"Comparison {base}...{branch} of {repo_name} is incomplete. Crawling the full branch.")
+            return self.get_branch_commits(repo_name, branch)
+        return commits
+
+    def compare_branch_commits(self, repo_name, base, branch):
+        url = (
+            f"{self.api_url}/repos/{self.organization}/{repo_name}/compare/"
+            f"{urllib.parse.quote(base, safe='')}...{urllib.parse.quote(branch, safe='')}"
+        )
+        url = with_params(url, {"per_page": 100})
+        commits = []
+        seen = 0
+        total = 0
+        while url:
+            body, link = self.fetch_page(url)
+            comparison = json.loads(body)
+            total = comparison.get("total_commits", 0)
+            for item in comparison.get("commits", []):
+                seen += 1
+                # The commits endpoint filters since/until on the committer date server side.
+                committer = (item.get("commit") or {}).get("committer") or {}
+                if not committer.get("date"):
+                    continue
+                committed_at = parse_github_time(committer["date"])
+                if not self.start <= committed_at.astimezone(self.start.tzinfo) <= self.end:
+                    continue
+                commit = self.commit_in_window(item)
+                if commit:
+                    commits.append(commit)
+            url = parse_next_link(link)
+        return commits if seen >= total else None
+
+    def commit_in_window(self, item):
+        sha = item.get("sha")
+        commit = item.get("commit") or {}
+        author = commit.get("author") or {}
+        date_value = author.get("date")
+        if not sha or not date_value:
+            return None
+        committed_at = parse_github_time(date_value)
+        if self.start <= committed_at.astimezone(self.start.tzinfo) <= self.end:
+            return sha, committed_at
+        return None
+
+    def since_param(self):
+        return self.start.astimezone(timezone.utc).isoformat().replace("+00:00", "Z")
+
+    def until_param(self):
+        return self.end.astimezone(timezone.utc).isoformat().replace("+00:00", "Z")
+
+    def graphql(self, query, variables):
+        data = json.dumps({"query": query, "variables": variables}).encode("utf-8")
+        with self.request(f"{self.api_url}/graphql", data=data) as response:
+            body = response.read()
+        self.report.count("http_bytes", len(body))
+        result = json.loads(body.decode("utf-8"))
+        if result.get("errors"):
+            raise RuntimeError(f"GraphQL query failed: {result['errors']}")
+        rate_limit = result["data"].get("rateLimit")
+        if rate_limit:
+            self.report.count("graphql_cost", rate_limit["cost"])
+        return result["data"]
+
+    def count_issues_and_pull_requests(self, repo_name):
+        if self.count_mode == "search":
+            try:
+                return self.search_issue_and_pull_request_counts(repo_name)
+            except (urllib.error.URLError, RuntimeError, KeyError, CassetteMiss) as error:
+                self.log(f"Search count failed for {repo_name} ({error}). Falling back to paging.")
+        return self.count_issues(repo_name), self.count_pull_requests(repo_name)
+
+    def search_issue_and_pull_request_counts(self, repo_name):
+        # Same window as count_issues/count_pull_requests: created between start and end, inclusive.
+        created = f"created:{self.start.isoformat()}..{self.end.isoformat()}"
+        scope = f"repo:{self.organization}/{repo_name}"
+        data = self.graphql(
+            """
+            query($issues: String!, $prs: String!) {
+              rateLimit { cost }
+              issues: search(query: $issues, type: ISSUE, first: 1) { issueCount }
+              prs: search(query: $prs, type: ISSUE, first: 1) { issueCount }
+            }
+            """,
+            {
+                "issues": f"{scope} is:issue {created}",
+                "prs": f"{scope} is:pr {created}",
+            },
+        )
+        return data["issues"]["issueCount"], data["prs"]["issueCount"]
 
     def count_issues(self, repo_name):
-        url = f"https://api.github.com/repos/{self.organization}/{repo_name}/issues"
+        url = f"{self.api_url}/repos/{self.organization}/{repo_name}/issues"
         start_utc = self.start.astimezone(timezone.utc).isoformat().replace("+00:00", "Z")
         count = 0
         for item in self.paginate(url, params={"state": "all", "since": start_utc}):
@@ -182,7 +427,7 @@ class GitHubDashboardCollector:
         return count
 
     def count_pull_requests(self, repo_name):
-        url = f"https://api.github.com/repos/{self.organization}/{repo_name}/pulls"
+        url = f"{self.api_url}/repos/{self.organization}/{repo_name}/pulls"
         count = 0
         for item in self.paginate(url, params={"state": "all"}):
             created_at = parse_github_time(item["created_at"]).astimezone(self.start.tzinfo)
@@ -193,7 +438,9 @@ class GitHubDashboardCollector:
         return count
 
     def collect(self, assignment_id):
-        repos = self.get_accepted_repositories(assignment_id)
+        self.report.begin(script="github_classroom_api_dashboard", semester=self.semester)
+        with self.report.stage("get_accepted_repositories"):
+            repos = self.get_accepted_repositories(assignment_id)
         self.log(f"Found {len(repos)} accepted repositories for {self.semester}.")
         if not repos:
             raise SystemExit(
@@ -201,62 +448,127 @@ class GitHubDashboardCollector:
                 "please check the assignment id and token permissions."
             )
 
+        with self.report.stage("collect_repos"):
+            if self.concurrency > 1:
+                self.log(f"Collecting with up to {self.concurrency} concurrent requests.")
+                collected = asyncio.run(self.collect_repos_async(repos))
+            else:
+                collected = [
+                    self.collect_repo(index, len(repos), repo)
+                    for index, repo in enumerate(repos, start=1)
+                ]
+
         group_names = []
         commit_counts = []
         issue_counts = []
         branch_counts = []
         pr_counts = []
-        all_commit_times = []
-
-        for index, repo in enumerate(repos, start=1):
-            repo_name = repo["repo_name"]
-            group_name = repo["group_name"]
-            cache_key = self.cache_key(repo_name)
-            cached = self.cache.get(cache_key)
-            if cached:
-                self.log(f"[{index}/{len(repos)}] Using cached {repo_name}")
-                branches = cached["branches"]
-                commit_times = [parse_github_time(value) for value in cached["commit_times"]]
-                issues = cached["issues"]
-                prs = cached["prs"]
-            else:
-                self.log(f"[{index}/{len(repos)}] Collecting {repo_name}")
-                branches = self.get_branches(repo_name)
-                commit_times = self.get_unique_commits_from_all_branches(repo_name, branches)
-                issues = self.count_issues(repo_name)
-                prs = self.count_pull_requests(repo_name)
-                self.cache[cache_key] = {
-                    "repo_name": repo_name,
-                    "group_name": group_name,
-                    "branches": branches,
-                    "commit_times": [dt.astimezone(timezone.utc).isoformat().replace("+00:00", "Z") for dt in commit_times],
-                    "issues": issues,
-                    "prs": prs,
-                }
-                self.save_cache()
+        rollup = CommitRollup()
 
-            group_names.append(group_name)
+        for repo, (branches, commit_times, issues, prs) in zip(repos, collected):
+            group_names.append(repo["group_name"])
             branch_counts.append(len(branches))
             commit_counts.append(len(commit_times))
             issue_counts.append(issues)
             pr_counts.append(prs)
-            all_commit_times.extend(commit_times)
-
-        return self.build_chart_data(
-            group_names=group_names,
-            commit_counts=commit_counts,
-            issue_counts=issue_counts,
-            branch_counts=branch_counts,
-            pr_counts=pr_counts,
-            commit_times=all_commit_times,
+            for committed_at in commit_times:
+                rollup.add(repo["repo_name"], None, committed_at.timestamp())
+        self.save_cache()
+
+        with self.report.stage("build_chart_data"):
+            chart_data = self.build_chart_data(
+                group_names=group_names,
+                commit_counts=commit_counts,
+                issue_counts=issue_counts,
+                branch_counts=branch_counts,
+                pr_counts=pr_counts,
+                rollup=rollup,
+            )
+        self.report.finish()
+        return chart_data
+
+    def cached_repo(self, index, total, repo_name):
+        if not self.resume:
+            return None
+        cached = self.cache.get(self.cache_key(repo_name))
+        if not cached:
+            return None
+        self.log(f"[{index}/{total}] Using cached {repo_name}")
+        commit_times = [parse_github_time(value) for value in cached["commit_times"]]
+        return cached["branches"], commit_times, cached["issues"], cached["prs"]
+
+    def store_repo(self, repo, branches, commit_times, issues, prs):
+        self.cache[self.cache_key(repo["repo_name"])] = {
+            "repo_name": repo["repo_name"],
+            "group_name": repo["group_name"],
+            "branches": branches,
+            "commit_times": [dt.astimezone(timezone.utc).isoformat().replace("+00:00", "Z") for dt in commit_times],
+            "issues": issues,
+            "prs": prs,
+        }
+        self.save_cache()
+
+    def collect_repo(self, index, total, repo):
+        repo_name = repo["repo_name"]
+        cached = self.cached_repo(index, total, repo_name)
+        if cached:
+            return cached
+        self.log(f"[{index}/{total}] Collecting {repo_name}")
+        with self.report.repo(repo_name):
+            branches = self.get_branches(repo_name)
+            commit_times = self.get_unique_commits_from_all_branches(repo_name, branches)
+            issues, prs = self.count_issues_and_pull_requests(repo_name)
+            self.store_repo(repo, branches, commit_times, issues, prs)
+        return branches, commit_times, issues, prs
+
+    async def collect_repos_async(self, repos):
+        # Blocking requests run in worker threads so retries and rate-limit sleeps behave as in request().
+        loop = asyncio.get_running_loop()
+        loop.set_default_executor(ThreadPoolExecutor(max_workers=self.concurrency))
+        limiter = asyncio.Semaphore(self.concurrency)
+
+        async def call(func, *args):
+            async with limiter:
+                return await asyncio.to_thread(func, *args)
+
+        async def collect_one(index, repo):
+            repo_name = repo["repo_name"]
+            cached = self.cached_repo(index, len(repos), repo_name)
+            if cached:
+                return cached
+            self.log(f"[{index}/{len(repos)}] Collecting {repo_name}")
+            with self.report.repo(repo_name):
+                branches = await call(self.get_branches, repo_name)
+                base = None
+                if self.branch_crawl == "compare":
+                    base = await call(self.get_default_branch, repo_name)
+                if base in branches:
+                    branch_jobs = [call(self.get_branch_commits, repo_name, base)] + [
+                        call(self.get_branch_commits_beyond, repo_name, base, branch)
+                        for branch in branches
+                        if branch != base
+                    ]
+                else:
+                    branch_jobs = [call(self.get_branch_commits, repo_name, branch) for branch in branches]
+                branch_commits, (issues, prs) = await asyncio.gather(
+                    asyncio.gather(*branch_jobs),
+                    call(self.count_issues_and_pull_requests, repo_name),
+                )
+                commit_times = merge_branch_commits(branch_commits)
+                self.store_repo(repo, branches, commit_times, issues, prs)
+            return branches, commit_times, issues, prs
+
+        return await asyncio.gather(
+            *(collect_one(index, repo) for index, repo in enumerate(repos, start=1))
         )
 
     def cache_key(self, repo_name):
         return "|".join([self.semester, self.start.date().isoformat(), self.end.date().isoformat(), repo_name])
 
     def save_cache(self):
+        # Sorted so the checkpoint does not depend on the order in which concurrent repositories finish.
         if self.cache_path:
-            save_json(self.cache_path, self.cache)
+            save_json(self.cache_path, dict(sorted(self.cache.items())))
 
     def build_chart_data(
         self,
@@ -265,23 +577,22 @@ class GitHubDashboardCollector:
         issue_counts,
         branch_counts,
         pr_counts,
-        commit_times,
+        rollup,
     ):
-        china_tz = self.start.tzinfo
-        date_counter = Counter(dt.astimezone(china_tz).date().isoformat() for dt in commit_times)
-        hour_counter = Counter(dt.astimezone(china_tz).hour for dt in commit_times)
+        # The rollup buckets commits by China Standard Time day and hour, matching the semester window.
+        day_totals = rollup.totals("day")
+        hour_totals = rollup.totals("hour")
 
         full_dates = []
         counts_by_date = []
-        current = self.start.date()
-        while current <= self.end.date():
-            date_key = current.isoformat()
-            full_dates.append(date_key)
-            counts_by_date.append(date_counter.get(date_key, 0))
-            current += timedelta(days=1)
+        first_day = (self.start.date() - datetime(1970, 1, 1).date()).days
+        last_day = (self.end.date() - datetime(1970, 1, 1).date()).days
+        for day in range(first_day, last_day + 1):
+            full_dates.append(day_to_date(day))
+            counts_by_date.append(day_totals[day][0] if day in day_totals else 0)
 
         hours = list(range(24))
-        counts_by_hour = [hour_counter.get(hour, 0) for hour in hours]
+        counts_by_hour = [hour_totals[hour][0] if hour in hour_totals else 0 for hour in hours]
 
         return {
             "commit_time_distribution_date": {
@@ -315,6 +626,14 @@ class GitHubDashboardCollector:
         }
 
 
+def merge_branch_commits(branch_commits):
+    commits_by_sha = {}
+    for commits in branch_commits:
+        for sha, committed_at in commits:
+            commits_by_sha[sha] = committed_at
+    return list(commits_by_sha.values())
+
+
 def average(values):
     return round(sum(values) / len(values), 2) if values else 0
 
@@ -359,11 +678,79 @@ def parse_args():
         default=DEFAULT_OUTPUT,
         help="Output chart_data.json path. Existing semesters are preserved.",
     )
+    parser.add_argument(
+        "--split-output",
+        help=(
+            "Directory for per-semester, per-chart files with a hashed manifest and .gz/.br variants "
+            "(default: chart_data/ next to --output). Use an empty value to disable."
+        ),
+    )
     parser.add_argument(
         "--cache",
         default=DEFAULT_CACHE,
         help="Per-repository checkpoint cache path for resumable collection.",
     )
+    parser.add_argument(
+        "--http-cache",
+        default=DEFAULT_HTTP_CACHE,
+        help="SQLite ETag/Last-Modified cache for conditional requests. Use an empty value to disable.",
+    )
+    parser.add_argument(
+        "--resume",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help=(
+            "Reuse per-repository checkpoints from --cache (default). "
+            "With --no-resume every page is revalidated via conditional requests."
+        ),
+    )
+    parser.add_argument(
+        "--count-mode",
+        choices=["search", "page"],
+        default="search",
+        help="Count issues/PRs with one search query per repository, or by paging through them.",
+    )
+    parser.add_argument(
+        "--branch-crawl",
+        choices=["compare", "full"],
+        default="compare",
+        help="Crawl non-default branches via compare against the default branch, or page every branch fully.",
+    )
+    parser.add_argument(
+        "--api-url",
+        default=os.getenv("GITHUB_API_URL", DEFAULT_API_URL),
+        help="GitHub REST/GraphQL API root, for GitHub Enterprise or a local stand-in server.",
+    )
+    parser.add_argument(
+        "--report",
+        default=DEFAULT_REPORT,
+        help="Append per-stage and per-repository timings and API costs as JSON lines. Use an empty value to disable.",
+    )
+    parser.add_argument(
+        "--profile",
+        choices=["cprofile", "pyinstrument"],
+        help="Write a profile of each stage to classroom-repos/profiles/.",
+    )
+    parser.add_argument(
+        "--cassette-mode",
+        choices=CASSETTE_MODES,
+        default=os.getenv("GITHUB_CASSETTE_MODE"),
+        help=(
+            "record: store every GitHub response in --cassette; replay: serve recorded responses only, "
+            "with no network access (no token needed)."
+        ),
+    )
+    parser.add_argument(
+        "--cassette",
+        default=os.getenv("GITHUB_CASSETTE", DEFAULT_CASSETTE),
+        help="SQLite file for recorded request/response pairs.",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=1,
+        help="Maximum concurrent GitHub requests across repositories and branches (1 = sequential).",
+    )
     return parser.parse_args()
 
 
@@ -376,7 +763,7 @@ def main():
     else:
         load_env_file(env_path)
     token = os.getenv("GITHUB_TOKEN")
-    if not token:
+    if not token and args.cassette_mode != "replay":
         raise SystemExit("GITHUB_TOKEN is missing. Put it in classroom-repos/.env or export it first.")
 
     start = parse_date(args.start)
@@ -389,12 +776,26 @@ def main():
         start=start,
         end=end,
         cache_path=args.cache,
+        concurrency=args.concurrency,
+        http_cache_path=args.http_cache or None,
+        resume=args.resume,
+        count_mode=args.count_mode,
+        branch_crawl=args.branch_crawl,
+        api_url=args.api_url,
+        report_path=args.report or None,
+        profile=args.profile,
+        cassette=Cassette(args.cassette, args.cassette_mode) if args.cassette_mode else None,
     )
     semester_data = collector.collect(args.assignment_id)
 
     chart_data = load_existing_json(args.output)
     chart_data[args.semester.lower()] = semester_data
     save_json(args.output, chart_data)
+    split_output = args.split_output
+    if split_output is None:
+        split_output = os.path.join(os.path.dirname(os.path.abspath(args.output)), "chart_data")
+    if split_output:
+        write_split_chart_data(chart_data, split_output, log=collector.log)
 
     collector.log(
         f"Wrote {semester_display_name(args.semester)} dashboard data to {os.path.abspath(args.output)}"
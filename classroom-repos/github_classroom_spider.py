@@ -1,8 +1,11 @@
+import argparse
 import os
 import json
-import requests
+import sqlite3
+import subprocess
 import threading
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta, timezone
 from collections import Counter, defaultdict
 import re
@@ -11,6 +14,14 @@ import pytz
 import dotenv
 import git
 
+from github_session import GitHubSession
+from http_cassette import Cassette
+from chart_output import MANIFEST_FILE, write_split_chart_data
+from commit_rollup import CommitRollup, day_to_date
+from run_report import RunReport
+from stage_scheduler import StageScheduler
+from stage_store import StageData, StageStore
+
 CONFIG = {
     "semestar_range": {
         "25spring": (
@@ -43,30 +54,712 @@ CONFIG = {
 }
 
 
+# ========== git 批量统计工具 ===========
+# git log 输出格式：每个commit以\x1e开头，字段之间以\x1f分隔，随后是 --numstat 的逐文件统计
+NUMSTAT_FORMAT = "%x1e%H%x1f%an%x1f%ae%x1f%cI%x1f%B%x1f"
+
+
+def list_branch_commits(repo, branch, exclude_tips=(), semestar_range=None):
+    """
+    按 rev-list 顺序列出分支上commit的SHA，不计算diff。
+    exclude_tips 中的commit及其祖先会被排除（用于增量扫描）。
+    semestar_range 的结束时间以 --min-age（即 --until）交给git，开始时间按 %ct 在这里比较：
+    --max-age/--since 会在遇到第一个早于学期开始的commit时停止遍历，
+    排在它后面、但时间被改动过（rebase、时钟偏差）的学期内commit会被漏掉。
+    git 只输出 SHA 和提交时间戳，不生成commit对象，也没有日期字符串的来回转换。
+    """
+    window = []
+    start = None
+    if semestar_range:
+        start_date, end_date = semestar_range
+        start = int(start_date.timestamp())
+        window = [f"--min-age={int(end_date.timestamp())}"]
+    output = repo.git.log(
+        "--format=%H %ct", *window, branch, *[f"^{sha}" for sha in exclude_tips], "--"
+    )
+    shas = []
+    for line in output.splitlines():
+        sha, timestamp = line.split()
+        if start is None or int(timestamp) >= start:
+            shas.append(sha)
+    return shas
+
+
+def iter_numstat_commits(repo_path, shas):
+    """
+    用一次 git log --numstat 流式统计多个commit，代替逐个调用 commit.stats。
+    与 GitPython 的 commit.stats 口径一致：merge commit 只与第一个父提交比较，
+    根提交与空树比较，不检测重命名，二进制文件记为0行。
+    按 shas 的顺序依次产出 commit 字典，files 为 {文件路径: (插入行数, 删除行数)}。
+    """
+    if not shas:
+        return  # git log --no-walk 在没有输入时会退回到 HEAD
+    process = subprocess.Popen(
+        [
+            "git", "log", "--no-walk=unsorted", "--stdin", "--root", "--numstat",
+            "--no-renames", "--diff-merges=first-parent", f"--format={NUMSTAT_FORMAT}",
+        ],
+        cwd=repo_path,
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+    # git 会先读完 stdin 中的全部版本再开始输出，因此这里不会死锁
+    process.stdin.write("".join(f"{sha}\n" for sha in shas).encode())
+    process.stdin.close()
+    buffer = b""
+    try:
+        while True:
+            chunk = process.stdout.read(1 << 16)
+            if chunk:
+                buffer += chunk
+            records = buffer.split(b"\x1e")
+            buffer = records.pop() if chunk else b""
+            for record in records:
+                if record:
+                    yield _parse_numstat_record(record)
+            if not chunk:
+                break
+    finally:
+        process.stdout.close()
+        stderr = process.stderr.read().decode("utf-8", "replace")
+        process.stderr.close()
+        if process.wait() != 0:
+            raise git.GitCommandError(["git", "log", "--numstat"], process.returncode, stderr)
+
+
+def _parse_numstat_record(record):
+    hexsha, author_name, author_email, committed_datetime, message, stat_text = (
+        record.decode("utf-8", "replace").split("\x1f", 5)
+    )
+    files = {}
+    insertions = deletions = files_changed = 0
+    for line in stat_text.splitlines():
+        if not line:
+            continue
+        raw_insertions, raw_deletions, file_path = line.split("\t")
+        file_insertions = int(raw_insertions) if raw_insertions != "-" else 0
+        file_deletions = int(raw_deletions) if raw_deletions != "-" else 0
+        files[file_path] = (file_insertions, file_deletions)
+        insertions += file_insertions
+        deletions += file_deletions
+        files_changed += 1
+    return {
+        "hexsha": hexsha,
+        "author_name": author_name,
+        "author_email": author_email,
+        "committed_datetime": committed_datetime,
+        "message": message.strip(),
+        "insertions": insertions,
+        "deletions": deletions,
+        "files_changed": files_changed,
+        "files": files,
+    }
+
+
+class CommitStatsCache:
+    """
+    以commit SHA为键的全局统计缓存（SQLite），所有仓库、所有学期共用。
+    同一个SHA的作者、时间、message和diff都不会变，因此缓存的是 iter_numstat_commits
+    产出的完整记录，以及 message 的分类结果。多个线程/进程各自打开连接，写入时依靠 SQLite 的文件锁串行化。
+    """
+
+    def __init__(self, path):
+        self.connection = sqlite3.connect(path, timeout=60)
+        self.connection.execute("PRAGMA journal_mode=WAL")  # 写入时不阻塞其他进程读取
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS commit_stats (sha TEXT PRIMARY KEY, record TEXT NOT NULL)"
+        )
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS message_stats "
+            "(sha TEXT PRIMARY KEY, lang TEXT NOT NULL, length INTEGER NOT NULL)"
+        )
+
+    def get_many(self, shas):
+        records = {}
+        shas = list(shas)
+        for i in range(0, len(shas), 500):
+            chunk = shas[i : i + 500]
+            rows = self.connection.execute(
+                f"SELECT sha, record FROM commit_stats WHERE sha IN ({','.join('?' * len(chunk))})",
+                chunk,
+            )
+            for sha, record in rows:
+                commit = json.loads(record)
+                commit["hexsha"] = sha
+                commit["files"] = {path: tuple(stat) for path, stat in commit["files"].items()}
+                records[sha] = commit
+        return records
+
+    def put_many(self, commits):
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO commit_stats (sha, record) VALUES (?, ?)",
+                [
+                    (
+                        commit["hexsha"],
+                        json.dumps(
+                            {k: v for k, v in commit.items() if k != "hexsha"},
+                            ensure_ascii=False,
+                        ),
+                    )
+                    for commit in commits
+                ],
+            )
+
+    def get_message_stats(self, shas):
+        """{sha: (语言, 长度)}，只包含已缓存的commit"""
+        stats = {}
+        shas = list(shas)
+        for i in range(0, len(shas), 500):
+            chunk = shas[i : i + 500]
+            rows = self.connection.execute(
+                f"SELECT sha, lang, length FROM message_stats WHERE sha IN ({','.join('?' * len(chunk))})",
+                chunk,
+            )
+            for sha, lang, length in rows:
+                stats[sha] = (lang, length)
+        return stats
+
+    def put_message_stats(self, stats):
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO message_stats (sha, lang, length) VALUES (?, ?, ?)",
+                [(sha, lang, length) for sha, (lang, length) in stats.items()],
+            )
+
+    def close(self):
+        self.connection.close()
+
+
+class FetchCheckpoint:
+    """
+    远程爬取阶段的断点（SQLite），按 阶段/仓库 逐页记录已爬取的结果和继续翻页所需的状态。
+    每爬完一页立即写入，阶段中途崩溃、被中断或因限流失败后，重跑时每个仓库从最后完成的页继续；
+    阶段结束且没有失败的仓库时清除该阶段的断点，下次运行重新爬取最新数据。path 为 None 时只保存在内存中。
+    """
+
+    def __init__(self, path, stage):
+        self.stage = stage
+        self.failed = set()  # 本次运行中爬取失败的仓库
+        self._lock = threading.Lock()
+        self.connection = sqlite3.connect(path or ":memory:", timeout=60, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS fetch_pages ("
+            "stage TEXT NOT NULL, repo TEXT NOT NULL, page INTEGER NOT NULL, payload TEXT NOT NULL, "
+            "PRIMARY KEY (stage, repo, page))"
+        )
+
+    def pages(self, repo):
+        """该仓库已完成的页 [{"result": 本页结果, "next": 下一页的状态}]，按爬取顺序排列"""
+        with self._lock:
+            rows = self.connection.execute(
+                "SELECT payload FROM fetch_pages WHERE stage = ? AND repo = ? ORDER BY page",
+                (self.stage, repo),
+            ).fetchall()
+        return [json.loads(payload) for (payload,) in rows]
+
+    def add_page(self, repo, result, next_state=None):
+        with self._lock, self.connection:
+            self.connection.execute(
+                "INSERT INTO fetch_pages (stage, repo, page, payload) "
+                "SELECT ?, ?, COALESCE(MAX(page), -1) + 1, ? FROM fetch_pages WHERE stage = ? AND repo = ?",
+                (
+                    self.stage,
+                    repo,
+                    json.dumps({"result": result, "next": next_state}, ensure_ascii=False),
+                    self.stage,
+                    repo,
+                ),
+            )
+
+    def paginate(self, repo, fetch_page, state):
+        """
+        逐页爬取一个仓库：先沿用断点中已完成的页，从最后一页记录的状态继续，每爬完一页立即写入断点。
+        fetch_page(state) 返回 (本页结果, 下一页的状态)，下一页的状态为 None 时爬取完成；state 为第一页的状态。
+        失败时仓库记为失败并停止翻页，已完成的页保留，重跑时从失败的页继续。
+        返回 (各页结果, 失败时的异常，成功为 None)
+        """
+        results = []
+        for page in self.pages(repo):
+            results.append(page["result"])
+            state = page["next"]
+        while state is not None:
+            try:
+                result, next_state = fetch_page(state)
+            except Exception as error:
+                self.mark_failed(repo)
+                return results, error
+            self.add_page(repo, result, next_state)
+            results.append(result)
+            state = next_state
+        return results, None
+
+    def resume(self, repo, items, key):
+        """
+        按项爬取（不翻页）的阶段从断点继续，每页结果为一个列表，key(结果) 为其对应的项。
+        返回 (已完成的结果, 仍需爬取的项)；新爬取的结果用 add_page 写入，失败的仓库用 mark_failed 记录
+        """
+        done = {key(result): result for page in self.pages(repo) for result in page["result"]}
+        return [done[item] for item in items if item in done], [item for item in items if item not in done]
+
+    def mark_failed(self, repo):
+        with self._lock:
+            self.failed.add(repo)
+
+    def close(self):
+        """阶段正常结束时调用：没有失败的仓库则清除该阶段的断点"""
+        with self._lock:
+            if not self.failed:
+                with self.connection:
+                    self.connection.execute("DELETE FROM fetch_pages WHERE stage = ?", (self.stage,))
+            self.connection.close()
+
+
+class IdentityIndex:
+    """
+    跨学期持久化的身份索引（SQLite）：提交邮箱(小写) -> GitHub node id、login，
+    并记录来源、解析时间，以及该邮箱在本地提交中最早/最晚出现的时间。
+    由 classroom 成员的公开邮箱、GitHub noreply 邮箱和此前通过API解析的结果构建，
+    fetch_commit_authors 先查索引，只把未知邮箱交给API。
+    没有关联GitHub账号的邮箱(id 为 NULL)也会记录，超过有效期后重新解析，以便发现后来关联的账号。
+    """
+
+    NOREPLY_EMAIL = re.compile(r"^(?:\d+\+)?([a-z0-9-]+)@users\.noreply\.github\.com$")
+
+    def __init__(self, path):
+        self.connection = sqlite3.connect(path or ":memory:", timeout=60)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS identities ("
+            "email TEXT PRIMARY KEY, id TEXT, login TEXT, source TEXT NOT NULL, "
+            "resolved_at TEXT NOT NULL, first_seen TEXT, last_seen TEXT)"
+        )
+        self.login2id = {}
+        self.id2login = {}
+
+    def add_members(self, members):
+        """
+        登记已知成员 [{"login", "id", "email"}]：login 用于解析 noreply 邮箱和补全索引中的 login，
+        有公开邮箱的成员直接写入索引（公开邮箱一定是该账号已验证的邮箱）
+        """
+        rows = []
+        for member in members:
+            if not member.get("login") or not member.get("id"):
+                continue
+            self.login2id[member["login"].lower()] = member["id"]
+            self.id2login[member["id"]] = member["login"]
+            if member.get("email"):
+                rows.append((member["email"].lower(), member["id"], member["login"], "classroom_members"))
+        self._insert(rows)
+
+    def lookup(self, emails, negative_ttl_days):
+        """返回 {邮箱(小写): node id 或 None}，只包含索引能确定的邮箱；命中的 noreply 邮箱同时写入索引"""
+        emails = sorted({email.lower() for email in emails})
+        expire = (datetime.now(timezone.utc) - timedelta(days=negative_ttl_days)).isoformat()
+        known = {}
+        for i in range(0, len(emails), 500):
+            chunk = emails[i : i + 500]
+            rows = self.connection.execute(
+                f"SELECT email, id, resolved_at FROM identities WHERE email IN ({','.join('?' * len(chunk))})",
+                chunk,
+            )
+            for email, node_id, resolved_at in rows:
+                if node_id is None and resolved_at < expire:
+                    continue
+                known[email] = node_id
+        noreply = []
+        for email in emails:
+            match = self.NOREPLY_EMAIL.match(email)
+            if email not in known and match and match.group(1) in self.login2id:
+                node_id = self.login2id[match.group(1)]
+                known[email] = node_id
+                noreply.append((email, node_id, self.id2login.get(node_id), "noreply"))
+        self._insert(noreply)
+        return known
+
+    def record(self, resolved):
+        """写入通过API解析的结果 {邮箱: node id 或 None}"""
+        self._insert(
+            [
+                (email.lower(), node_id, self.id2login.get(node_id), "api")
+                for email, node_id in resolved.items()
+            ]
+        )
+
+    def touch(self, seen):
+        """更新邮箱在本地提交中最早/最晚出现的时间 {邮箱: (最早, 最晚)}，时间为UTC ISO字符串"""
+        with self.connection:
+            self.connection.executemany(
+                "UPDATE identities SET "
+                "first_seen = CASE WHEN first_seen IS NULL OR ? < first_seen THEN ? ELSE first_seen END, "
+                "last_seen = CASE WHEN last_seen IS NULL OR ? > last_seen THEN ? ELSE last_seen END "
+                "WHERE email = ?",
+                [(first, first, last, last, email.lower()) for email, (first, last) in seen.items()],
+            )
+
+    def _insert(self, rows):
+        # 已有的邮箱更新解析结果，保留出现时间
+        resolved_at = datetime.now(timezone.utc).isoformat()
+        with self.connection:
+            self.connection.executemany(
+                "INSERT INTO identities (email, id, login, source, resolved_at) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(email) DO UPDATE SET id = excluded.id, login = excluded.login, "
+                "source = excluded.source, resolved_at = excluded.resolved_at",
+                [(*row, resolved_at) for row in rows],
+            )
+
+    def snapshot(self, negative_ttl_days):
+        """返回索引中全部仍然有效的 {邮箱(小写): node id 或 None}"""
+        expire = (datetime.now(timezone.utc) - timedelta(days=negative_ttl_days)).isoformat()
+        return {
+            email: node_id
+            for email, node_id, resolved_at in self.connection.execute(
+                "SELECT email, id, resolved_at FROM identities"
+            )
+            if node_id is not None or resolved_at >= expire
+        }
+
+    def close(self):
+        self.connection.close()
+
+
+def has_lost_commits(repo, old_tips, new_tips):
+    # 旧分支头上有新分支头不可达的commit（分支被删除或force push），增量结果不可信
+    try:
+        lost = repo.git.rev_list("--max-count=1", *old_tips, "--not", *new_tips)
+    except git.GitCommandError:
+        return True  # 旧commit已被gc
+    return bool(lost.strip())
+
+
+def estimate_scan_cost(repo_path):
+    """
+    估计扫描一个仓库的开销：.git/objects 下 pack 文件与松散对象的总字节数。
+    只读取目录不启动git，历史越长、改动越大的仓库越大
+    """
+    total = 0
+    try:
+        for entry in os.scandir(os.path.join(repo_path, ".git", "objects")):
+            if entry.is_dir() and (entry.name == "pack" or len(entry.name) == 2):
+                total += sum(f.stat().st_size for f in os.scandir(entry.path) if f.is_file())
+    except OSError:
+        pass
+    return total
+
+
+def scan_local_repo(
+    repo_path,
+    semestar_range,
+    valid_extensions,
+    single_file_insertion_limit,
+    previous_tips=None,
+    stats_cache_path=None,
+    author_filter=None,
+):
+    """
+    扫描单个本地仓库，返回学期范围内的commit列表与各后缀的代码行数。
+    定义在模块级别且只接收简单参数，可以直接提交到进程池中执行。
+    previous_tips 为上次扫描时的分支头，提供时只扫描新增的commit（incremental=True）。
+    stats_cache_path 为全局commit统计缓存，已缓存的commit不再调用git计算diff。
+    author_filter 为 (邮箱(小写) -> GitHub id, 小组成员id列表)，已知作者不是小组成员的commit
+    只计入代码行数，不出现在结果中（dropped 为其数量），与过滤阶段的判断一致。
+    结果中的 git_processes/seconds/cpu_seconds 为本次扫描启动的git子进程数、耗时和本线程CPU时间。
+    """
+    start_wall, start_cpu = time.perf_counter(), time.thread_time()
+    git_processes = 0
+    repo = git.Repo(repo_path)
+    branch_tips = {head.name: head.commit.hexsha for head in repo.heads}
+    # 增量扫描：只遍历从新分支头可达、但旧分支头不可达的commit
+    exclude_tips = []
+    if previous_tips is not None:
+        if previous_tips == branch_tips:
+            return {
+                "branch_tips": branch_tips,
+                "incremental": True,
+                "unchanged": True,
+                "commits": [],
+                "ext_status": {},
+                "dropped": 0,
+                "git_processes": 0,
+                "seconds": time.perf_counter() - start_wall,
+                "cpu_seconds": time.thread_time() - start_cpu,
+            }
+        old_tips = sorted(set(previous_tips.values()))
+        git_processes += 1 if branch_tips else 0
+        if branch_tips and not has_lost_commits(repo, old_tips, branch_tips.values()):
+            exclude_tips = old_tips
+
+    # 先按分支顺序列出学期范围内的commit（不计算diff），再批量统计
+    all_commits = set()
+    valid_shas = []
+    for branch in repo.branches if semestar_range else []:  # 学期不存在时没有有效commit
+        git_processes += 1
+        for sha in list_branch_commits(repo, branch.name, exclude_tips, semestar_range):
+            if sha not in all_commits:
+                all_commits.add(sha)
+                valid_shas.append(sha)
+    if stats_cache_path:
+        # 同一个模板仓库的commit会出现在所有小组仓库中，只对缓存里没有的commit计算diff
+        stats_cache = CommitStatsCache(stats_cache_path)
+        records = stats_cache.get_many(valid_shas)
+        computed = list(
+            iter_numstat_commits(
+                repo.working_dir, [sha for sha in valid_shas if sha not in records]
+            )
+        )
+        stats_cache.put_many(computed)
+        stats_cache.close()
+        records.update((commit["hexsha"], commit) for commit in computed)
+        commits = [records[sha] for sha in valid_shas]
+        diffed = len(computed)
+    else:
+        commits = iter_numstat_commits(repo.working_dir, valid_shas)
+        diffed = len(valid_shas)
+    git_processes += 1 if diffed else 0
+    commit_info_list = []
+    commit_file_stats = {ext: 0 for ext in valid_extensions}
+    email2id, member_ids = author_filter or ({}, ())
+    member_ids = set(member_ids)
+    dropped = 0
+    for commit in commits:
+        commit_info = {
+            "commit_hash": commit["hexsha"],
+            "author_name": commit["author_name"],
+            "author_email": commit["author_email"],  # 提交者邮箱
+            "committed_datetime": commit["committed_datetime"],
+            "message": commit["message"],
+            "insertions": commit["insertions"],
+            "deletions": commit["deletions"],
+            "files_changed": commit["files_changed"],
+        }
+        for file_path, (insertions, deletions) in commit["files"].items():
+            # 跳过单文件插入行数过大的文件（如库文件/依赖/大文件）
+            if insertions > single_file_insertion_limit:
+                continue
+            # 删的太多也不行
+            if deletions > single_file_insertion_limit:
+                continue
+            _, ext = os.path.splitext(file_path)
+            ext = ext.lower()
+            if ext in valid_extensions:
+                commit_file_stats[ext] += max(insertions - deletions, 0)  # 别整成负数了
+        email = commit["author_email"].lower()
+        if email in email2id and email2id[email] not in member_ids:
+            dropped += 1  # 已知不是小组成员，过滤阶段也会丢弃
+            continue
+        commit_info_list.append(commit_info)
+    return {
+        "branch_tips": branch_tips,
+        "incremental": bool(exclude_tips),
+        "unchanged": False,
+        "commits": commit_info_list,
+        "ext_status": commit_file_stats,
+        "dropped": dropped,
+        "diffed": diffed,
+        "git_processes": git_processes,
+        "seconds": time.perf_counter() - start_wall,
+        "cpu_seconds": time.thread_time() - start_cpu,
+    }
+
+
+# ========== 图表数据计算工具 ===========
+MESSAGE_LANGS = ("chinese", "english", "mixed")
+
+
+class _CharClasses(dict):
+    # str.translate 用的字符分类表，按需计算并缓存：ASCII字母 -> "a"，中文(U+4E00-U+9FFF) -> "c"，
+    # 其他单词字符（与正则的 \w 相同：isalnum() 或下划线）-> "w"，其余 -> " "
+    def __missing__(self, code):
+        char = chr(code)
+        if char.isascii() and char.isalpha():
+            value = "a"
+        elif 0x4E00 <= code <= 0x9FFF:
+            value = "c"
+        elif char.isalnum() or char == "_":
+            value = "w"
+        else:
+            value = " "
+        self[code] = value
+        return value
+
+
+_CHAR_CLASSES = _CharClasses()
+# 纯ASCII的message（绝大多数）直接用 bytes.translate 分类，比 str.translate 快得多
+_ASCII_CLASSES = bytes.maketrans(
+    bytes(range(128)), "".join(_CHAR_CLASSES[code] for code in range(128)).encode("ascii")
+)
+_ASCII_LETTERS = bytes(code for code in range(128) if _CHAR_CLASSES[code] == "a")
+# 统计英文单词时中文也只是“其他单词字符”
+_CHINESE_AS_WORD = bytes.maketrans(b"c", b"w")
+
+
+def classify_message(message):
+    """
+    返回 (语言, 中文字数 + 英文单词数)。
+    与 re.findall(r"[\\u4e00-\\u9fff]") 和 re.findall(r"\\b[a-zA-Z]+\\b") 的计数相同：
+    英文单词是前后都不是单词字符、且只由ASCII字母组成的一整段单词字符。
+    每个字符只用 translate 分类一次，之后都是计数，不生成中间列表。
+    """
+    if message.isascii():
+        source, table, letters = message.encode("ascii"), _ASCII_CLASSES, _ASCII_LETTERS
+        chinese_count = 0
+    else:
+        source = message.translate(_CHAR_CLASSES).encode("ascii")
+        table, letters = _CHINESE_AS_WORD, b"a"
+        chinese_count = source.count(b"c")
+    # 字母为 a、其他单词字符为 w，每个单词以 " " 加首字符开头；
+    # 删去字母后仍有内容的单词即含有非字母的单词，其余单词都是英文单词
+    words = b" " + source.translate(table)
+    without_letters = b" " + source.translate(table, letters)
+    english_count = words.count(b" a") + words.count(b" w") - without_letters.count(b" w")
+    total_count = chinese_count + english_count
+    if total_count == 0:
+        return "mixed", 0
+    if (
+        chinese_count >= 0.4 * total_count
+        and english_count >= 0.4 * total_count
+    ):
+        lang = "mixed"
+    elif chinese_count > english_count:
+        lang = "chinese"
+    elif english_count > chinese_count:
+        lang = "english"
+    else:
+        lang = "mixed"
+    return lang, total_count
+
+
+def classify_commit_messages(commits, stats_cache_path=None):
+    """
+    批量分类一批commit的message，返回 {commit_hash: (语言, 长度)}。
+    stats_cache_path 为全局commit统计缓存，按SHA一次查出已分类过的commit，只计算其余的并写回
+    """
+    stats_cache = CommitStatsCache(stats_cache_path) if stats_cache_path else None
+    try:
+        stats = stats_cache.get_message_stats({c["commit_hash"] for c in commits}) if stats_cache else {}
+        missing = {
+            commit["commit_hash"]: classify_message(commit.get("message", ""))
+            for commit in commits
+            if commit["commit_hash"] not in stats
+        }
+        if stats_cache and missing:
+            stats_cache.put_message_stats(missing)
+    finally:
+        if stats_cache:
+            stats_cache.close()
+    stats.update(missing)
+    return stats
+
+
+def gini_coefficient(values):
+    values = sorted(values)
+    n = len(values)
+    if n == 0:
+        return 0
+    total = sum(values)
+    if total == 0:
+        return 0
+    cumulative = 0
+    for i, value in enumerate(values):
+        cumulative += (i + 1) * value
+    return (2 * cumulative) / (n * total) - (n + 1) / n
+
+
+def get_length_distribution(length_counts, bin_width=5):
+    # length_counts: {message长度: commit数}
+    if not length_counts:
+        return []
+    min_len = min(length_counts)
+    max_len = max(length_counts)
+    num_bins = math.ceil((max_len - min_len + 1) / bin_width)
+    bins = [0] * num_bins
+    for length, count in length_counts.items():
+        bins[min((length - min_len) // bin_width, num_bins - 1)] += count
+    distribution = []
+    for i, count in enumerate(bins):
+        range_start = min_len + i * bin_width
+        range_end = range_start + bin_width - 1
+        distribution.append(
+            {"length_range": f"{range_start}–{range_end}", "count": count}
+        )
+    return distribution
+
+
 # ========== GithubClassroomSpider ===========
 class GithubClassroomSpider:
     """
     GithubClassroomSpider 封装了所有与Github Classroom相关的爬虫与数据处理功能。
-    - 所有临时数据统一存储在 tmp.json
+    - 所有临时数据按 阶段/学期/仓库 分片存储在 tmp_stages/ 目录（见 StageStore）
     - 所有图表数据统一存储在 chart_data.json
     - 详细日志与注释，便于维护
     """
 
-    def __init__(self, organization="sustech-cs304", repos_dir="./repos"):
+    def __init__(self, organization="sustech-cs304", repos_dir="./repos", api_url=None, semestars=None):
         dotenv.load_dotenv()
         self.organization = organization
         self.repos_dir = repos_dir
+        # 只处理这些学期（如 ["25spring"]），其他学期的中间数据不加载、保持不变；为 None 时处理全部学期
+        self.SEMESTARS = list(semestars) if semestars else None
         self.GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
-        if not self.GITHUB_TOKEN:
+        # 录制/回放所有HTTP请求：GITHUB_CASSETTE_MODE=record 照常请求并保存响应，=replay 只用保存的响应、不访问网络，
+        # 便于离线反复调试过滤和图表逻辑；GITHUB_CASSETTE 指定录制文件
+        self.HTTP_CASSETTE_MODE = os.getenv("GITHUB_CASSETTE_MODE")
+        self.http_cassette_path = os.getenv("GITHUB_CASSETTE", "http_cassette.sqlite")
+        if not self.GITHUB_TOKEN and self.HTTP_CASSETTE_MODE != "replay":
             raise Exception("请设置环境变量 GITHUB_TOKEN")
         self.HEADERS = {"Authorization": f"Bearer {self.GITHUB_TOKEN}"}
-        self.API_URL = "https://api.github.com/graphql"
-        self.tmp_path = "tmp.json"
+        # REST/GraphQL根地址，可通过 GITHUB_API_URL 指向 GitHub Enterprise 或本地模拟服务
+        self.API_BASE = (api_url or os.getenv("GITHUB_API_URL", "https://api.github.com")).rstrip("/")
+        self.API_URL = f"{self.API_BASE}/graphql"
+        self.tmp_path = "tmp.json"  # 旧版单文件中间数据，首次运行时自动迁移
+        self.stage_dir = "tmp_stages"
+        # 以commit SHA为键的全局统计缓存，所有仓库和学期共用，设为 None 关闭
+        self.commit_stats_cache_path = "commit_stats.sqlite"
+        # 远程爬取阶段的逐页断点，中断后重跑时从上次完成的仓库/页继续，设为 None 关闭
+        self.fetch_checkpoint_path = "fetch_checkpoints.sqlite"
+        # 跨学期的 邮箱 -> GitHub账号 身份索引，已知邮箱不再查询提交作者，设为 None 只在本次运行内复用
+        self.identity_index_path = "identities.sqlite"
+        self.IDENTITY_NEGATIVE_TTL_DAYS = 30  # 未关联账号的邮箱多少天后重新查询
         self.chart_data_path = "chart_data.json"
-        self.tmp_data = self._load_json(self.tmp_path) or {}
+        # 按 学期/图表 拆分的输出目录（带哈希的文件名、manifest和预压缩版本），设为 None 只写 chart_data.json
+        self.chart_split_dir = "chart_data"
+        self.stage_store = StageStore(self.stage_dir, legacy_path=self.tmp_path)
+        self.stage_store.semestars = set(self.SEMESTARS) if self.SEMESTARS else None
+        self.tmp_data = StageData(self.stage_store)
         self.chart_data = self._load_json(self.chart_data_path) or {}
         self.WORKERS = 16
         self.MULTI_THREAD = True
+        self.INCREMENTAL_LOCAL_SCAN = True  # 基于分支头水位的增量本地扫描
+        # 本地扫描时直接丢弃已知作者不是小组成员的commit（需先获取小组成员），local_data 只保留可能有效的commit
+        self.FILTER_DURING_SCAN = True
+        self.LOCAL_SCAN_BACKEND = "thread"  # 本地扫描执行方式: "thread" 或 "process"
+        self.PROCESS_WORKERS = os.cpu_count()
+        self.COMMIT_AUTHOR_BATCH_SIZE = 50  # 每个GraphQL查询解析的提交数，0 表示逐个查询
+        self.MAX_CONCURRENT_REQUESTS = 8  # 所有线程共享的同时在途请求数上限
+        # auto_run 每个阶段/仓库的耗时与git、API开销（JSON行），设为 None 不写文件
+        self.RUN_REPORT_PATH = "run_report.jsonl"
+        self.PROFILE_STAGES = None  # "cprofile" 或 "pyinstrument"：每个阶段生成一份剖析文件到 profiles/
+        # auto_run 运行的阶段（见 pipeline_stages），为 None 时运行全部阶段
+        self.AUTO_RUN_STAGES = [
+            "fetch_commit_authors",
+            "filter_commits_by_classroom_user",
+            "build_commit_rollup",
+            "fetch_repo_activity",
+            "generate_chart_data",
+            "save_all",
+        ]
+        self.AUTO_RUN_WORKERS = 4  # 可同时运行的阶段数，1 表示按声明顺序串行
+        self.SKIP_UNCHANGED_STAGES = True  # 输入与上次成功运行时相同的阶段直接跳过
+        self.stage_runs_path = os.path.join(self.stage_dir, "_stage_runs.json")
+        self.report = RunReport(log=self._log)
+        self.http = GitHubSession(
+            max_concurrency=self.MAX_CONCURRENT_REQUESTS,
+            log=self._log,
+            report=self.report,
+            cassette=Cassette(self.http_cassette_path, self.HTTP_CASSETTE_MODE) if self.HTTP_CASSETTE_MODE else None,
+        )
         self.china_tz = pytz.timezone("Asia/Shanghai")
         self.semestar_range = CONFIG["semestar_range"]
         self.classroom_id = CONFIG["classroom_id"]
@@ -94,19 +787,54 @@ class GithubClassroomSpider:
         with open(path, "w", encoding="utf-8") as f:
             json.dump(data, f, indent=2, ensure_ascii=False)
 
-    def _run_query(self, query, variables):
-        response = requests.post(
-            self.API_URL,
-            json={"query": query, "variables": variables},
-            headers=self.HEADERS,
-            timeout=15,
-        )
-        if response.status_code == 200:
-            return response.json()
+    def _save_stage(self, key, shards=None):
+        # 只重写该阶段中改动过的分片，shards 为 None 时重写该阶段全部分片
+        self.stage_store.save(key, self.tmp_data[key], shards)
+        self.tmp_data.unsaved.discard(key)
+
+    def _save_repo_stage(self, key, data):
+        # 按仓库分片的阶段（pr/issues/branches/commit_authors）：只处理部分学期时合并进已有数据，
+        # 只写本次爬取的仓库，其他学期的仓库保持不变
+        if self.SEMESTARS:
+            self.tmp_data[key] = {**(self.tmp_data.get(key) or {}), **data}
+            self._save_stage(key, list(data))
         else:
-            raise Exception(
-                f"GraphQL query failed: {response.status_code}\n{response.text}"
-            )
+            self.tmp_data[key] = data
+            self._save_stage(key)
+
+    def _save_chart_data(self):
+        self._save_json(self.chart_data_path, self.chart_data)
+        if self.chart_split_dir:
+            write_split_chart_data(self.chart_data, self.chart_split_dir, log=self._log)
+
+    def _known_members(self):
+        # classroom 成员（含公开邮箱）和已关联 github_id 的小组成员，用于构建身份索引
+        members = list(self.tmp_data.get("classroom_members") or [])
+        for repo_members in (self.tmp_data.get("group_members") or {}).values():
+            for students in repo_members.values():
+                members.extend(
+                    {"login": student.get("login"), "id": student.get("github_id")} for student in students
+                )
+        return members
+
+    def _indexed_author(self, commit, node_id):
+        # 与API返回的结构相同：GitHub返回的作者名和邮箱即该commit的git作者名和邮箱
+        return {
+            "commit": commit["commit_hash"],
+            "id": node_id,
+            "name": commit["author_name"],
+            "email": commit["author_email"],
+        }
+
+    def _run_query(self, query, variables):
+        return self.http.graphql(self.API_URL, query, variables, headers=self.HEADERS, timeout=15)
+
+    def _query_data(self, query, variables):
+        # 逐页写入断点的查询：返回 data，带 errors 的响应视为失败，不能把不完整的页当作结果记录
+        result = self._run_query(query, variables)
+        if result.get("errors") or not result.get("data"):
+            raise Exception(f"GraphQL query returned errors: {result.get('errors')}")
+        return result["data"]
 
     def extract_team_name_from_repo(self, semestar_name, repo_name):
         if semestar_name == "25spring":
@@ -138,11 +866,11 @@ class GithubClassroomSpider:
     # 当新学期开始时，可以使用这个函数获取新学期的classroom id和assignment id
     def get_project_assignment_id(self):
         def get_classrooms():
-            url = "https://api.github.com/classrooms"
+            url = f"{self.API_BASE}/classrooms"
             classrooms = []
             page = 1
             while True:
-                resp = requests.get(
+                resp = self.http.get(
                     url,
                     headers=self.request_headers,
                     params={"page": page, "per_page": 100},
@@ -161,11 +889,11 @@ class GithubClassroomSpider:
             return classrooms
 
         def get_assignments(classroom_id):
-            url = f"https://api.github.com/classrooms/{classroom_id}/assignments"
+            url = f"{self.API_BASE}/classrooms/{classroom_id}/assignments"
             assignments = []
             page = 1
             while True:
-                resp = requests.get(
+                resp = self.http.get(
                     url,
                     headers=self.request_headers,
                     params={"page": page, "per_page": 100},
@@ -246,13 +974,13 @@ class GithubClassroomSpider:
         users = [m for m in all_members]
         self._log(f"✅ 获取成功，一共有 {len(users)} 名选课同学")
         self.tmp_data["classroom_members"] = users
-        self._save_json(self.tmp_path, self.tmp_data)
+        self._save_stage("classroom_members")
 
     # ========== 数据准备1. 获取project小组中成员信息 ===========
-    def get_accepted_assignments(
-        self, semestar_list=("23spring", "24spring", "25spring")
-    ):
+    def get_accepted_assignments(self, semestar_list=None):
         self._log("开始获取学期project的小组成员信息")
+        if semestar_list is None:
+            semestar_list = self.SEMESTARS or ("23spring", "24spring", "25spring")
         if "full_group_info" not in self.tmp_data:
             self.tmp_data["full_group_info"] = {}
         if "group_members" not in self.tmp_data:
@@ -262,8 +990,8 @@ class GithubClassroomSpider:
             self.tmp_data["group_members"][semestar] = {}
             self.tmp_data["full_group_info"][semestar] = []
             # Important! 默认的页数上限是30，考虑到一个学期一般会有40左右个小组，所以这里设置为100，不需要分页获取
-            url = f"https://api.github.com/assignments/{assignment_id}/accepted_assignments?per_page=100"
-            resp = requests.get(url, headers=self.request_headers, timeout=15)
+            url = f"{self.API_BASE}/assignments/{assignment_id}/accepted_assignments?per_page=100"
+            resp = self.http.get(url, headers=self.request_headers, timeout=15)
 
             if resp.status_code != 200:
                 self._log(
@@ -279,7 +1007,8 @@ class GithubClassroomSpider:
             self.tmp_data["full_group_info"][semestar].append(data)
             self._log(f"已获取 {semestar} 学期的小组成员信息。")
         self._log("已获取所有学期的小组成员信息。")
-        self._save_json(self.tmp_path, self.tmp_data)
+        self._save_stage("full_group_info", semestar_list)
+        self._save_stage("group_members", semestar_list)
 
     def join_classroom_members_with_group_members(self):
         self._log("开始将小组成员信息与classroom成员信息进行关联...")
@@ -299,12 +1028,64 @@ class GithubClassroomSpider:
         self._log(
             f"关联完成。成功关联 {sucess_count} 名同学，失败 {fail_count} 名同学。"
         )
-        self._save_json(self.tmp_path, self.tmp_data)
+        self._save_stage("group_members")
 
     # ========== 2. 本地仓库数据收集 ===========
-    def gather_data_from_local_repos(self):
+    def _local_scan_signature(self, semestar_name):
+        # 影响扫描结果的配置，变化后水位失效，需要全量重扫
+        start_date, end_date = self.semestar_range.get(semestar_name, (None, None))
+        return {
+            "semestar_range": [
+                start_date.isoformat() if start_date else None,
+                end_date.isoformat() if end_date else None,
+            ],
+            "valid_extensions": list(self.valid_extensions),
+            "single_file_insertion_limit": self.single_file_insertion_limit,
+        }
+
+    def _merge_local_scan(self, previous, scan):
+        # 将一次(增量)扫描结果合并为 local_data 中的仓库记录
+        if scan["incremental"] and previous:
+            commits = scan["commits"] + previous["commits"]
+            ext_status = dict(previous["code_line_data"]["ext_status"])
+            for ext, count in scan["ext_status"].items():
+                ext_status[ext] = ext_status.get(ext, 0) + count
+        else:
+            commits = scan["commits"]
+            ext_status = scan["ext_status"]
+        return {
+            "repo_name": scan["repo_name"],
+            "group_name": scan["group_name"],
+            "commits": commits,
+            "code_line_data": {
+                "total_lines": sum(ext_status.values()),
+                "ext_status": ext_status,
+            },
+        }
+
+    def _scan_author_filter(self):
         """
-        遍历本地所有团队仓库，收集commit和代码行数等信息，存入tmp_data['local_data']
+        本地扫描时的作者过滤条件：(邮箱(小写) -> GitHub id, {学期: {仓库名: 小组成员}})。
+        邮箱来自身份索引和上次获取的提交作者，只使用已关联账号的邮箱（未关联的以后可能关联到小组成员）；
+        小组成员不可用时返回 None，扫描时不过滤
+        """
+        group_members = self.tmp_data.get("group_members") if self.FILTER_DURING_SCAN else None
+        if not group_members:
+            return None
+        identities = IdentityIndex(self.identity_index_path)
+        email2id = identities.snapshot(self.IDENTITY_NEGATIVE_TTL_DAYS)
+        identities.close()
+        for users in (self.tmp_data.get("commit_authors") or {}).values():
+            for user in users:
+                if user["email"] is not None:  # email 为 None 的是查询失败的记录
+                    email2id[user["email"].lower()] = user["id"]
+        email2id = {email: node_id for email, node_id in email2id.items() if node_id is not None}
+        return email2id, group_members
+
+    def list_local_repos(self):
+        """
+        列出 repos_dir 下所有合法的团队仓库：{学期: [(仓库名, 组名, 仓库路径), ...]}
+        只读目录不启动git，远程爬取阶段据此获取仓库列表，无需等待本地扫描完成
         """
 
         def extract_semestar_name_from_path(path):
@@ -320,140 +1101,199 @@ class GithubClassroomSpider:
             folder_name = os.path.basename(os.path.normpath(repo_path))
             return self.extract_team_name_from_repo(semestar_name, folder_name)
 
-        def check_valid(semestar, author_name, datatime):
-            # 检查commit时间是否在学期范围内
-            if semestar not in self.semestar_range:
-                return False, f"学期不存在 {semestar}"
-            start_date, end_date = self.semestar_range[semestar]
-            if isinstance(datatime, str):
-                try:
-                    datatime = datetime.fromisoformat(datatime.replace("Z", "+00:00"))
-                except Exception as e:
-                    self._log(f"⚠️ 无法解析时间: {datatime}, 错误: {e}")
-                    return False, f"无法解析时间: {datatime}, 错误: {e}"
-            time_check = start_date <= datatime <= end_date
-            author_check = True  # 这里可根据需要校验作者
-            return time_check, ""
-
-        self._log("开始收集本地仓库数据...")
         semestar_dirs = [
             d
             for d in os.listdir(self.repos_dir)
             if os.path.isdir(os.path.join(self.repos_dir, d))
         ]
-        all_results = {}
+        local_repos = {}
         for semestar in semestar_dirs:
             semestar_path = os.path.join(self.repos_dir, semestar)
             semestar_name = extract_semestar_name_from_path(semestar)
-            repo_paths = []
+            if self.SEMESTARS and semestar_name not in self.SEMESTARS:
+                continue
+            repos = local_repos.setdefault(semestar_name, [])
             for name in os.listdir(semestar_path):
                 repo_path = os.path.join(semestar_path, name)
                 git_folder = os.path.join(repo_path, ".git")
-                if os.path.isdir(repo_path) and os.path.isdir(git_folder):
-                    repo_paths.append(repo_path)
-            results = []
+                if not (os.path.isdir(repo_path) and os.path.isdir(git_folder)):
+                    continue
+                group_name = check_repo_name_valid(semestar_name, repo_path)
+                if group_name is None:
+                    continue
+                repos.append((name, group_name, repo_path))
+        return local_repos
 
-            def process_repo(repo_path):
-                try:
-                    repo = git.Repo(repo_path)
-                    repo_name = os.path.basename(repo_path)
-                    group_name = check_repo_name_valid(semestar_name, repo_path)
-                    if group_name is None:
-                        return None
-                    all_commits = set()
-                    commit_info_list = []
-                    commit_file_stats = {ext: 0 for ext in self.valid_extensions}
-                    for branch in repo.branches:
-                        for commit in repo.iter_commits(branch):
-                            if commit.hexsha not in all_commits:
-                                all_commits.add(commit.hexsha)
-                                valid, _ = check_valid(
-                                    semestar_name,
-                                    commit.author.name,
-                                    commit.committed_datetime.isoformat(),
-                                )
-                                if not valid:
-                                    continue
-                                stats = commit.stats.total
-                                commit_info = {
-                                    "commit_hash": commit.hexsha,
-                                    "author_name": commit.author.name,
-                                    "author_email": commit.author.email,  # 提交者邮箱
-                                    "committed_datetime": commit.committed_datetime.isoformat(),
-                                    "message": commit.message.strip(),
-                                    "insertions": stats.get("insertions", 0),
-                                    "deletions": stats.get("deletions", 0),
-                                    "files_changed": stats.get("files", 0),
-                                }
-                                stats = commit.stats.files
-                                for file_path, file_stat in stats.items():
-                                    # 跳过单文件插入行数过大的文件（如库文件/依赖/大文件）
-                                    if (
-                                        file_stat.get("insertions", 0)
-                                        > self.single_file_insertion_limit
-                                    ):
-                                        continue
-                                    # 删的太多也不行
-                                    if (
-                                        file_stat.get("deletions", 0)
-                                        > self.single_file_insertion_limit
-                                    ):
-                                        continue
-                                    _, ext = os.path.splitext(file_path)
-                                    ext = ext.lower()
-                                    if ext in self.valid_extensions:
-                                        commit_file_stats[ext] += max(
-                                            file_stat["insertions"]
-                                            - file_stat["deletions"],
-                                            0,
-                                        )  # 别整成负数了
-                                commit_info_list.append(commit_info)
-                    self._log(f"处理仓库 {repo_path} 完成，共 {len(commit_info_list)} 个commit")
-                    return {
-                        "repo_name": repo_name,
+    def gather_data_from_local_repos(self):
+        """
+        遍历本地所有团队仓库，收集commit和代码行数等信息，存入tmp_data['local_data']
+        每个仓库的分支头记录在tmp_data['local_watermarks']，再次运行时只扫描新增的commit
+        所有学期的仓库放入同一个工作队列（LOCAL_SCAN_BACKEND 为 "process" 时是进程池），
+        需要完整扫描的仓库在前、增量扫描的在后，各自按估计开销从大到小，避免最后只剩一个大仓库在跑
+        """
+
+        self._log("开始收集本地仓库数据...")
+        watermarks = self.tmp_data.setdefault("local_watermarks", {})
+        previous_results = {}
+        scan_signatures = {}
+        tasks_by_semestar = {}
+        author_filter = self._scan_author_filter()
+        for semestar_name, local_repos in self.list_local_repos().items():
+            previous_results[semestar_name] = {
+                r["repo_name"]: r
+                for r in self.tmp_data.get("local_data", {}).get(semestar_name, [])
+            }
+            semestar_watermarks = watermarks.setdefault(semestar_name, {})
+            scan_signature = self._local_scan_signature(semestar_name)
+            scan_signatures[semestar_name] = scan_signature
+            tasks = tasks_by_semestar.setdefault(semestar_name, [])
+            for name, group_name, repo_path in local_repos:
+                # 没有小组成员、或有成员未关联 github_id 时过滤阶段无法判断，扫描时也不过滤
+                repo_filter, members = None, None
+                if author_filter:
+                    students = author_filter[1].get(semestar_name, {}).get(name, [])
+                    if students and all("github_id" in student for student in students):
+                        repo_filter = (author_filter[0], [student["github_id"] for student in students])
+                        members = sorted(str(member_id) for member_id in repo_filter[1])
+                # 水位与上次结果都可用且配置未变时才做增量扫描；
+                # 上次按另一组成员过滤过时，之前丢弃的commit可能变为有效，需要完整扫描
+                watermark = semestar_watermarks.get(name)
+                previous_tips = None
+                if (
+                    self.INCREMENTAL_LOCAL_SCAN
+                    and watermark
+                    and name in previous_results[semestar_name]
+                    and watermark.get("signature") == scan_signature
+                    and watermark.get("members") in (None, members)
+                ):
+                    previous_tips = watermark["branch_tips"]
+                tasks.append(
+                    {
+                        "semestar_name": semestar_name,
+                        "repo_name": name,
                         "group_name": group_name,
-                        "commits": commit_info_list,
-                        "code_line_data": {
-                            "total_lines": sum(commit_file_stats.values()),
-                            "ext_status": commit_file_stats,
-                        },
+                        "members": members,
+                        "cost": estimate_scan_cost(repo_path),
+                        "args": (
+                            repo_path,
+                            self.semestar_range.get(semestar_name),
+                            self.valid_extensions,
+                            self.single_file_insertion_limit,
+                            previous_tips,
+                            self.commit_stats_cache_path,
+                            repo_filter,
+                        ),
                     }
-                except Exception as e:
-                    self._log(f"处理仓库 {repo_path} 失败: {e}")
-                    return None
+                )
 
-            if self.MULTI_THREAD:
-                # 多线程加速处理
-                try:
-                    with ThreadPoolExecutor(max_workers=self.WORKERS) as executor:
-                        future_to_repo = {
-                            executor.submit(process_repo, path): path
-                            for path in repo_paths
-                        }
-                        for future in as_completed(future_to_repo):
-                            repo_path = future_to_repo[future]
-                            try:
-                                result = future.result(timeout=60)
-                                if result:
-                                    results.append(result)
-                            except Exception as e:
-                                self._log(f"处理仓库 {repo_path} 失败: {e}")
-                except KeyboardInterrupt:
-                    self._log("检测到中断，正在退出线程池...")
-                    executor.shutdown(wait=False, cancel_futures=True)
-                    raise
+        # 线程池/进程池按提交顺序取任务，排好序一次提交即为全局的大任务优先队列
+        queue = sorted(
+            (task for tasks in tasks_by_semestar.values() for task in tasks),
+            key=lambda task: (task["args"][4] is None, task["cost"]),
+            reverse=True,
+        )
+        if self.LOCAL_SCAN_BACKEND == "process":
+            executor_class, max_workers = ProcessPoolExecutor, self.PROCESS_WORKERS
+        else:
+            executor_class, max_workers = ThreadPoolExecutor, self.WORKERS
+        results = {semestar_name: [] for semestar_name in tasks_by_semestar}
+
+        def collect_result(task, scan):
+            repo_path = task["args"][0]
+            if scan["unchanged"]:
+                self._log(f"仓库 {repo_path} 分支头未变化，沿用上次结果")
             else:
-                for repo_path in repo_paths:
-                    result = process_repo(repo_path)
-                    if result:
-                        results.append(result)
-            all_results[semestar_name] = results
-            self._log(f"学期 {semestar_name} 处理完成，共{len(results)}个仓库。")
+                self._log(
+                    f"处理仓库 {repo_path} 完成，共 {len(scan['commits'])} 个"
+                    f"{'新' if scan['incremental'] else ''}commit，其中 {scan['diffed']} 个计算了diff，"
+                    f"丢弃 {scan['dropped']} 个非小组成员的commit"
+                )
+            scan["repo_name"] = task["repo_name"]
+            scan["group_name"] = task["group_name"]
+            scan["members"] = task["members"]
+            results[task["semestar_name"]].append(scan)
+            self.report.record_repo(
+                task["repo_name"],
+                semestar=task["semestar_name"],
+                wall_seconds=round(scan["seconds"], 3),
+                cpu_seconds=round(scan["cpu_seconds"], 3),
+                commits=len(scan["commits"]),
+                object_bytes=task["cost"],
+                dropped=scan["dropped"],
+                diffed=scan.get("diffed", 0),
+                git_processes=scan["git_processes"],
+            )
+
+        if self.MULTI_THREAD:
+            # 多线程/多进程加速处理
+            try:
+                with executor_class(max_workers=max_workers) as executor:
+                    future_to_task = {
+                        executor.submit(scan_local_repo, *task["args"]): task
+                        for task in queue
+                    }
+                    for future in as_completed(future_to_task):
+                        task = future_to_task[future]
+                        try:
+                            collect_result(task, future.result(timeout=60))
+                        except Exception as e:
+                            self._log(f"处理仓库 {task['args'][0]} 失败: {e}")
+            except KeyboardInterrupt:
+                self._log("检测到中断，正在退出线程池...")
+                executor.shutdown(wait=False, cancel_futures=True)
+                raise
+        else:
+            for task in queue:
+                try:
+                    collect_result(task, scan_local_repo(*task["args"]))
+                except Exception as e:
+                    self._log(f"处理仓库 {task['args'][0]} 失败: {e}")
+
+        all_results = {}
+        changed_shards = set()
+        for semestar_name, scans in results.items():
+            semestar_watermarks = watermarks[semestar_name]
+            merged_results = []
+            # 按仓库名排序，结果不受线程完成顺序影响，未变化时分片内容也不变
+            for scan in sorted(scans, key=lambda scan: scan["repo_name"]):
+                if not scan["unchanged"]:
+                    changed_shards.add((semestar_name, scan["repo_name"]))
+                merged_results.append(
+                    self._merge_local_scan(
+                        previous_results[semestar_name].get(scan["repo_name"]), scan
+                    )
+                )
+                semestar_watermarks[scan["repo_name"]] = {
+                    "signature": scan_signatures[semestar_name],
+                    "branch_tips": scan["branch_tips"],
+                    "members": scan["members"],
+                }
+            # 已不存在的仓库不再保留水位
+            for repo_name in set(semestar_watermarks) - {s["repo_name"] for s in scans}:
+                del semestar_watermarks[repo_name]
+            all_results[semestar_name] = merged_results
+            self._log(f"学期 {semestar_name} 处理完成，共{len(scans)}个仓库。")
         self.tmp_data["local_data"] = all_results
-        self._save_json(self.tmp_path, self.tmp_data)
+        self._save_stage("local_data", changed_shards)
+        self._save_stage("local_watermarks", list(results))
         self._log("本地仓库数据收集完成。")
 
     # ========== 3. 远程PR爬取 ===========
+    def _paginate_connection(self, checkpoint, repo_name, query, connection):
+        """
+        按断点逐页爬取一个仓库的 GraphQL 连接（每页50个），返回 (全部节点, 失败时的异常)。
+        query 接收 $owner、$repo、$first、$after，connection 为 repository 下的连接名
+        """
+
+        def fetch_page(state):
+            variables = {"owner": self.organization, "repo": repo_name, "first": 50, "after": state["after"]}
+            data = self._query_data(query, variables)["repository"][connection]
+            page_info = data["pageInfo"]
+            return data["nodes"], {"after": page_info["endCursor"]} if page_info["hasNextPage"] else None
+
+        pages, error = checkpoint.paginate(repo_name, fetch_page, {"after": None})
+        return [node for nodes in pages for node in nodes], error
+
     def fetch_prs(self):
         """
         并发爬取所有仓库的PR信息，存入tmp_data['pr']
@@ -485,32 +1325,16 @@ class GithubClassroomSpider:
         """
         self._log("开始爬取所有仓库的PR信息...")
         pr_data = {}
-        # 获取所有repo名
-        all_repos = []
-        for semestar, repos in self.tmp_data.get("local_data", {}).items():
-            for repo in repos:
-                all_repos.append(repo["repo_name"])
+        # 获取所有repo名（直接列出本地仓库目录，不依赖本地扫描结果）
+        all_repos = [name for repos in self.list_local_repos().values() for name, _, _ in repos]
 
+        checkpoint = FetchCheckpoint(self.fetch_checkpoint_path, "pr")
+
+        @self.report.per_repo
         def fetch_one_repo_pr(repo_name):
-            all_prs = []
-            has_next = True
-            cursor = None
-            while has_next:
-                variables = {
-                    "owner": self.organization,
-                    "repo": repo_name,
-                    "first": 50,
-                    "after": cursor,
-                }
-                try:
-                    result = self._run_query(PR_QUERY, variables)
-                    repo_data = result["data"]["repository"]["pullRequests"]
-                    all_prs.extend(repo_data["nodes"])
-                    has_next = repo_data["pageInfo"]["hasNextPage"]
-                    cursor = repo_data["pageInfo"]["endCursor"]
-                except Exception as e:
-                    self._log(f"爬取PR失败: {repo_name}: {e}")
-                    break
+            all_prs, error = self._paginate_connection(checkpoint, repo_name, PR_QUERY, "pullRequests")
+            if error:
+                self._log(f"爬取PR失败: {repo_name}: {error}")
             self._log(f"{repo_name} PR数: {len(all_prs)}")
             return repo_name, all_prs
 
@@ -518,7 +1342,7 @@ class GithubClassroomSpider:
             try:
                 with ThreadPoolExecutor(max_workers=self.WORKERS) as executor:
                     futures = {
-                        executor.submit(fetch_one_repo_pr, repo): repo
+                        executor.submit(self.report.bind(fetch_one_repo_pr), repo): repo
                         for repo in all_repos
                     }
                     for future in as_completed(futures):
@@ -528,6 +1352,7 @@ class GithubClassroomSpider:
                             pr_data[repo] = prs
                         except Exception as e:
                             self._log(f"PR任务异常: {repo} - {e}")
+                            checkpoint.mark_failed(repo)
             except KeyboardInterrupt:
                 self._log("检测到中断，正在退出线程池...")
                 executor.shutdown(wait=False, cancel_futures=True)
@@ -536,8 +1361,8 @@ class GithubClassroomSpider:
             for repo in all_repos:
                 repo, prs = fetch_one_repo_pr(repo)
                 pr_data[repo] = prs
-        self.tmp_data["pr"] = pr_data
-        self._save_json(self.tmp_path, self.tmp_data)
+        self._save_repo_stage("pr", pr_data)
+        checkpoint.close()
         self._log("所有PR信息爬取完成。")
 
     # ========== 3.2 远程Issue爬取 ===========
@@ -576,31 +1401,15 @@ class GithubClassroomSpider:
         """
         self._log("开始爬取所有仓库的Issue信息...")
         issue_data = {}
-        all_repos = []
-        for semestar, repos in self.tmp_data.get("local_data", {}).items():
-            for repo in repos:
-                all_repos.append(repo["repo_name"])
+        all_repos = [name for repos in self.list_local_repos().values() for name, _, _ in repos]
+
+        checkpoint = FetchCheckpoint(self.fetch_checkpoint_path, "issues")
 
+        @self.report.per_repo
         def fetch_one_repo_issue(repo_name):
-            all_issues = []
-            has_next = True
-            cursor = None
-            while has_next:
-                variables = {
-                    "owner": self.organization,
-                    "repo": repo_name,
-                    "first": 50,
-                    "after": cursor,
-                }
-                try:
-                    result = self._run_query(ISSUE_QUERY, variables)
-                    repo_data = result["data"]["repository"]["issues"]
-                    all_issues.extend(repo_data["nodes"])
-                    has_next = repo_data["pageInfo"]["hasNextPage"]
-                    cursor = repo_data["pageInfo"]["endCursor"]
-                except Exception as e:
-                    self._log(f"爬取Issue失败: {repo_name}: {e}")
-                    break
+            all_issues, error = self._paginate_connection(checkpoint, repo_name, ISSUE_QUERY, "issues")
+            if error:
+                self._log(f"爬取Issue失败: {repo_name}: {error}")
             self._log(f"{repo_name} Issue数: {len(all_issues)}")
             return repo_name, all_issues
 
@@ -608,7 +1417,7 @@ class GithubClassroomSpider:
             try:
                 with ThreadPoolExecutor(max_workers=self.WORKERS) as executor:
                     futures = {
-                        executor.submit(fetch_one_repo_issue, repo): repo
+                        executor.submit(self.report.bind(fetch_one_repo_issue), repo): repo
                         for repo in all_repos
                     }
                     for future in as_completed(futures):
@@ -618,6 +1427,7 @@ class GithubClassroomSpider:
                             issue_data[repo] = issues
                         except Exception as e:
                             self._log(f"Issue任务异常: {repo} - {e}")
+                            checkpoint.mark_failed(repo)
             except KeyboardInterrupt:
                 self._log("检测到中断，正在退出线程池...")
                 executor.shutdown(wait=False, cancel_futures=True)
@@ -626,8 +1436,8 @@ class GithubClassroomSpider:
             for repo in all_repos:
                 repo, issues = fetch_one_repo_issue(repo)
                 issue_data[repo] = issues
-        self.tmp_data["issues"] = issue_data
-        self._save_json(self.tmp_path, self.tmp_data)
+        self._save_repo_stage("issues", issue_data)
+        checkpoint.close()
         self._log("所有Issue信息爬取完成。")
 
     # ========== 3.3 远程Branch爬取 ===========
@@ -657,31 +1467,15 @@ class GithubClassroomSpider:
         """
         self._log("开始爬取所有仓库的分支信息...")
         branch_data = {}
-        all_repos = []
-        for semestar, repos in self.tmp_data.get("local_data", {}).items():
-            for repo in repos:
-                all_repos.append(repo["repo_name"])
+        all_repos = [name for repos in self.list_local_repos().values() for name, _, _ in repos]
+
+        checkpoint = FetchCheckpoint(self.fetch_checkpoint_path, "branches")
 
+        @self.report.per_repo
         def fetch_one_repo_branch(repo_name):
-            all_branches = []
-            has_next = True
-            cursor = None
-            while has_next:
-                variables = {
-                    "owner": self.organization,
-                    "repo": repo_name,
-                    "first": 50,
-                    "after": cursor,
-                }
-                try:
-                    result = self._run_query(BRANCH_QUERY, variables)
-                    refs_data = result["data"]["repository"]["refs"]
-                    all_branches.extend(refs_data["nodes"])
-                    has_next = refs_data["pageInfo"]["hasNextPage"]
-                    cursor = refs_data["pageInfo"]["endCursor"]
-                except Exception as e:
-                    self._log(f"爬取Branch失败: {repo_name}: {e}")
-                    break
+            all_branches, error = self._paginate_connection(checkpoint, repo_name, BRANCH_QUERY, "refs")
+            if error:
+                self._log(f"爬取Branch失败: {repo_name}: {error}")
             self._log(f"{repo_name} 分支数: {len(all_branches)}")
             return repo_name, all_branches
 
@@ -689,7 +1483,7 @@ class GithubClassroomSpider:
             try:
                 with ThreadPoolExecutor(max_workers=self.WORKERS) as executor:
                     futures = {
-                        executor.submit(fetch_one_repo_branch, repo): repo
+                        executor.submit(self.report.bind(fetch_one_repo_branch), repo): repo
                         for repo in all_repos
                     }
                     for future in as_completed(futures):
@@ -699,6 +1493,7 @@ class GithubClassroomSpider:
                             branch_data[repo] = branches
                         except Exception as e:
                             self._log(f"Branch任务异常: {repo} - {e}")
+                            checkpoint.mark_failed(repo)
             except KeyboardInterrupt:
                 self._log("检测到中断，正在退出线程池...")
                 executor.shutdown(wait=False, cancel_futures=True)
@@ -707,11 +1502,287 @@ class GithubClassroomSpider:
             for repo in all_repos:
                 repo, branches = fetch_one_repo_branch(repo)
                 branch_data[repo] = branches
-        self.tmp_data["branches"] = branch_data
-        self._save_json(self.tmp_path, self.tmp_data)
+        self._save_repo_stage("branches", branch_data)
+        checkpoint.close()
         self._log("所有分支信息爬取完成。")
 
-    # ========== 3.4 远程提交作者信息爬取 ===========
+    # ========== 3.4 远程PR/Issue/Branch合并爬取 ===========
+    def fetch_repo_activity(self):
+        """
+        每个仓库用一个查询同时获取PR、Issue和分支的第一页，之后只翻页仍有下一页的连接，
+        结果与 fetch_prs/fetch_issues/fetch_branches 分别爬取时相同，
+        存入tmp_data['pr']、tmp_data['issues']、tmp_data['branches']
+        """
+        ACTIVITY_QUERY = """
+        query(
+          $owner: String!, $repo: String!, $first: Int!,
+          $withPrs: Boolean!, $prAfter: String,
+          $withIssues: Boolean!, $issueAfter: String,
+          $withBranches: Boolean!, $branchAfter: String
+        ) {
+          repository(owner: $owner, name: $repo) {
+            pullRequests(first: $first, after: $prAfter, orderBy: {field: CREATED_AT, direction: ASC}) @include(if: $withPrs) {
+              pageInfo {
+                hasNextPage
+                endCursor
+              }
+              nodes {
+                title
+                createdAt
+                closedAt
+                mergedAt
+                number
+                author {
+                  login
+                }
+                commits {
+                  totalCount
+                }
+              }
+            }
+            issues(first: $first, after: $issueAfter, orderBy: {field: CREATED_AT, direction: ASC}) @include(if: $withIssues) {
+              pageInfo {
+                hasNextPage
+                endCursor
+              }
+              nodes {
+                title
+                createdAt
+                closedAt
+                number
+                author {
+                  login
+                }
+                comments {
+                  totalCount
+                }
+                labels(first: 5) {
+                  nodes {
+                    name
+                  }
+                }
+              }
+            }
+            refs(refPrefix: \"refs/heads/\", first: $first, after: $branchAfter) @include(if: $withBranches) {
+              pageInfo {
+                hasNextPage
+                endCursor
+              }
+              nodes {
+                name
+                target {
+                  ... on Commit {
+                    committedDate
+                  }
+                }
+              }
+            }
+          }
+        }
+        """
+        # tmp_data的key -> (GraphQL连接名, 是否继续翻页的变量, 游标变量)
+        CONNECTIONS = {
+            "pr": ("pullRequests", "withPrs", "prAfter"),
+            "issues": ("issues", "withIssues", "issueAfter"),
+            "branches": ("refs", "withBranches", "branchAfter"),
+        }
+        self._log("开始爬取所有仓库的PR/Issue/分支信息...")
+        activity_data = {key: {} for key in CONNECTIONS}
+        all_repos = [name for repos in self.list_local_repos().values() for name, _, _ in repos]
+
+        checkpoint = FetchCheckpoint(self.fetch_checkpoint_path, "repo_activity")
+
+        @self.report.per_repo
+        def fetch_one_repo_activity(repo_name):
+            # 翻页状态为每个连接是否继续翻页及其游标，全部连接翻完时为 None
+            def fetch_page(state):
+                variables = {"owner": self.organization, "repo": repo_name, "first": 50, **state}
+                repo_data = self._query_data(ACTIVITY_QUERY, variables)["repository"]
+                nodes = {}
+                next_state = dict(state)
+                for key, (connection, include_var, after_var) in CONNECTIONS.items():
+                    if not state[include_var]:
+                        continue
+                    connection_data = repo_data[connection]
+                    nodes[key] = connection_data["nodes"]
+                    next_state[include_var] = connection_data["pageInfo"]["hasNextPage"]
+                    next_state[after_var] = connection_data["pageInfo"]["endCursor"]
+                has_next = any(next_state[include_var] for _, include_var, _ in CONNECTIONS.values())
+                return nodes, next_state if has_next else None
+
+            state = {}
+            for connection, include_var, after_var in CONNECTIONS.values():
+                state[include_var] = True
+                state[after_var] = None
+            pages, error = checkpoint.paginate(repo_name, fetch_page, state)
+            if error:
+                self._log(f"爬取PR/Issue/分支失败: {repo_name}: {error}")
+            collected = {key: [] for key in CONNECTIONS}
+            for nodes in pages:
+                for key, page_nodes in nodes.items():
+                    collected[key].extend(page_nodes)
+            self._log(
+                f"{repo_name} PR数: {len(collected['pr'])}, Issue数: {len(collected['issues'])}, "
+                f"分支数: {len(collected['branches'])}"
+            )
+            return repo_name, collected
+
+        def collect(repo, collected):
+            for key, nodes in collected.items():
+                activity_data[key][repo] = nodes
+
+        if self.MULTI_THREAD:
+            try:
+                with ThreadPoolExecutor(max_workers=self.WORKERS) as executor:
+                    futures = {
+                        executor.submit(self.report.bind(fetch_one_repo_activity), repo): repo
+                        for repo in all_repos
+                    }
+                    for future in as_completed(futures):
+                        repo = futures[future]
+                        try:
+                            collect(*future.result(timeout=30))
+                        except Exception as e:
+                            self._log(f"PR/Issue/分支任务异常: {repo} - {e}")
+                            checkpoint.mark_failed(repo)
+            except KeyboardInterrupt:
+                self._log("检测到中断，正在退出线程池...")
+                executor.shutdown(wait=False, cancel_futures=True)
+                raise
+        else:
+            for repo in all_repos:
+                collect(*fetch_one_repo_activity(repo))
+        for key, data in activity_data.items():
+            self._save_repo_stage(key, data)
+        checkpoint.close()
+        self._log("所有PR/Issue/分支信息爬取完成。")
+
+    # ========== 3.5 远程提交作者信息爬取 ===========
+    def _fetch_commit_authors_batched(self, commits_to_fetch, checkpoint):
+        """
+        把多个仓库的多个commit打包进一个带别名的GraphQL查询：
+        每个查询最多 COMMIT_AUTHOR_BATCH_SIZE 个 object(expression: sha)，
+        返回结构与逐个查询时的 commit_authors 相同。
+        每个成功的查询按仓库写入断点；请求失败或 GraphQL 返回错误的仓库不记录并记为失败，
+        断点因此保留到下次运行，这些commit重新查询。
+        """
+        COMMIT_AUTHOR_FRAGMENT = """
+        fragment CommitAuthor on Commit {
+          author {
+            user {
+              id
+            }
+            name
+            email
+          }
+        }
+        """
+
+        def build_query(batch):
+            # batch: [(repo_name, sha), ...]，同一仓库的commit放在同一个 repository 别名下
+            repo_shas = {}
+            for repo_name, sha in batch:
+                repo_shas.setdefault(repo_name, []).append(sha)
+            params = ["$owner: String!"]
+            variables = {"owner": self.organization}
+            aliases = []  # (repo别名, commit别名, repo_name, sha)
+            body = []
+            for i, (repo_name, shas) in enumerate(repo_shas.items()):
+                params.append(f"$r{i}: String!")
+                variables[f"r{i}"] = repo_name
+                body.append(f"r{i}: repository(owner: $owner, name: $r{i}) {{")
+                for j, sha in enumerate(shas):
+                    params.append(f"$r{i}c{j}: String!")
+                    variables[f"r{i}c{j}"] = sha
+                    body.append(f"  c{j}: object(expression: $r{i}c{j}) {{ ...CommitAuthor }}")
+                    aliases.append((f"r{i}", f"c{j}", repo_name, sha))
+                body.append("}")
+            query = (
+                "query(" + ", ".join(params) + ") {\n" + "\n".join(body) + "\n}\n"
+                + COMMIT_AUTHOR_FRAGMENT
+            )
+            return query, variables, aliases
+
+        def fetch_batch(batch):
+            query, variables, aliases = build_query(batch)
+            try:
+                result = self._run_query(query, variables)
+            except Exception as e:
+                self._log(f"批量爬取提交作者信息失败: {len(batch)} 个提交: {e}")
+                result = {"errors": [{"message": str(e)}]}
+            data = result.get("data") or {}
+            # 带 path 的错误只影响对应的仓库别名，没有 path 的错误（或没有返回 data）整个查询都不可信
+            errors = result.get("errors") or []
+            failed_aliases = {error["path"][0] for error in errors if error.get("path")}
+            if errors:
+                self._log(f"批量爬取提交作者信息返回错误: {len(batch)} 个提交: {errors[0].get('message')}")
+            batch_failed = any(not error.get("path") for error in errors)
+            failed_repos = set()
+            users = []
+            for repo_alias, commit_alias, repo_name, sha in aliases:
+                if batch_failed or repo_alias in failed_aliases or data.get(repo_alias) is None:
+                    # 查询失败不等于没有关联账号：不写入断点，仓库记为失败，重跑时重新查询
+                    failed_repos.add(repo_name)
+                    users.append(
+                        (repo_name, {"commit": sha, "id": None, "name": None, "email": None})
+                    )
+                    continue
+                obj = data[repo_alias].get(commit_alias) or {}
+                author_info = obj.get("author")
+                if not author_info:
+                    self._log(f"爬取提交作者信息失败: {repo_name}/{sha}")
+                    users.append(
+                        (repo_name, {"commit": sha, "id": None, "name": None, "email": None})
+                    )
+                    continue
+                users.append(
+                    (
+                        repo_name,
+                        {
+                            "commit": sha,
+                            "id": author_info["user"]["id"] if author_info["user"] else None,
+                            "name": author_info["name"],
+                            "email": author_info["email"],
+                        },
+                    )
+                )
+            # 查询完成后立即按仓库写入断点，不等待其他批次
+            repo_users = {}
+            for repo_name, user in users:
+                repo_users.setdefault(repo_name, []).append(user)
+            for repo_name, nodes in repo_users.items():
+                if repo_name in failed_repos:
+                    checkpoint.mark_failed(repo_name)
+                else:
+                    checkpoint.add_page(repo_name, nodes)
+            return users
+
+        def collect(users):
+            for repo_name, user in users:
+                author_data[repo_name].append(user)
+
+        pending = [
+            (repo_name, sha) for repo_name, shas in commits_to_fetch.items() for sha in shas
+        ]
+        size = self.COMMIT_AUTHOR_BATCH_SIZE
+        batches = [pending[i : i + size] for i in range(0, len(pending), size)]
+        self._log(f"共 {len(pending)} 个提交，分 {len(batches)} 个批量查询")
+        author_data = {repo_name: [] for repo_name in commits_to_fetch}
+        if self.MULTI_THREAD:
+            try:
+                with ThreadPoolExecutor(max_workers=self.WORKERS) as executor:
+                    futures = [executor.submit(self.report.bind(fetch_batch), batch) for batch in batches]
+                    for future in as_completed(futures):
+                        collect(future.result())
+            except KeyboardInterrupt:
+                self._log("检测到中断，正在退出线程池...")
+                executor.shutdown(wait=False, cancel_futures=True)
+                raise
+        else:
+            for batch in batches:
+                collect(fetch_batch(batch))
+        return author_data
+
     def fetch_commit_authors(self):
         """
         并发爬取所有仓库的提交作者信息，存入tmp_data['commit_authors']
@@ -738,6 +1809,8 @@ class GithubClassroomSpider:
 
         # 从本地数据中获取需要查询的提交
         commits_to_fetch = {}  # repo -> {commits_author: commithash, }
+        sha2commit = {}  # 需要查询的commit -> 本地commit记录
+        seen = {}  # 邮箱 -> (最早, 最晚) 提交时间
         for semestar, repos in self.tmp_data.get("local_data", {}).items():
             for repo in repos:
                 email2hash = {}
@@ -746,8 +1819,52 @@ class GithubClassroomSpider:
                     if commit["author_email"] not in email2hash:
                         email2hash[commit["author_email"]] = commit["commit_hash"]
                         commit_to_fetch_in_repo.append(commit["commit_hash"])
+                        sha2commit[commit["commit_hash"]] = commit
+                    committed = datetime.fromisoformat(commit["committed_datetime"]).astimezone(timezone.utc)
+                    first, last = seen.get(commit["author_email"], (committed, committed))
+                    seen[commit["author_email"]] = (min(first, committed), max(last, committed))
                 commits_to_fetch[repo["repo_name"]] = commit_to_fetch_in_repo
 
+        # 从断点继续：上次已查到作者的提交不再查询
+        checkpoint = FetchCheckpoint(self.fetch_checkpoint_path, "commit_authors")
+        resumed = {}
+        for repo_name, shas in commits_to_fetch.items():
+            fetched, commits_to_fetch[repo_name] = checkpoint.resume(repo_name, shas, lambda user: user["commit"])
+            if fetched:
+                resumed[repo_name] = fetched
+        if resumed:
+            self._log(
+                f"从断点恢复 {len(resumed)} 个仓库共 {sum(len(u) for u in resumed.values())} 个提交的作者信息"
+            )
+
+        # 先查身份索引：已知邮箱直接生成作者信息；未知邮箱在所有仓库中只查询一次，其他仓库沿用结果
+        identities = IdentityIndex(self.identity_index_path)
+        identities.add_members(self._known_members())
+        known = identities.lookup(
+            [sha2commit[sha]["author_email"] for shas in commits_to_fetch.values() for sha in shas],
+            self.IDENTITY_NEGATIVE_TTL_DAYS,
+        )
+        indexed = {}  # repo -> 由索引生成的作者信息
+        deferred = {}  # repo -> 等待其他仓库查询结果的commit
+        queried = set()
+        for repo_name, shas in commits_to_fetch.items():
+            remaining = []
+            for sha in shas:
+                email = sha2commit[sha]["author_email"].lower()
+                if email in known:
+                    indexed.setdefault(repo_name, []).append(self._indexed_author(sha2commit[sha], known[email]))
+                elif email in queried:
+                    deferred.setdefault(repo_name, []).append(sha)
+                else:
+                    queried.add(email)
+                    remaining.append(sha)
+            commits_to_fetch[repo_name] = remaining
+        self._log(
+            f"身份索引命中 {sum(len(u) for u in indexed.values())} 个提交作者，"
+            f"{len(queried)} 个未知邮箱需要查询"
+        )
+        failed_shas = set()
+
         def fetch_commit_author(repo_name, commit_sha):
             variables = {
                 "owner": self.organization,
@@ -765,8 +1882,11 @@ class GithubClassroomSpider:
                 }
             except Exception as e:
                 self._log(f"爬取提交作者信息失败: {repo_name}/{commit_sha}: {e}")
+                failed_shas.add(commit_sha)
+                checkpoint.mark_failed(repo_name)
                 return {"commit": commit_sha, "id": None, "name": None, "email": None}
 
+        @self.report.per_repo
         def process_repo(repo_name, commit_shas):
             self._log(
                 f"开始爬取 {repo_name} 的提交作者信息 - {len(commit_shas)} 个提交"
@@ -775,7 +1895,7 @@ class GithubClassroomSpider:
             if self.MULTI_THREAD:
                 with ThreadPoolExecutor(max_workers=self.WORKERS) as executor:
                     futures = {
-                        executor.submit(fetch_commit_author, repo_name, sha): sha
+                        executor.submit(self.report.bind(fetch_commit_author), repo_name, sha): sha
                         for sha in commit_shas
                     }
                     for future in as_completed(futures):
@@ -787,13 +1907,16 @@ class GithubClassroomSpider:
                     result = fetch_commit_author(repo_name, sha)
                     if result:
                         users.append(result)
+            checkpoint.add_page(repo_name, [u for u in users if u["commit"] not in failed_shas])
             return repo_name, users
 
-        if self.MULTI_THREAD:
+        if self.COMMIT_AUTHOR_BATCH_SIZE:
+            author_data = self._fetch_commit_authors_batched(commits_to_fetch, checkpoint)
+        elif self.MULTI_THREAD:
             try:
                 with ThreadPoolExecutor(max_workers=self.WORKERS) as executor:
                     futures = {
-                        executor.submit(process_repo, repo, commits): repo
+                        executor.submit(self.report.bind(process_repo), repo, commits): repo
                         for repo, commits in commits_to_fetch.items()
                     }
                     for future in as_completed(futures):
@@ -803,6 +1926,7 @@ class GithubClassroomSpider:
                             author_data[repo] = users
                         except Exception as e:
                             self._log(f"处理仓库提交作者信息任务异常: {repo} - {e}")
+                            checkpoint.mark_failed(repo)
             except KeyboardInterrupt:
                 self._log("检测到中断，正在退出线程池...")
                 executor.shutdown(wait=False, cancel_futures=True)
@@ -812,12 +1936,40 @@ class GithubClassroomSpider:
                 repo, users = process_repo(repo, commits)
                 author_data[repo] = users
 
-        self.tmp_data["commit_authors"] = author_data
-        self._save_json(self.tmp_path, self.tmp_data)
+        # 把查询结果写入身份索引（只记录GitHub确实返回了作者的提交），再补全沿用结果的仓库
+        resolved = {}
+        for users in list(resumed.values()) + list(author_data.values()):
+            for user in users:
+                if user["email"] is not None and user["commit"] in sha2commit:
+                    resolved[sha2commit[user["commit"]]["author_email"].lower()] = user["id"]
+        identities.record(resolved)
+        for repo_name, shas in deferred.items():
+            for sha in shas:
+                email = sha2commit[sha]["author_email"].lower()
+                if email in resolved:
+                    user = self._indexed_author(sha2commit[sha], resolved[email])
+                else:
+                    user = {"commit": sha, "id": None, "name": None, "email": None}
+                author_data.setdefault(repo_name, []).append(user)
+        identities.touch(
+            {email: (first.isoformat(), last.isoformat()) for email, (first, last) in seen.items()}
+        )
+        identities.close()
+        for repo_name, users in indexed.items():
+            author_data[repo_name] = users + author_data.get(repo_name, [])
+        for repo_name, users in resumed.items():
+            author_data[repo_name] = users + author_data.get(repo_name, [])
+        self._save_repo_stage("commit_authors", author_data)
+        checkpoint.close()
         self._log("所有提交作者信息爬取完成。")
 
     # ========== 4 过滤提交信息 ===========
     def filter_commits_by_classroom_user(self):
+        """
+        按提交作者与小组成员过滤 local_data，结果存入 tmp_data['filtered_local_data']。
+        每个仓库只记录小组成员的 邮箱 -> GitHub id（author_ids）和仓库信息，不再复制一份commit；
+        预聚合时按 author_ids 从 local_data 中取出有效的commit
+        """
         self._log("开始过滤提交信息...")
         self.tmp_data["filtered_local_data"] = {}
         for semestar, repos in self.tmp_data.get("local_data", {}).items():
@@ -833,62 +1985,124 @@ class GithubClassroomSpider:
                     .get(repo["repo_name"], [])
                 )
                 valid_ids = set(p["github_id"] for p in group_members)
-                valid_commits = []
+                author_ids = {}
                 for commit in repo["commits"]:
-                    if commit["author_email"] not in email2id:  # 鉴定为外部commitor
+                    email = commit["author_email"]
+                    if email in author_ids or email not in email2id:  # 不在 email2id 中的鉴定为外部commitor
                         continue
-                    if (
-                        email2id[commit["author_email"]] in valid_ids
-                    ):  # 鉴定为小组内成员
-                        commit["author_id"] = email2id[commit["author_email"]]
-                        valid_commits.append(commit)
-                if len(valid_commits) == 0:
+                    if email2id[email] in valid_ids:  # 鉴定为小组内成员
+                        author_ids[email] = email2id[email]
+                if len(author_ids) == 0:
                     continue
 
                 self.tmp_data["filtered_local_data"][semestar].append(
                     {
                         "repo_name": repo["repo_name"],
                         "group_name": repo["group_name"],
-                        "commits": valid_commits,
+                        "author_ids": author_ids,
                         "code_line_data": repo["code_line_data"],
                         "group_member_ids": [
                             val for val in valid_ids if val is not None
                         ],
                     }
                 )
-        self._save_json(self.tmp_path, self.tmp_data)
+        self._save_stage("filtered_local_data")
         self._log("所有提交信息过滤完成。")
 
-    # ========== 5. 图表数据生成 ===========
+    # ========== 5. 提交预聚合 ===========
+    def build_commit_rollup(self):
+        """
+        把过滤后的commit预聚合为 tmp_data['commit_rollup']，每个仓库一条记录：
+        仓库/组名、小组成员、代码行数，以及 CommitRollup.records 导出的 (作者, 日, 小时) 与 message 统计。
+        只重新聚合过滤结果或本地commit有变化的仓库（按两者分片的内容指纹判断），其余沿用上次的记录；
+        message 分类按学期批量进行，结果按SHA缓存在全局commit统计缓存中。
+        """
+        self._log("开始预聚合提交数据...")
+        previous = {
+            (semestar, record["repo_name"]): record
+            for semestar, records in (self.tmp_data.get("commit_rollup") or {}).items()
+            for record in records
+        }
+        rollups = {}
+        changed_shards = set()
+        for semestar, repo_names in self.stage_store.records("filtered_local_data").items():
+            records = {}
+            changed = {}
+            for repo_name in repo_names:
+                source = ":".join(
+                    str(self.stage_store.file_fingerprint(self.stage_store.record_path(key, semestar, repo_name)))
+                    for key in ("filtered_local_data", "local_data")
+                )
+                record = previous.get((semestar, repo_name))
+                if record is None or record["source"] != source:
+                    repo = self.stage_store.load_record("filtered_local_data", semestar, repo_name)
+                    local_repo = self.stage_store.load_record("local_data", semestar, repo_name)
+                    commits = [
+                        commit for commit in local_repo["commits"] if commit["author_email"] in repo["author_ids"]
+                    ]
+                    changed[repo_name] = (repo, commits, source)
+                else:
+                    records[repo_name] = record
+            # 整个学期有变化的commit一次性分类message
+            message_stats = classify_commit_messages(
+                [commit for _, commits, _ in changed.values() for commit in commits],
+                self.commit_stats_cache_path,
+            )
+            for repo_name, (repo, commits, source) in changed.items():
+                records[repo_name] = self._rollup_repo(repo, commits, source, message_stats)
+                changed_shards.add((semestar, repo_name))
+            rollups[semestar] = [records[repo_name] for repo_name in repo_names]
+        # 有学期已不在过滤结果中时整体保存，删除其分片，图表不再使用过期的学期数据
+        removed = set(self.tmp_data.get("commit_rollup") or {}) - set(rollups)
+        self.tmp_data["commit_rollup"] = rollups
+        self._save_stage("commit_rollup", None if removed else changed_shards)
+        self._log(f"提交数据预聚合完成，重新聚合了 {len(changed_shards)} 个仓库。")
+
+    def _rollup_repo(self, repo, commits, source, message_stats):
+        rollup = CommitRollup()
+        for commit in commits:
+            lang, length = message_stats[commit["commit_hash"]]
+            rollup.add(
+                repo["repo_name"],
+                repo["author_ids"][commit["author_email"]],
+                datetime.fromisoformat(commit["committed_datetime"]).timestamp(),
+                commit.get("insertions", 0),
+                commit.get("deletions", 0),
+                lang,
+                length,
+            )
+        return {
+            "repo_name": repo["repo_name"],
+            "group_name": repo["group_name"],
+            "group_member_ids": repo["group_member_ids"],
+            "code_line_data": repo["code_line_data"],
+            "source": source,
+            **rollup.records(repo["repo_name"]),
+        }
+
+    # ========== 6. 图表数据生成 ===========
     def generate_chart_data(self):
         """
-        生成所有图表所需数据，存入chart_data.json
+        由 tmp_data['commit_rollup'] 分组求和生成所有图表所需数据，存入chart_data.json
         """
         self._log("开始生成图表数据...")
-        chart_data = {}
+        # 只处理部分学期时，其他学期沿用上次的图表数据
+        chart_data = {
+            semestar: data
+            for semestar, data in self.chart_data.items()
+            if self.SEMESTARS and semestar not in self.SEMESTARS
+        }
         # 以学期为单位
-        for semestar, repos in self.tmp_data.get("filtered_local_data", {}).items():
+        for semestar, repos in self.tmp_data.get("commit_rollup", {}).items():
+            rollup = CommitRollup()
+            for repo in repos:
+                rollup.add_records(repo["repo_name"], repo)
             # 1. commit时间分布（日）
-            all_commits = []
-            [all_commits.extend(repo["commits"]) for repo in repos]
-            date_list = []
-            for commit in all_commits:
-                dt = datetime.fromisoformat(commit["committed_datetime"])
-                dt_china = dt.astimezone(self.china_tz)
-                date_str = dt_china.date().isoformat()
-                date_list.append(date_str)
-            commit_counter = Counter(date_list)
-            if date_list:
-                start_date = datetime.fromisoformat(min(date_list))
-                end_date = datetime.fromisoformat(max(date_list))
-                full_dates = []
-                counts = []
-                current = start_date
-                while current <= end_date:
-                    date_str = current.date().isoformat()
-                    full_dates.append(date_str)
-                    counts.append(commit_counter.get(date_str, 0))
-                    current += timedelta(days=1)
+            day_totals = rollup.totals("day")
+            if day_totals:
+                days = range(min(day_totals), max(day_totals) + 1)
+                full_dates = [day_to_date(day) for day in days]
+                counts = [day_totals[day][0] if day in day_totals else 0 for day in days]
             else:
                 full_dates, counts = [], []
             chart_data.setdefault(semestar, {})["commit_time_distribution_date"] = {
@@ -896,22 +2110,20 @@ class GithubClassroomSpider:
                 "counts": counts,
             }
             # 2. commit时间分布（小时）
-            hour_list = []
-            for commit in all_commits:
-                dt = datetime.fromisoformat(commit["committed_datetime"])
-                dt_china = dt.astimezone(self.china_tz)
-                hour = dt_china.hour
-                hour_list.append(hour)
-            commit_counter_hour = Counter(hour_list)
             full_hours = list(range(24))
-            hour_counts = [commit_counter_hour.get(h, 0) for h in full_hours]
+            hour_totals = rollup.totals("hour")
+            hour_counts = [hour_totals[hour][0] if hour in hour_totals else 0 for hour in full_hours]
             chart_data[semestar]["commit_time_distribution_hourly"] = {
                 "hours": full_hours,
                 "counts": hour_counts,
             }
             # 3. 每组commit数
             group_names = [repo["group_name"] for repo in repos]
-            commit_counts = [len(repo["commits"]) for repo in repos]
+            team_totals = rollup.totals("team")
+            commit_counts = [
+                team_totals[repo["repo_name"]][0] if repo["repo_name"] in team_totals else 0
+                for repo in repos
+            ]
             avg_commit_count = (
                 round(sum(commit_counts) / len(commit_counts), 2)
                 if commit_counts
@@ -1021,41 +2233,21 @@ class GithubClassroomSpider:
             chart_data[semestar]["active_contributor_pie_chart"] = pie_chart_data
 
             # 10. 贡献差异（Gini系数）
-            def gini_coefficient(values):
-                values = sorted(values)
-                n = len(values)
-                if n == 0:
-                    return 0
-                total = sum(values)
-                if total == 0:
-                    return 0
-                cumulative = 0
-                for i, value in enumerate(values):
-                    cumulative += (i + 1) * value
-                return (2 * cumulative) / (n * total) - (n + 1) / n
-
+            people_per_team = defaultdict(dict)
+            for (team, author), totals in rollup.totals("team", "author").items():
+                people_per_team[team][author] = totals
             group_names_gini = []
             group_gini_commit = []
             group_gini_change_lines = []
             for repo in repos:
-                commit_count_per_people = {id: 0 for id in repo["group_member_ids"]}
-                change_lines_per_people = {id: 0 for id in repo["group_member_ids"]}
-                for commit in repo["commits"]:
-                    author_id = commit.get("author_id")
-                    if author_id not in commit_count_per_people:
-                        commit_count_per_people[author_id] = 0
-                        change_lines_per_people[author_id] = 0
-                    commit_count_per_people[author_id] += 1
-                    change_lines_per_people[author_id] += commit.get(
-                        "insertions", 0
-                    ) + commit.get("deletions", 0)
-                commit_counts = list(commit_count_per_people.values())
-                add_lines = list(change_lines_per_people.values())
-                gini_commit = gini_coefficient(commit_counts)
-                gini_add_lines = gini_coefficient(add_lines)
+                # 没有commit的成员也计入，记为0
+                people = {member_id: [0, 0, 0] for member_id in repo["group_member_ids"]}
+                people.update(people_per_team[repo["repo_name"]])
                 group_names_gini.append(repo["group_name"])
-                group_gini_commit.append(gini_commit)
-                group_gini_change_lines.append(gini_add_lines)
+                group_gini_commit.append(gini_coefficient([c for c, _, _ in people.values()]))
+                group_gini_change_lines.append(
+                    gini_coefficient([i + d for _, i, d in people.values()])
+                )
             chart_data[semestar]["contribution_difference"] = {
                 "group_names": group_names_gini,
                 "gini_commit": group_gini_commit,
@@ -1063,134 +2255,185 @@ class GithubClassroomSpider:
             }
 
             # 11. commit message信息统计
-            def classify_message(message):
-                chinese_chars = re.findall(r"[\u4e00-\u9fff]", message)
-                english_words = re.findall(r"\b[a-zA-Z]+\b", message)
-                chinese_count = len(chinese_chars)
-                english_count = len(english_words)
-                total_count = chinese_count + english_count
-                if total_count == 0:
-                    return "mixed", 0
-                if (
-                    chinese_count >= 0.4 * total_count
-                    and english_count >= 0.4 * total_count
-                ):
-                    lang = "mixed"
-                elif chinese_count > english_count:
-                    lang = "chinese"
-                elif english_count > chinese_count:
-                    lang = "english"
-                else:
-                    lang = "mixed"
-                return lang, total_count
-
-            def get_length_distribution(lengths, bin_width=5):
-                if not lengths:
-                    return []
-                min_len = min(lengths)
-                max_len = max(lengths)
-                num_bins = math.ceil((max_len - min_len + 1) / bin_width)
-                bins = [0] * num_bins
-                for length in lengths:
-                    index = min((length - min_len) // bin_width, num_bins - 1)
-                    bins[index] += 1
-                distribution = []
-                for i, count in enumerate(bins):
-                    range_start = min_len + i * bin_width
-                    range_end = range_start + bin_width - 1
-                    distribution.append(
-                        {"length_range": f"{range_start}–{range_end}", "count": count}
-                    )
-                return distribution
-
-            lang_counter = {"chinese": 0, "english": 0, "mixed": 0}
-            lengths = []
-            for repo in repos:
-                for commit in repo["commits"]:
-                    lang, length = classify_message(commit.get("message", ""))
-                    if lang in lang_counter:
-                        lang_counter[lang] += 1
-                    if length <= 100:
-                        lengths.append(length)
-            distribution = get_length_distribution(lengths)
+            lang_totals = rollup.message_totals("lang")
+            lang_counter = {lang: lang_totals[lang] for lang in MESSAGE_LANGS}
+            distribution = get_length_distribution(
+                {
+                    length: count
+                    for length, count in rollup.message_totals("length").items()
+                    if length <= 100
+                }
+            )
             chart_data[semestar]["commit_message_info"] = {
                 "lang_counter": lang_counter,
                 "length_distribution": distribution,
             }
         self.chart_data = chart_data
-        self._save_json(self.chart_data_path, self.chart_data)
+        self._save_chart_data()
         self._log("图表数据生成完成。")
 
-    # ========== 6. 保存所有数据 ===========
+    # ========== 7. 保存所有数据 ===========
     def save_all(self):
-        self._save_json(self.tmp_path, self.tmp_data)
-        self._save_json(self.chart_data_path, self.chart_data)
+        # 各阶段结束时已写回自己改动的分片，这里只保存赋值后还没有写回的阶段
+        for key in sorted(self.tmp_data.unsaved):
+            self._save_stage(key)
+        self._save_chart_data()
         self._log("所有数据已保存。")
 
+    def _stage_fingerprint(self, key):
+        # chart_data 单独存放在 chart_data.json（及拆分输出的 manifest），其余为 tmp_data 中的阶段数据
+        if key == "chart_data":
+            fingerprints = [self.stage_store.file_fingerprint(self.chart_data_path)]
+            if self.chart_split_dir:
+                fingerprints.append(
+                    self.stage_store.file_fingerprint(os.path.join(self.chart_split_dir, MANIFEST_FILE))
+                )
+            return None if None in fingerprints else ":".join(fingerprints)
+        return self.stage_store.fingerprint(key)
+
+    def pipeline_stages(self):
+        """
+        auto_run 的全部阶段及其读写的 tmp_data 键（chart_data 指 chart_data.json），按依赖顺序声明。
+        external 阶段还读取 GitHub API 或本地仓库，每次都运行；
+        远程PR/Issue/分支只依赖仓库目录列表，可以与本地扫描、提交作者爬取并发执行。
+        """
+        stage_keys = [
+            "classroom_members", "group_members", "full_group_info", "local_data", "local_watermarks",
+            "commit_authors", "filtered_local_data", "commit_rollup", "pr", "issues", "branches",
+        ]
+        return [
+            {
+                "name": "get_classroom_members",
+                "title": "步骤 1: 获取 GitHub Classroom 成员信息",
+                "func": self.get_classroom_members,
+                "inputs": [],
+                "outputs": ["classroom_members"],
+                "external": True,
+            },
+            {
+                "name": "get_accepted_assignments",
+                "title": "步骤 2: 获取作业的小组成员信息",
+                "func": self.get_accepted_assignments,
+                "inputs": [],
+                "outputs": ["group_members", "full_group_info"],
+                "external": True,
+            },
+            {
+                "name": "join_classroom_members_with_group_members",
+                "title": "步骤 3: 关联小组成员与 classroom 成员",
+                "func": self.join_classroom_members_with_group_members,
+                "inputs": ["classroom_members", "group_members"],
+                "outputs": ["group_members"],
+            },
+            {
+                "name": "gather_data_from_local_repos",
+                "title": "步骤 4: 收集本地仓库数据",
+                "func": self.gather_data_from_local_repos,
+                # 扫描时过滤需要小组成员和已知的提交作者
+                "inputs": ["local_data", "local_watermarks"]
+                + (["group_members", "commit_authors"] if self.FILTER_DURING_SCAN else []),
+                "outputs": ["local_data", "local_watermarks"],
+                "external": True,
+            },
+            {
+                "name": "fetch_commit_authors",
+                "title": "步骤 5: 获取远程提交作者信息",
+                "func": self.fetch_commit_authors,
+                "inputs": ["local_data"],
+                "outputs": ["commit_authors"],
+                # 上次失败的作者查询保存在 FetchCheckpoint 中，每次运行都要重试
+                "external": True,
+            },
+            {
+                "name": "filter_commits_by_classroom_user",
+                "title": "步骤 6: 过滤提交信息",
+                "func": self.filter_commits_by_classroom_user,
+                "inputs": ["local_data", "commit_authors", "group_members"],
+                "outputs": ["filtered_local_data"],
+            },
+            {
+                "name": "build_commit_rollup",
+                "title": "步骤 7: 预聚合提交数据",
+                "func": self.build_commit_rollup,
+                "inputs": ["filtered_local_data", "local_data", "commit_rollup"],
+                "outputs": ["commit_rollup"],
+            },
+            {
+                # 合并为每个仓库一个查询
+                "name": "fetch_repo_activity",
+                "title": "步骤 8: 获取远程 PR/Issue/分支信息",
+                "func": self.fetch_repo_activity,
+                "inputs": [],
+                "outputs": ["pr", "issues", "branches"],
+                "external": True,
+            },
+            {
+                "name": "generate_chart_data",
+                "title": "步骤 9: 生成图表数据",
+                "func": self.generate_chart_data,
+                "inputs": ["commit_rollup", "pr", "issues", "branches"],
+                "outputs": ["chart_data"],
+            },
+            {
+                "name": "save_all",
+                "title": "步骤 10: 保存所有数据",
+                "func": self.save_all,
+                "inputs": stage_keys + ["chart_data"],
+                "outputs": stage_keys + ["chart_data"],
+            },
+        ]
+
     def auto_run(self):
         """
         一键自动完成所有数据爬取、过滤、图表生成和保存。
-        正确的调用顺序：
+        各阶段及其依赖见 pipeline_stages，AUTO_RUN_STAGES 选择要运行的阶段：
         1. 获取 GitHub Classroom 成员信息
         2. 获取作业的小组成员信息
         3. 关联小组成员与 classroom 成员
         4. 收集本地仓库数据
         5. 获取远程提交作者信息
         6. 过滤提交信息
-        7. 获取远程 PR/Issue/分支信息
-        8. 生成图表数据
-        9. 保存所有数据
+        7. 预聚合提交数据（只重新聚合有变化的仓库）
+        8. 获取远程 PR/Issue/分支信息
+        9. 由预聚合数据生成图表数据
+        10. 保存所有数据
+        互不依赖的阶段并发执行（如步骤8与步骤4-7），输入未变化的阶段跳过（SKIP_UNCHANGED_STAGES）。
+        每个阶段的耗时与开销写入 RUN_REPORT_PATH，结束时输出汇总表
         """
         self._log("======= 一键自动开始全流程 =======")
-        
-        # 1. 获取 GitHub Classroom 成员信息
-        self._log("步骤 1: 获取 GitHub Classroom 成员信息")
-        # self.get_classroom_members()
-        
-        # 2. 获取作业的小组成员信息
-        self._log("步骤 2: 获取作业的小组成员信息")
-        # self.get_accepted_assignments()
-        
-        # 3. 关联小组成员与 classroom 成员
-        self._log("步骤 3: 关联小组成员与 classroom 成员")
-        # self.join_classroom_members_with_group_members()
-        
-        # 4. 收集本地仓库数据
-        self._log("步骤 4: 收集本地仓库数据")
-        # self.gather_data_from_local_repos()
-        
-        # 5. 获取远程提交作者信息
-        self._log("步骤 5: 获取远程提交作者信息")
-        self.fetch_commit_authors()
-        
-        # 6. 过滤提交信息
-        self._log("步骤 6: 过滤提交信息")
-        self.filter_commits_by_classroom_user()
-        
-        # 7. 获取远程 PR/Issue/分支信息
-        self._log("步骤 7: 获取远程 PR 信息")
-        self.fetch_prs()
-        
-        self._log("步骤 8: 获取远程 Issue 信息")
-        self.fetch_issues()
-        
-        self._log("步骤 9: 获取远程分支信息")
-        self.fetch_branches()
-        
-        # 8. 生成图表数据
-        self._log("步骤 10: 生成图表数据")
-        self.generate_chart_data()
-        
-        # 9. 保存所有数据
-        self._log("步骤 11: 保存所有数据")
-        self.save_all()
-        
+        self.report.begin(
+            path=self.RUN_REPORT_PATH, profile=self.PROFILE_STAGES, script="github_classroom_spider"
+        )
+        scheduler = StageScheduler(
+            self.pipeline_stages(),
+            self._stage_fingerprint,
+            self.stage_runs_path,
+            report=self.report,
+            max_workers=self.AUTO_RUN_WORKERS,
+            skip_unchanged=self.SKIP_UNCHANGED_STAGES,
+            log=self._log,
+        )
+        try:
+            status = scheduler.run(self.AUTO_RUN_STAGES)
+        finally:
+            self.report.finish()
+        skipped = [name for name, result in status.items() if result == "skipped"]
+        if skipped:
+            self._log(f"输入未变化而跳过的阶段: {', '.join(skipped)}")
         self._log("======= 全流程自动完成 =======")
 
 
 # ========== 用法示例 ===========
 if __name__ == "__main__":
-    spider = GithubClassroomSpider()
+    parser = argparse.ArgumentParser(description="爬取 GitHub Classroom 小组项目数据并生成图表数据")
+    parser.add_argument(
+        "--semestars",
+        nargs="+",
+        choices=sorted(CONFIG["semestar_range"]),
+        help="只处理这些学期，其他学期的中间数据和图表数据保持不变（默认处理全部学期）",
+    )
+    args = parser.parse_args()
+    spider = GithubClassroomSpider(semestars=args.semestars)
     spider.auto_run()
     # spider.get_project_assignment_id()
     # spider.get_accepted_assignments()
@@ -1198,4 +2441,5 @@ if __name__ == "__main__":
     # spider.filter_commits_by_classroom_user()
     # spider.gather_data_from_local_repos()
     # spider.filter_commits_by_classroom_user()
+    # spider.build_commit_rollup()
     # spider.generate_chart_data()
@@ -0,0 +1,181 @@
+import threading
+import time
+from datetime import datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+
+class GitHubSession:
+    """
+    爬虫所有线程共享的 GitHub HTTP 客户端：
+    - 复用同一个连接池，避免每个请求重新建立TLS连接
+    - 用信号量限制同时在途的请求数，减少触发二级限流
+    - 5xx、网络错误、二级限流按指数退避重试
+    - 根据 REST 的 X-RateLimit-* 响应头和 GraphQL 的 rateLimit 字段记录剩余额度，
+      额度快用完时主动等待到重置时间，而不是等到请求失败
+    - 传入 report（RunReport）时统计请求数、响应字节数、重试次数、限流等待时间和GraphQL cost
+    - 传入 cassette（http_cassette.Cassette）时录制每个最终响应，或只从录制的响应回放、不访问网络
+    """
+
+    RETRY_STATUS = {500, 502, 503, 504}
+    RATE_LIMIT_FIELDS = "rateLimit { cost remaining resetAt }"
+
+    def __init__(self, max_concurrency=8, max_retries=5, reserve=50, log=print, report=None, cassette=None):
+        self.max_retries = max_retries
+        self.reserve = reserve  # 剩余额度低于该值时暂停，留给其他脚本/手动操作
+        self.log = log
+        self.report = report
+        self.cassette = cassette
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max_concurrency)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._lock = threading.Lock()
+        self._remaining = {}  # 额度类别(core/graphql/...) -> (剩余额度, 重置时间戳)
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def graphql(self, url, query, variables, headers=None, timeout=15):
+        """
+        执行GraphQL查询并返回解析后的JSON。查询中会自动加入 rateLimit 字段用于主动限流，
+        被 GraphQL 以 RATE_LIMITED 错误拒绝时等待重置后重试。
+        """
+        if "rateLimit" not in query:
+            # 在操作的最外层选择集开头加入 rateLimit
+            brace = query.index("{")
+            query = f"{query[:brace + 1]}\n{self.RATE_LIMIT_FIELDS}{query[brace + 1:]}"
+        for attempt in range(self.max_retries + 1):
+            response = self.post(
+                url, json={"query": query, "variables": variables}, headers=headers, timeout=timeout
+            )
+            if response.status_code != 200:
+                raise Exception(f"GraphQL query failed: {response.status_code}\n{response.text}")
+            result = response.json()
+            rate_limit = (result.get("data") or {}).get("rateLimit")
+            if rate_limit:
+                self._count("graphql_cost", rate_limit["cost"])
+                reset_at = datetime.fromisoformat(rate_limit["resetAt"].replace("Z", "+00:00"))
+                self._update_remaining("graphql", rate_limit["remaining"], reset_at.timestamp())
+            errors = result.get("errors") or []
+            if attempt < self.max_retries and any(e.get("type") == "RATE_LIMITED" for e in errors):
+                self._count("http_retries")
+                self._wait_for_reset("graphql", force=True)
+                continue
+            return result
+        return result
+
+    def request(self, method, url, **kwargs):
+        if self.cassette is None:
+            return self._send(method, url, **kwargs)
+        # 以实际发出的URL（含查询参数）和请求体作为录制的键
+        prepared = requests.Request(
+            method, url, params=kwargs.get("params"), json=kwargs.get("json"), data=kwargs.get("data")
+        ).prepare()
+        if self.cassette.replaying:
+            self._count("http_replayed")
+            return self._replayed(prepared.url, *self.cassette.replay(method, prepared.url, prepared.body))
+        response = self._send(method, url, **kwargs)
+        # 重试耗尽的服务端错误和限流响应不录制
+        if response.status_code < 500 and response.status_code not in (403, 429):
+            self.cassette.record(
+                method, prepared.url, prepared.body, response.status_code, response.headers.items(), response.content
+            )
+        return response
+
+    def _replayed(self, url, status, headers, content):
+        response = requests.Response()
+        response.status_code = status
+        response.headers = CaseInsensitiveDict(headers)
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.url = url
+        response._content = content
+        return response
+
+    def _send(self, method, url, **kwargs):
+        response = None
+        for attempt in range(self.max_retries + 1):
+            self._wait_for_reset(self._resource_for(url))
+            self._count("http_requests")
+            try:
+                with self._slots:
+                    response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as error:
+                if attempt == self.max_retries:
+                    raise
+                self._backoff(attempt, f"请求失败 ({error})")
+                continue
+            self._count("http_bytes", len(response.content))
+            self._update_from_headers(response.headers)
+            if attempt == self.max_retries:
+                return response
+            if response.status_code in (403, 429):
+                retry_after = response.headers.get("Retry-After")
+                if retry_after:
+                    # 二级限流：按服务端给出的时间等待
+                    self.log(f"触发二级限流，等待 {retry_after}s 后重试")
+                    self._count("http_retries")
+                    self._sleep_for_rate_limit(int(retry_after))
+                    continue
+                if response.headers.get("X-RateLimit-Remaining") == "0":
+                    self._count("http_retries")
+                    self._wait_for_reset(response.headers.get("X-RateLimit-Resource", "core"), force=True)
+                    continue
+            if response.status_code in self.RETRY_STATUS:
+                self._backoff(attempt, f"服务端错误 {response.status_code}")
+                continue
+            return response
+        return response
+
+    def _resource_for(self, url):
+        return "graphql" if url.rstrip("/").endswith("/graphql") else "core"
+
+    def _count(self, metric, value=1):
+        if self.report is not None:
+            self.report.count(metric, value)
+
+    def _sleep_for_rate_limit(self, seconds):
+        self._count("rate_limit_sleep_seconds", seconds)
+        time.sleep(seconds)
+
+    def _backoff(self, attempt, reason):
+        self._count("http_retries")
+        wait_seconds = 2**attempt
+        self.log(f"{reason}，{wait_seconds}s 后重试")
+        time.sleep(wait_seconds)
+
+    def _update_from_headers(self, headers):
+        remaining = headers.get("X-RateLimit-Remaining")
+        reset_at = headers.get("X-RateLimit-Reset")
+        if remaining is None or reset_at is None:
+            return
+        resource = headers.get("X-RateLimit-Resource", "core")
+        self._update_remaining(resource, int(remaining), int(reset_at))
+
+    def _update_remaining(self, resource, remaining, reset_at):
+        with self._lock:
+            self._remaining[resource] = (remaining, reset_at)
+
+    def _wait_for_reset(self, resource, force=False):
+        with self._lock:
+            remaining, reset_at = self._remaining.get(resource, (None, 0))
+        if not force and (remaining is None or remaining > self.reserve):
+            return
+        wait_seconds = reset_at - time.time() + 5
+        if wait_seconds <= 0:
+            if not force:
+                return
+            wait_seconds = 60  # 不知道重置时间时，按 GitHub 的建议至少等待一分钟
+        self.log(f"{resource} 额度剩余 {remaining}，等待 {int(wait_seconds)}s 至额度重置")
+        self._sleep_for_rate_limit(wait_seconds)
+        with self._lock:
+            # 重置后额度未知，等下一个响应更新
+            if self._remaining.get(resource, (None, 0))[1] == reset_at:
+                self._remaining.pop(resource, None)
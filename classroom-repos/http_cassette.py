@@ -0,0 +1,110 @@
+import email.message
+import hashlib
+import json
+import sqlite3
+import threading
+from datetime import datetime, timezone
+
+MODES = ("record", "replay")
+
+
+class CassetteMiss(Exception):
+    """回放模式下请求没有录制过"""
+
+
+class Cassette:
+    """
+    HTTP 请求/响应的录制与回放（SQLite），两个采集脚本共用：
+    - 请求按 方法 + 完整URL（含查询参数）+ 请求体 的摘要索引，GraphQL 请求体先按键排序再计算，
+      同一查询不论在哪个线程、以什么顺序发出都对应同一条记录；请求头（含token）不会保存
+    - 响应保存状态码、全部响应头（Link 分页、ETag、X-RateLimit-* 等）和响应体
+    - record: 照常请求 GitHub，并保存（覆盖）每个最终响应
+    - replay: 打开时把全部记录读入内存，请求只从内存返回，不访问网络；没有录制过的请求抛出 CassetteMiss
+    """
+
+    def __init__(self, path, mode):
+        if mode not in MODES:
+            raise ValueError(f"cassette mode must be one of {MODES}, got {mode!r}")
+        self.path = path
+        self.mode = mode
+        self._lock = threading.Lock()
+        self.connection = sqlite3.connect(path, timeout=60, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, method TEXT NOT NULL, url TEXT NOT NULL, status INTEGER NOT NULL, "
+            "headers TEXT NOT NULL, body BLOB NOT NULL, recorded_at TEXT NOT NULL)"
+        )
+        self._responses = {}
+        if mode == "replay":
+            rows = self.connection.execute("SELECT key, status, headers, body FROM responses")
+            self._responses = {
+                key: (status, json.loads(headers), bytes(body)) for key, status, headers, body in rows
+            }
+
+    @property
+    def replaying(self):
+        return self.mode == "replay"
+
+    @staticmethod
+    def key(method, url, body=None):
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(f"{method.upper()} {url}\n".encode("utf-8"))
+        if body:
+            if isinstance(body, str):
+                body = body.encode("utf-8")
+            try:
+                # JSON请求体（GraphQL）与键的顺序无关
+                body = json.dumps(json.loads(body), sort_keys=True, ensure_ascii=False).encode("utf-8")
+            except ValueError:
+                pass
+            digest.update(body)
+        return digest.hexdigest()
+
+    def replay(self, method, url, body=None):
+        """返回录制的 (状态码, 响应头[(名称, 值)], 响应体bytes)"""
+        response = self._responses.get(self.key(method, url, body))
+        if response is None:
+            raise CassetteMiss(f"{method.upper()} {url} was not recorded in {self.path}")
+        return response
+
+    def record(self, method, url, body, status, headers, content):
+        with self._lock, self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO responses (key, method, url, status, headers, body, recorded_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    self.key(method, url, body),
+                    method.upper(),
+                    url,
+                    status,
+                    json.dumps(list(headers), ensure_ascii=False),
+                    content,
+                    datetime.now(timezone.utc).isoformat(),
+                ),
+            )
+
+    def close(self):
+        with self._lock:
+            self.connection.close()
+
+
+class ReplayedResponse:
+    """回放的响应，提供 urllib 响应对象中采集脚本用到的部分：status、headers、read() 和 with 语句"""
+
+    def __init__(self, url, status, headers, content):
+        self.url = url
+        self.status = status
+        self.headers = email.message.Message()
+        for name, value in headers:
+            self.headers[name] = value
+        self._content = content
+
+    def read(self):
+        return self._content
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
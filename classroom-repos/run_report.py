@@ -0,0 +1,266 @@
+import contextlib
+import contextvars
+import cProfile
+import functools
+import json
+import os
+import re
+import resource
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime
+
+try:
+    from pyinstrument import Profiler
+except ImportError:
+    Profiler = None
+
+# 各阶段/仓库统计的开销指标
+METRICS = (
+    "git_processes",  # 启动的git子进程数
+    "http_requests",  # 发出的HTTP请求数（含重试）
+    "http_replayed",  # 从录制的响应回放、未访问网络的请求数
+    "http_bytes",  # 收到的响应体字节数
+    "http_retries",  # 重试次数（5xx、网络错误、限流）
+    "rate_limit_sleep_seconds",  # 因限流等待的秒数
+    "graphql_cost",  # GraphQL rateLimit.cost 之和
+)
+
+
+def _children_cpu():
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+class RunReport:
+    """
+    一次运行的结构化性能报告，按 阶段 和 阶段内的仓库 统计耗时与开销：
+    - stage(name): 统计一个阶段的墙钟时间、运行该阶段的线程的CPU时间(cpu_seconds)和各项指标；
+      process_cpu_seconds 与 children_cpu_seconds（已结束子进程：git、进程池）是整个进程在该阶段期间的CPU时间，
+      阶段并发运行时会互相包含，run_end 中这两项和墙钟时间取整次运行的差值，不按阶段求和
+    - repo(name) / per_repo: 在阶段内统计单个仓库，计数通过 contextvars 归属到当前仓库和所在阶段；
+      提交到线程池的函数用 bind() 包装以保留归属，没有上下文的计数只计入 unscoped，不归属任何阶段
+    - 每条记录以JSON行追加写入 path（设为 None 不写文件），finish() 输出汇总表
+    - profile 为 "cprofile" 或 "pyinstrument" 时，每个阶段生成一份剖析文件到 profile_dir，
+      两者都只剖析调用阶段的线程，线程池内的工作需关闭多线程后才能看到
+    """
+
+    def __init__(self, path=None, profile=None, profile_dir="profiles", log=print):
+        self.path = path
+        self.profile = profile
+        self.profile_dir = profile_dir
+        self.log = log
+        self.run_id = self._new_run_id()
+        self.stages = []  # 已结束阶段的记录
+        self.repos = []  # 已结束仓库的记录
+        self._lock = threading.Lock()
+        self._scopes = contextvars.ContextVar(f"run_report_scopes_{id(self)}", default=())
+        self.unscoped = Counter()  # 没有阶段/仓库上下文的计数
+        self._start = self._clock()
+        self._profiling = False
+
+    def begin(self, path=None, profile=None, **info):
+        """开始新的一次运行，info 会写入 run_start 记录"""
+        self.path = path if path is not None else self.path
+        self.profile = profile if profile is not None else self.profile
+        self.run_id = self._new_run_id()
+        self.stages = []
+        self.repos = []
+        self.unscoped = Counter()
+        self._start = self._clock()
+        self._emit({"type": "run_start", **info})
+
+    def count(self, metric, value=1):
+        scopes = self._scopes.get()
+        with self._lock:
+            if not scopes:
+                self.unscoped[metric] += value
+            for _, _, counter in scopes:
+                counter[metric] += value
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        counter = Counter()
+        scope = ("stage", name, counter)
+        token = self._scopes.set(self._scopes.get() + (scope,))
+        profiler = self._start_profiler()
+        start = self._clock()
+        start_thread_cpu = time.thread_time()
+        try:
+            yield counter
+        finally:
+            thread_cpu = time.thread_time() - start_thread_cpu
+            wall, process_cpu, children_cpu = (end - begin for end, begin in zip(self._clock(), start))
+            self._stop_profiler(profiler, name)
+            self._scopes.reset(token)
+            record = {
+                "type": "stage",
+                "stage": name,
+                "wall_seconds": round(wall, 3),
+                "cpu_seconds": round(thread_cpu, 3),
+                "process_cpu_seconds": round(process_cpu, 3),
+                "children_cpu_seconds": round(children_cpu, 3),
+                **self._metrics(counter),
+            }
+            self.stages.append(record)
+            self._emit(record)
+
+    @contextlib.contextmanager
+    def repo(self, name):
+        counter = Counter()
+        parents = self._scopes.get()
+        token = self._scopes.set(parents + (("repo", name, counter),))
+        start = time.perf_counter()
+        try:
+            yield counter
+        finally:
+            self._scopes.reset(token)
+            self._record_repo(parents, name, {"wall_seconds": round(time.perf_counter() - start, 3)}, counter)
+
+    def per_repo(self, func):
+        """装饰器：以第一个参数为仓库名，在 repo() 中执行 func"""
+
+        @functools.wraps(func)
+        def wrapper(repo_name, *args, **kwargs):
+            with self.repo(repo_name):
+                return func(repo_name, *args, **kwargs)
+
+        return wrapper
+
+    def bind(self, func):
+        """返回在当前阶段/仓库归属下执行 func 的函数，用于提交到线程池"""
+        scopes = self._scopes.get()
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            token = self._scopes.set(scopes)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self._scopes.reset(token)
+
+        return wrapper
+
+    def record_repo(self, name, **fields):
+        """记录在别处（如子进程）测得的仓库指标，METRICS 中的字段同时计入所在阶段"""
+        parents = self._scopes.get()
+        counter = Counter({k: v for k, v in fields.items() if k in METRICS})
+        with self._lock:
+            if not parents:
+                self.unscoped.update(counter)
+            for _, _, parent in parents:
+                parent.update(counter)
+        self._record_repo(parents, name, {k: v for k, v in fields.items() if k not in METRICS}, counter)
+
+    def _record_repo(self, parents, name, fields, counter):
+        stage = next((n for kind, n, _ in reversed(parents) if kind == "stage"), None)
+        record = {"type": "repo", "stage": stage, "repo": name, **fields, **self._metrics(counter)}
+        with self._lock:
+            self.repos.append(record)
+        self._emit(record)
+
+    def finish(self, top_repos=5):
+        """写入 run_end 汇总记录（含 unscoped 计数）并输出汇总表"""
+        totals = Counter()
+        for record in self.stages:
+            totals.update({k: record[k] for k in ("cpu_seconds", *METRICS)})
+        totals.update(self.unscoped)
+        wall, process_cpu, children_cpu = (end - begin for end, begin in zip(self._clock(), self._start))
+        totals.update(wall_seconds=wall, process_cpu_seconds=process_cpu, children_cpu_seconds=children_cpu)
+        if self.unscoped:
+            self._emit({"type": "unscoped", **self._metrics(self.unscoped)})
+        self._emit({"type": "run_end", **{k: round(v, 3) for k, v in totals.items()}})
+        for line in self.summary_lines(top_repos):
+            self.log(line)
+
+    def summary_lines(self, top_repos=5):
+        headers = [
+            "stage", "wall(s)", "cpu(s)", "proc_cpu(s)", "child_cpu(s)",
+            "git", "http", "KB", "retries", "rl_sleep(s)", "gql_cost",
+        ]
+        records = list(self.stages)
+        if self.unscoped:
+            zero = {"wall_seconds": 0, "cpu_seconds": 0, "process_cpu_seconds": 0, "children_cpu_seconds": 0}
+            records.append({"stage": "(unscoped)", **zero, **self._metrics(self.unscoped)})
+        rows = [
+            [
+                r["stage"], f"{r['wall_seconds']:.2f}", f"{r['cpu_seconds']:.2f}", f"{r['process_cpu_seconds']:.2f}",
+                f"{r['children_cpu_seconds']:.2f}", str(r["git_processes"]), str(r["http_requests"]),
+                f"{r['http_bytes'] / 1024:.0f}", str(r["http_retries"]), f"{r['rate_limit_sleep_seconds']:.1f}",
+                str(r["graphql_cost"]),
+            ]
+            for r in records
+        ]
+        widths = [max(len(row[i]) for row in rows + [headers]) for i in range(len(headers))]
+        lines = ["  ".join(cell.ljust(widths[i]) for i, cell in enumerate(row)) for row in [headers] + rows]
+        slowest = sorted(self.repos, key=lambda r: r.get("wall_seconds", 0), reverse=True)[:top_repos]
+        for r in slowest:
+            lines.append(
+                f"slow repo: {r['repo']} ({r['stage']}) {r.get('wall_seconds', 0):.2f}s, "
+                f"git {r['git_processes']}, http {r['http_requests']}, rl_sleep {r['rate_limit_sleep_seconds']:.1f}s"
+            )
+        return lines
+
+    def _clock(self):
+        # (墙钟时间, 本进程CPU时间, 已结束子进程CPU时间)
+        return time.perf_counter(), time.process_time(), _children_cpu()
+
+    def _new_run_id(self):
+        return f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+
+    def _metrics(self, counter):
+        metrics = {}
+        for metric in METRICS:
+            value = counter.get(metric, 0)
+            metrics[metric] = round(value, 3) if isinstance(value, float) else value
+        return metrics
+
+    def _emit(self, record):
+        if not self.path:
+            return
+        line = json.dumps(
+            {"run_id": self.run_id, "time": datetime.now().isoformat(timespec="seconds"), **record},
+            ensure_ascii=False,
+        )
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+    def _start_profiler(self):
+        if not self.profile:
+            return None
+        with self._lock:
+            if self._profiling:
+                return None  # 同一时间只剖析一个阶段，并发运行的其他阶段不生成剖析文件
+            self._profiling = True
+        if self.profile == "pyinstrument":
+            if Profiler is None:
+                self.log("pyinstrument is not installed, stage profiling skipped")
+                self._profiling = False
+                return None
+            profiler = Profiler()
+            profiler.start()
+        else:
+            profiler = cProfile.Profile()
+            profiler.enable()
+        return profiler
+
+    def _stop_profiler(self, profiler, name):
+        if profiler is None:
+            return
+        self._profiling = False
+        os.makedirs(self.profile_dir, exist_ok=True)
+        safe_name = re.sub(r"[^\w.-]+", "_", name)
+        file_name = f"{self.run_id}-{len(self.stages) + 1:02d}-{safe_name}"
+        if isinstance(profiler, cProfile.Profile):
+            profiler.disable()
+            path = os.path.join(self.profile_dir, f"{file_name}.prof")
+            profiler.dump_stats(path)
+        else:
+            profiler.stop()
+            path = os.path.join(self.profile_dir, f"{file_name}.html")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(profiler.output_html())
+        self.log(f"Profile of stage {name} written to {path}")
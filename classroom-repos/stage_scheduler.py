@@ -0,0 +1,125 @@
+import contextlib
+import json
+import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+
+
+class StageScheduler:
+    """
+    按各阶段声明的输入/输出调度 auto_run：
+    - 每个阶段是一个dict：name、title（开始时输出的日志）、func、inputs/outputs（读写的 tmp_data 键）、
+      external（是否还读取 tmp_data 之外的数据，如 GitHub API 和本地仓库）
+    - 声明顺序在前、且与之读写同一个键的阶段是它的前置阶段；前置阶段全部完成后立即在线程池中启动，
+      互不依赖的阶段（如网络密集的远程爬取与磁盘密集的本地扫描）并发执行
+    - 非 external 阶段的输入与上次成功运行时相同、且输出未被改动时直接跳过；
+      每个阶段成功后把输入/输出的指纹记录到 state_path
+    - 某个阶段失败时，依赖它的阶段不再运行，其余阶段照常完成，最后抛出第一个异常
+    """
+
+    def __init__(
+        self, stages, fingerprint, state_path, report=None, max_workers=4, skip_unchanged=True, log=print
+    ):
+        self.stages = stages
+        self.fingerprint = fingerprint  # tmp_data 键 -> 内容指纹，不存在时为 None
+        self.state_path = state_path
+        self.report = report
+        self.max_workers = max_workers
+        self.skip_unchanged = skip_unchanged
+        self.log = log
+
+    def dependencies(self, stages):
+        """每个阶段的前置阶段：声明在前，且写了它要读写的键、或读了它要写的键"""
+        deps = {}
+        for i, stage in enumerate(stages):
+            reads, writes = set(stage["inputs"]), set(stage["outputs"])
+            deps[stage["name"]] = [
+                before["name"]
+                for before in stages[:i]
+                if set(before["outputs"]) & (reads | writes) or set(before["inputs"]) & writes
+            ]
+        return deps
+
+    def run(self, names=None):
+        """运行 names 中的阶段（为 None 时运行全部），返回 {阶段名: done/skipped/failed/blocked}"""
+        stages = [s for s in self.stages if names is None or s["name"] in names]
+        deps = self.dependencies(stages)
+        state = self._load_state()
+        status = {}
+        errors = []
+        pending = {stage["name"]: stage for stage in stages}
+        running = {}
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        try:
+            while pending or running:
+                for name, stage in list(pending.items()):
+                    if any(status.get(d) in ("failed", "blocked") for d in deps[name]):
+                        del pending[name]
+                        status[name] = "blocked"
+                        self.log(f"阶段 {name} 的前置阶段失败，不再运行")
+                    elif all(status.get(d) in ("done", "skipped") for d in deps[name]):
+                        del pending[name]
+                        if self._unchanged(stage, state):
+                            status[name] = "skipped"
+                            self.log(f"{stage['title']}（输入未变化，跳过）")
+                        else:
+                            running[executor.submit(self._run_stage, stage)] = stage
+                if not running:
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage = running.pop(future)
+                    try:
+                        future.result()
+                    except Exception as e:
+                        status[stage["name"]] = "failed"
+                        errors.append(e)
+                        self.log(f"阶段 {stage['name']} 失败: {e}")
+                    else:
+                        status[stage["name"]] = "done"
+                        state[stage["name"]] = {
+                            **self._fingerprints(stage),
+                            "finished": datetime.now().isoformat(timespec="seconds"),
+                        }
+                        self._save_state(state)
+        except KeyboardInterrupt:
+            self.log("检测到中断，正在退出线程池...")
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+        executor.shutdown()
+        if errors:
+            raise errors[0]
+        return status
+
+    def _run_stage(self, stage):
+        self.log(stage["title"])
+        with self.report.stage(stage["name"]) if self.report else contextlib.nullcontext():
+            stage["func"]()
+
+    def _fingerprints(self, stage):
+        return {
+            "inputs": {key: self.fingerprint(key) for key in stage["inputs"]},
+            "outputs": {key: self.fingerprint(key) for key in stage["outputs"]},
+        }
+
+    def _unchanged(self, stage, state):
+        if not self.skip_unchanged or stage.get("external"):
+            return False
+        previous = state.get(stage["name"])
+        if not previous:
+            return False
+        current = self._fingerprints(stage)
+        return previous["inputs"] == current["inputs"] and previous["outputs"] == current["outputs"]
+
+    def _load_state(self):
+        if not os.path.exists(self.state_path):
+            return {}
+        with open(self.state_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _save_state(self, state):
+        os.makedirs(os.path.dirname(self.state_path) or ".", exist_ok=True)
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, self.state_path)
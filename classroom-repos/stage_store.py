@@ -0,0 +1,262 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+
+
+class StageStore:
+    """
+    按 阶段/学期/仓库 分片存储爬虫的中间数据，代替单个 tmp.json。
+    - 每个阶段(tmp_data 的顶层key)一个目录，目录下的 _index.json 记录分片方式与分片顺序
+    - 阶段只重写自己改动过的分片（内容未变的分片不会重写），读取时也只加载需要的阶段和学期
+    - 分片使用紧凑JSON，写入时先写临时文件再替换，中断不会留下半个文件
+
+    分片方式：
+    - whole: 整个值存为一个文件
+    - semestar: {学期: 值}，每个学期一个文件
+    - repo: {仓库名: 值}，每个仓库一个文件
+    - semestar_repo: {学期: [仓库记录, ...]}，每个学期一个目录、每个仓库一个文件，保留列表顺序
+    """
+
+    LAYOUTS = {
+        "classroom_members": "whole",
+        "group_members": "semestar",
+        "full_group_info": "semestar",
+        "local_watermarks": "semestar",
+        "local_data": "semestar_repo",
+        "filtered_local_data": "semestar_repo",
+        "pr": "repo",
+        "issues": "repo",
+        "branches": "repo",
+        "commit_authors": "repo",
+        "commit_rollup": "semestar_repo",
+    }
+    INDEX_FILE = "_index.json"
+
+    def __init__(self, root, legacy_path=None):
+        self.root = root
+        self.semestars = None  # 不为 None 时，只加载这些学期的分片
+        self._digests = {}  # 文件路径 -> ((大小, 修改时间), 内容摘要)，避免重复读取未改动的分片
+        if legacy_path and os.path.exists(legacy_path) and not os.path.isdir(root):
+            # 从旧版单文件 tmp.json 迁移
+            with open(legacy_path, "r", encoding="utf-8") as f:
+                legacy = json.load(f)
+            for key, value in legacy.items():
+                self.save(key, value)
+
+    def layout(self, key):
+        return self.LAYOUTS.get(key, "whole")
+
+    def keys(self):
+        if not os.path.isdir(self.root):
+            return []
+        return [
+            key
+            for key in sorted(os.listdir(self.root))
+            if os.path.exists(os.path.join(self.root, key, self.INDEX_FILE))
+        ]
+
+    def __contains__(self, key):
+        return os.path.exists(os.path.join(self.root, key, self.INDEX_FILE))
+
+    def load(self, key):
+        """读取一个阶段的数据，不存在时返回 None"""
+        key_dir = os.path.join(self.root, key)
+        index = self._read(os.path.join(key_dir, self.INDEX_FILE))
+        if index is None:
+            return None
+        layout = index["layout"]
+        if layout == "whole":
+            return self._read(os.path.join(key_dir, "data.json"))
+        if layout == "repo":
+            return {
+                name: self._read(os.path.join(key_dir, f"{name}.json"))
+                for name in index["shards"]
+            }
+        data = {}
+        for semestar in index["shards"]:
+            if self.semestars is not None and semestar not in self.semestars:
+                continue
+            if layout == "semestar":
+                data[semestar] = self._read(os.path.join(key_dir, f"{semestar}.json"))
+            else:
+                semestar_dir = os.path.join(key_dir, semestar)
+                repo_names = self._read(os.path.join(semestar_dir, self.INDEX_FILE)) or []
+                data[semestar] = [
+                    self._read(os.path.join(semestar_dir, f"{name}.json"))
+                    for name in repo_names
+                ]
+        return data
+
+    def records(self, key):
+        """semestar_repo 分片方式下各学期的仓库名 {学期: [仓库名, ...]}，不读取分片内容"""
+        index = self._read(os.path.join(self.root, key, self.INDEX_FILE))
+        if index is None:
+            return {}
+        return {
+            semestar: self._read(os.path.join(self.root, key, semestar, self.INDEX_FILE)) or []
+            for semestar in index["shards"]
+            if self.semestars is None or semestar in self.semestars
+        }
+
+    def record_path(self, key, semestar, name):
+        return os.path.join(self.root, key, semestar, f"{name}.json")
+
+    def load_record(self, key, semestar, name):
+        """只读取 semestar_repo 分片方式下的一个仓库记录"""
+        return self._read(self.record_path(key, semestar, name))
+
+    def fingerprint(self, key):
+        """阶段数据的内容摘要（覆盖该阶段的全部分片），不存在时返回 None，用于判断阶段输入是否变化"""
+        key_dir = os.path.join(self.root, key)
+        if key not in self:
+            return None
+        digest = hashlib.blake2b(digest_size=16)
+        for dirpath, dirnames, filenames in os.walk(key_dir):
+            dirnames.sort()
+            for file_name in sorted(filenames):
+                if not file_name.endswith(".json"):
+                    continue
+                path = os.path.join(dirpath, file_name)
+                digest.update(os.path.relpath(path, key_dir).encode("utf-8"))
+                digest.update(self.file_fingerprint(path).encode("ascii"))
+        return digest.hexdigest()
+
+    def file_fingerprint(self, path):
+        """单个文件的内容摘要，不存在时返回 None；大小和修改时间未变时复用上次的结果"""
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        version = (stat.st_size, stat.st_mtime_ns)
+        cached = self._digests.get(path)
+        if cached and cached[0] == version:
+            return cached[1]
+        with open(path, "rb") as f:
+            value = hashlib.blake2b(f.read(), digest_size=16).hexdigest()
+        self._digests[path] = (version, value)
+        return value
+
+    def save(self, key, value, shards=None):
+        """
+        写入一个阶段的数据。shards 为改动过的分片（学期名、仓库名，或 semestar_repo
+        分片方式下的 (学期, 仓库名)），为 None 时重写该阶段的全部分片，并删除 value 中已没有的学期。
+        只写部分分片时，以及未加载的学期（见 semestars），磁盘上的其他学期保留不变。
+        """
+        key_dir = os.path.join(self.root, key)
+        os.makedirs(key_dir, exist_ok=True)
+        layout = self.layout(key)
+        changed = None if shards is None else set(shards)
+        if layout == "whole":
+            self._write(os.path.join(key_dir, "data.json"), value)
+            names = ["data"]
+        elif layout == "repo":
+            names = sorted(value)  # 索引与写入顺序无关，内容相同时指纹也相同
+            for name in names:
+                if changed is None or name in changed:
+                    self._write(os.path.join(key_dir, f"{name}.json"), value[name])
+            self._remove_stale(key_dir, names)
+        else:
+            names = list(value)
+            for semestar in names:
+                if layout == "semestar":
+                    if changed is None or semestar in changed:
+                        self._write(os.path.join(key_dir, f"{semestar}.json"), value[semestar])
+                    continue
+                semestar_dir = os.path.join(key_dir, semestar)
+                os.makedirs(semestar_dir, exist_ok=True)
+                repo_names = [record["repo_name"] for record in value[semestar]]
+                for name, record in zip(repo_names, value[semestar]):
+                    if changed is None or (semestar, name) in changed:
+                        self._write(os.path.join(semestar_dir, f"{name}.json"), record)
+                self._write(os.path.join(semestar_dir, self.INDEX_FILE), repo_names)
+                self._remove_stale(semestar_dir, repo_names)
+            previous = self._read(os.path.join(key_dir, self.INDEX_FILE)) or {}
+            for semestar in previous.get("shards", []):
+                if semestar in value:
+                    continue
+                if changed is not None or (self.semestars is not None and semestar not in self.semestars):
+                    names.append(semestar)
+                elif layout == "semestar":
+                    self._remove(os.path.join(key_dir, f"{semestar}.json"))
+                else:
+                    shutil.rmtree(os.path.join(key_dir, semestar), ignore_errors=True)
+        self._write(
+            os.path.join(key_dir, self.INDEX_FILE), {"layout": layout, "shards": names}
+        )
+
+    def _remove(self, path):
+        if os.path.exists(path):
+            os.remove(path)
+
+    def _remove_stale(self, directory, names):
+        # 删除索引中已不存在的分片文件
+        keep = {f"{name}.json" for name in names} | {self.INDEX_FILE}
+        for file_name in os.listdir(directory):
+            path = os.path.join(directory, file_name)
+            if file_name.endswith(".json") and file_name not in keep and os.path.isfile(path):
+                os.remove(path)
+
+    def _read(self, path):
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _write(self, path, data):
+        content = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        digest = hashlib.blake2b(content, digest_size=16).hexdigest()
+        if self.file_fingerprint(path) == digest:
+            return  # 内容未变的分片不重写，整体保存一个阶段时也只写改动过的分片
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+        # 直接记录写入内容的摘要：修改时间精度不足时，同样大小的新内容不会误用旧摘要
+        stat = os.stat(path)
+        self._digests[path] = ((stat.st_size, stat.st_mtime_ns), digest)
+
+
+class StageData(dict):
+    """
+    tmp_data 的懒加载视图：某个阶段第一次被访问时才从 StageStore 读取。
+    用法与普通 dict 相同，写回通过 StageStore.save 完成；unsaved 记录赋值后还没有写回的键，
+    写回后由调用方移除（原地修改的值不会记录，修改后应立即写回）。
+    并发运行的阶段可能同时访问同一个键，加载过程加锁，保证每个键只加载一次。
+    """
+
+    def __init__(self, store):
+        super().__init__()
+        self.store = store
+        self.unsaved = set()
+        self._lock = threading.Lock()
+
+    def _ensure(self, key):
+        if dict.__contains__(self, key):
+            return
+        with self._lock:
+            if not dict.__contains__(self, key) and key in self.store:
+                dict.__setitem__(self, key, self.store.load(key))
+
+    def __getitem__(self, key):
+        self._ensure(key)
+        return dict.__getitem__(self, key)
+
+    def __contains__(self, key):
+        self._ensure(key)
+        return dict.__contains__(self, key)
+
+    def get(self, key, default=None):
+        self._ensure(key)
+        return dict.get(self, key, default)
+
+    def __setitem__(self, key, value):
+        dict.__setitem__(self, key, value)
+        self.unsaved.add(key)
+
+    def setdefault(self, key, default=None):
+        self._ensure(key)
+        if not dict.__contains__(self, key):
+            self.unsaved.add(key)
+        return dict.setdefault(self, key, default)
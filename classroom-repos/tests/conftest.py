@@ -0,0 +1,20 @@
+import os
+import sys
+
+import pytest
+
+# 采集脚本和共用模块都在 classroom-repos 目录下，按顶层模块导入
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def spider(tmp_path, monkeypatch):
+    # 在临时目录下运行爬虫，tmp_stages/ 和各 sqlite 缓存都写到这里
+    from github_classroom_spider import GithubClassroomSpider
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("GITHUB_TOKEN", "test-token")
+    os.makedirs(tmp_path / "repos", exist_ok=True)
+    spider = GithubClassroomSpider(repos_dir=str(tmp_path / "repos"))
+    spider.MULTI_THREAD = False
+    return spider
@@ -0,0 +1,89 @@
+from github_classroom_spider import FetchCheckpoint
+
+LOCAL_DATA = {
+    "25spring": [
+        {
+            "repo_name": f"team-project-25spring-{team}",
+            "commits": [
+                {
+                    "commit_hash": f"{team}{i}",
+                    "author_name": f"Student {team}{i}",
+                    "author_email": f"s{team}{i}@example.com",
+                    "committed_datetime": "2025-03-01T10:00:00+08:00",
+                }
+                for i in range(2)
+            ],
+        }
+        for team in (1, 2)
+    ]
+}
+
+
+class GraphQL:
+    """按别名回答批量作者查询的假接口；查询含 fail_repo（为 None 时任何查询）时返回 fail 中的错误"""
+
+    def __init__(self, fail=None, fail_repo=None):
+        self.fail = fail
+        self.fail_repo = fail_repo
+        self.queried = []
+
+    def __call__(self, query, variables):
+        data = {}
+        for name, value in variables.items():
+            if name.startswith("r") and "c" in name:
+                repo_alias, commit_alias = name.split("c")
+                self.queried.append(value)
+                author = {"user": {"id": f"U-{value}"}, "name": value, "email": f"{value}@example.com"}
+                data.setdefault(repo_alias, {})[f"c{commit_alias}"] = {"author": author}
+        if self.fail is None or (self.fail_repo and self.fail_repo not in variables.values()):
+            return {"data": data}
+        return {"data": None if any("path" not in e for e in self.fail) else data, "errors": self.fail}
+
+
+def fetch(spider, graphql):
+    spider.tmp_data["local_data"] = LOCAL_DATA
+    spider._run_query = graphql
+    spider.fetch_commit_authors()
+    return {
+        repo: {user["commit"]: user["id"] for user in users}
+        for repo, users in spider.tmp_data["commit_authors"].items()
+    }
+
+
+def test_errored_batch_is_not_checkpointed_and_is_retried(spider):
+    # 每个批次一个仓库：第一个批次成功，第二个批次返回没有 data 的错误
+    spider.COMMIT_AUTHOR_BATCH_SIZE = 2
+    graphql = GraphQL(fail=[{"message": "Something went wrong"}], fail_repo="team-project-25spring-2")
+    authors = fetch(spider, graphql)
+    assert authors == {
+        "team-project-25spring-1": {"10": "U-10", "11": "U-11"},
+        "team-project-25spring-2": {"20": None, "21": None},
+    }
+    # 有失败的仓库时断点保留，只有成功的仓库写入了断点
+    checkpoint = FetchCheckpoint(spider.fetch_checkpoint_path, "commit_authors")
+    assert checkpoint.pages("team-project-25spring-2") == []
+    assert len(checkpoint.pages("team-project-25spring-1")) == 1
+    checkpoint.connection.close()
+
+    graphql = GraphQL()
+    authors = fetch(spider, graphql)
+    assert sorted(graphql.queried) == ["20", "21"]
+    assert authors["team-project-25spring-2"] == {"20": "U-20", "21": "U-21"}
+
+    # 全部成功后清除断点
+    checkpoint = FetchCheckpoint(spider.fetch_checkpoint_path, "commit_authors")
+    assert checkpoint.pages("team-project-25spring-1") == []
+    checkpoint.connection.close()
+
+
+def test_error_with_path_only_fails_that_repo(spider):
+    graphql = GraphQL(fail=[{"message": "Could not resolve to a Repository", "path": ["r1"]}])
+    authors = fetch(spider, graphql)
+    assert authors["team-project-25spring-1"] == {"10": "U-10", "11": "U-11"}
+    assert authors["team-project-25spring-2"] == {"20": None, "21": None}
+
+    graphql = GraphQL()
+    authors = fetch(spider, graphql)
+    assert sorted(graphql.queried) == ["20", "21"]
+    assert authors["team-project-25spring-1"] == {"10": "U-10", "11": "U-11"}
+    assert authors["team-project-25spring-2"] == {"20": "U-20", "21": "U-21"}
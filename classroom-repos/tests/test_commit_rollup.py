@@ -0,0 +1,141 @@
+import random
+from collections import Counter
+from datetime import datetime, timezone
+
+import pytz
+
+from commit_rollup import CommitRollup, day_to_date
+from stage_store import StageData, StageStore
+
+CHINA_TZ = pytz.timezone("Asia/Shanghai")
+
+
+def random_commits(count=2000, seed=304):
+    rng = random.Random(seed)
+    start = datetime(2025, 2, 1, tzinfo=timezone.utc).timestamp()
+    return [
+        {
+            "team": f"team-{rng.randint(1, 5)}",
+            "author": rng.choice(["U1", "U2", "U3", None]),
+            "timestamp": start + rng.randint(0, 150 * 86400),
+            "insertions": rng.randint(0, 300),
+            "deletions": rng.randint(0, 100),
+            "lang": rng.choice(["chinese", "english", "mixed", None]),
+            "length": rng.randint(0, 40),
+        }
+        for _ in range(count)
+    ]
+
+
+def build(commits):
+    rollup = CommitRollup()
+    for c in commits:
+        rollup.add(c["team"], c["author"], c["timestamp"], c["insertions"], c["deletions"], c["lang"], c["length"])
+    return rollup
+
+
+def naive_totals(commits, key):
+    totals = {}
+    for c in commits:
+        total = totals.setdefault(key(c), [0, 0, 0])
+        total[0] += 1
+        total[1] += c["insertions"]
+        total[2] += c["deletions"]
+    return totals
+
+
+def local_time(c):
+    return datetime.fromtimestamp(c["timestamp"], CHINA_TZ)
+
+
+def test_totals_match_naive_group_by():
+    commits = random_commits()
+    rollup = build(commits)
+
+    day_totals = rollup.totals("day")
+    assert {day_to_date(day): v for day, v in day_totals.items()} == naive_totals(
+        commits, lambda c: local_time(c).date().isoformat()
+    )
+    assert rollup.totals("hour") == naive_totals(commits, lambda c: local_time(c).hour)
+    assert rollup.totals("team") == naive_totals(commits, lambda c: c["team"])
+    assert rollup.totals("team", "author") == naive_totals(commits, lambda c: (c["team"], c["author"]))
+    assert sum(v[0] for v in rollup.totals("team").values()) == len(commits)
+
+
+def test_message_totals_skip_commits_without_language():
+    commits = random_commits()
+    rollup = build(commits)
+    classified = [c for c in commits if c["lang"] is not None]
+
+    assert rollup.message_totals("lang") == Counter(c["lang"] for c in classified)
+    assert rollup.message_totals("team", "length") == Counter((c["team"], c["length"]) for c in classified)
+
+
+def test_records_round_trip_per_team():
+    commits = random_commits()
+    rollup = build(commits)
+
+    merged = CommitRollup()
+    for team in sorted({c["team"] for c in commits}):
+        records = rollup.records(team)
+        assert records == build([c for c in commits if c["team"] == team]).records(team)
+        merged.add_records(team, records)
+    assert merged.cells == rollup.cells
+    assert merged.messages == rollup.messages
+
+
+def semestar_data(semestar):
+    email = f"{semestar}@example.com"
+    local = [
+        {
+            "repo_name": "team-1",
+            "group_name": "1",
+            "commits": [
+                {
+                    "commit_hash": f"{semestar}-a",
+                    "author_email": email,
+                    "committed_datetime": "2025-03-01T10:00:00+08:00",
+                    "message": "fix login",
+                    "insertions": 3,
+                    "deletions": 1,
+                }
+            ],
+            "code_line_data": {"total_lines": 2, "ext_status": {".py": 2}},
+        }
+    ]
+    filtered = [
+        {
+            "repo_name": "team-1",
+            "group_name": "1",
+            "author_ids": {email: "U1"},
+            "code_line_data": local[0]["code_line_data"],
+            "group_member_ids": ["U1"],
+        }
+    ]
+    return local, filtered
+
+
+def save_semestars(spider, *semestars):
+    local_data, filtered = {}, {}
+    for semestar in semestars:
+        local_data[semestar], filtered[semestar] = semestar_data(semestar)
+    spider.tmp_data["local_data"] = local_data
+    spider.tmp_data["filtered_local_data"] = filtered
+    spider._save_stage("local_data")
+    spider._save_stage("filtered_local_data")
+
+
+def test_removed_semestar_drops_its_rollup_shard(spider):
+    save_semestars(spider, "24spring", "25spring")
+    spider.build_commit_rollup()
+    assert set(spider.stage_store.load("commit_rollup")) == {"24spring", "25spring"}
+
+    save_semestars(spider, "25spring")
+    spider.build_commit_rollup()
+    assert set(StageStore(spider.stage_dir).load("commit_rollup")) == {"25spring"}
+
+    # 重新启动后从磁盘读取，图表也只包含仍存在的学期
+    spider.stage_store = StageStore(spider.stage_dir)
+    spider.tmp_data = StageData(spider.stage_store)
+    spider.build_commit_rollup()
+    assert list(spider.tmp_data["commit_rollup"]) == ["25spring"]
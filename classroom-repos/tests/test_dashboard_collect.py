@@ -0,0 +1,63 @@
+import os
+import sys
+from datetime import datetime
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+from fake_github import FakeGitHub  # noqa: E402
+from github_classroom_api_dashboard import GitHubDashboardCollector, parse_date  # noqa: E402
+from synthetic_classroom import generate_classroom  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def classroom(tmp_path_factory):
+    root = str(tmp_path_factory.mktemp("classroom"))
+    manifest = generate_classroom(
+        root, teams=8, members=2, branches=3, commits=12, files=4, template_commits=2, prs=3, issues=3
+    )
+    fake = FakeGitHub(root, latency=0.002)
+    api_url = fake.start()
+    yield manifest, api_url
+    fake.stop()
+
+
+def collect(classroom, run_dir, concurrency, **options):
+    manifest, api_url = classroom
+    semester, info = next(iter(manifest["semestars"].items()))
+    cache_path = os.path.join(run_dir, "dashboard_cache.json")
+    collector = GitHubDashboardCollector(
+        token="test",
+        organization=manifest["organization"],
+        semester=semester,
+        start=parse_date(datetime.fromisoformat(info["start"]).date().isoformat()),
+        end=parse_date(datetime.fromisoformat(info["end"]).date().isoformat(), end_of_day=True),
+        cache_path=cache_path,
+        concurrency=concurrency,
+        api_url=api_url,
+        **options,
+    )
+    chart_data = collector.collect(info["assignment_id"])
+    with open(cache_path, "rb") as f:
+        return chart_data, f.read()
+
+
+def test_concurrent_collect_matches_sequential_output(classroom, tmp_path):
+    sequential = collect(classroom, str(tmp_path / "sequential"), concurrency=1)
+    concurrent = collect(classroom, str(tmp_path / "concurrent"), concurrency=8)
+    assert concurrent[0] == sequential[0]
+    assert concurrent[1] == sequential[1]
+
+
+def test_rerun_reuses_the_checkpoint_unless_no_resume(classroom, tmp_path, monkeypatch):
+    run_dir = str(tmp_path / "run")
+    first = collect(classroom, run_dir, concurrency=1)
+
+    def no_requests(*args, **kwargs):
+        raise AssertionError("checkpointed repositories should not be crawled again")
+
+    monkeypatch.setattr(GitHubDashboardCollector, "get_branches", no_requests)
+    assert collect(classroom, run_dir, concurrency=1) == first
+    with pytest.raises(AssertionError):
+        collect(classroom, run_dir, concurrency=1, resume=False)
@@ -0,0 +1,85 @@
+import pytest
+
+from github_classroom_spider import FetchCheckpoint
+
+
+class FlakyPages:
+    """第 fail_at 页（从0开始）抛出一次异常的分页接口，每页一个数字"""
+
+    def __init__(self, total, fail_at=None):
+        self.total = total
+        self.fail_at = fail_at
+        self.calls = []
+
+    def __call__(self, state):
+        page = state["page"]
+        self.calls.append(page)
+        if page == self.fail_at:
+            self.fail_at = None
+            raise RuntimeError("rate limited")
+        return [page], {"page": page + 1} if page + 1 < self.total else None
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "checkpoints.sqlite")
+
+
+def test_paginate_resumes_from_failed_page_and_clears_after_success(path):
+    fetch_page = FlakyPages(4, fail_at=2)
+    checkpoint = FetchCheckpoint(path, "pr")
+    pages, error = checkpoint.paginate("team-1", fetch_page, {"page": 0})
+    assert pages == [[0], [1]]
+    assert isinstance(error, RuntimeError)
+    checkpoint.close()  # 有失败的仓库，断点保留
+
+    checkpoint = FetchCheckpoint(path, "pr")
+    assert checkpoint.paginate("team-1", fetch_page, {"page": 0}) == ([[0], [1], [2], [3]], None)
+    assert fetch_page.calls == [0, 1, 2, 2, 3]
+    checkpoint.close()  # 全部成功，清除断点
+
+    checkpoint = FetchCheckpoint(path, "pr")
+    assert checkpoint.pages("team-1") == []
+    checkpoint.close()
+
+
+def test_completed_repo_is_not_fetched_again_and_stages_are_separate(path):
+    checkpoint = FetchCheckpoint(path, "pr")
+    checkpoint.paginate("team-1", FlakyPages(2), {"page": 0})
+    checkpoint.mark_failed("team-2")
+    checkpoint.close()
+
+    fetch_page = FlakyPages(2)
+    checkpoint = FetchCheckpoint(path, "pr")
+    assert checkpoint.paginate("team-1", fetch_page, {"page": 0}) == ([[0], [1]], None)
+    assert fetch_page.calls == []
+    assert FetchCheckpoint(path, "issues").pages("team-1") == []
+
+
+def test_resume_splits_done_and_remaining_items(path):
+    checkpoint = FetchCheckpoint(path, "commit_authors")
+    checkpoint.add_page("team-1", [{"commit": "a", "id": "U1"}])
+    checkpoint.add_page("team-1", [{"commit": "c", "id": None}])
+
+    done, remaining = checkpoint.resume("team-1", ["a", "b", "c"], lambda user: user["commit"])
+    assert done == [{"commit": "a", "id": "U1"}, {"commit": "c", "id": None}]
+    assert remaining == ["b"]
+
+
+def test_page_with_graphql_errors_keeps_the_checkpoint(spider):
+    responses = [
+        {"data": {"repository": {"pullRequests": {"nodes": [1], "pageInfo": {"hasNextPage": True, "endCursor": "a"}}}}},
+        # 部分结果加错误：这一页不完整，不能当作最后一页记录
+        {
+            "data": {"repository": {"pullRequests": {"nodes": [], "pageInfo": {"hasNextPage": False, "endCursor": None}}}},
+            "errors": [{"message": "timeout", "path": ["repository", "pullRequests", "nodes", 0]}],
+        },
+    ]
+    spider._run_query = lambda query, variables: responses.pop(0)
+    checkpoint = FetchCheckpoint(spider.fetch_checkpoint_path, "pr")
+    nodes, error = spider._paginate_connection(checkpoint, "team-1", "query", "pullRequests")
+    assert nodes == [1] and error is not None
+    checkpoint.close()
+
+    checkpoint = FetchCheckpoint(spider.fetch_checkpoint_path, "pr")
+    assert checkpoint.pages("team-1") == [{"result": [1], "next": {"after": "a"}}]
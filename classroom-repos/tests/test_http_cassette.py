@@ -0,0 +1,83 @@
+import json
+
+import pytest
+
+from github_classroom_api_dashboard import GitHubDashboardCollector, parse_date, with_params
+from http_cassette import Cassette, CassetteMiss
+
+API_URL = "https://api.github.test"
+REPO = "team-project-26spring-01"
+
+
+def record(path, pages):
+    # 只录制 pages 中的 GET 请求：{完整URL: 响应JSON}
+    cassette = Cassette(path, "record")
+    for url, body in pages.items():
+        cassette.record("GET", url, None, 200, [("Content-Type", "application/json")], json.dumps(body).encode())
+    cassette.close()
+    return Cassette(path, "replay")
+
+
+def collector(cassette):
+    return GitHubDashboardCollector(
+        token=None,
+        organization="org",
+        semester="26spring",
+        start=parse_date("2026-02-01"),
+        end=parse_date("2026-06-30", end_of_day=True),
+        api_url=API_URL,
+        cassette=cassette,
+    )
+
+
+def test_key_ignores_json_key_order():
+    assert Cassette.key("post", "https://x/graphql", '{"a": 1, "b": 2}') == Cassette.key(
+        "POST", "https://x/graphql", b'{"b": 2, "a": 1}'
+    )
+    assert Cassette.key("GET", "https://x/a?page=1") != Cassette.key("GET", "https://x/a?page=2")
+
+
+def test_replay_returns_recorded_response_without_network(tmp_path):
+    url = f"{API_URL}/repos/org/{REPO}/branches?per_page=100"
+    cassette = record(str(tmp_path / "cassette.sqlite"), {url: [{"name": "main"}, {"name": "dev"}]})
+    dashboard = collector(cassette)
+
+    with dashboard.report.stage("get_branches") as counter:
+        assert dashboard.get_branches(REPO) == ["main", "dev"]
+    assert counter["http_replayed"] == 1
+    assert counter["http_requests"] == 0
+    with pytest.raises(CassetteMiss):
+        cassette.replay("GET", f"{API_URL}/repos/org/{REPO}/branches?per_page=50")
+
+
+def test_partial_cassette_falls_back_to_recorded_rest_listings(tmp_path):
+    # 只录制了 REST 列表，没有录制 GraphQL 搜索和 compare：回放时应退回逐页统计与完整分支爬取
+    issues_url = with_params(
+        f"{API_URL}/repos/org/{REPO}/issues",
+        {"state": "all", "since": "2026-01-31T16:00:00Z", "per_page": 100},
+    )
+    pulls_url = with_params(f"{API_URL}/repos/org/{REPO}/pulls", {"state": "all", "per_page": 100})
+    commits_url = with_params(
+        f"{API_URL}/repos/org/{REPO}/commits",
+        {"sha": "feature", "since": "2026-01-31T16:00:00Z", "until": "2026-06-30T15:59:59Z", "per_page": 100},
+    )
+    commit_date = {"date": "2026-03-01T02:00:00Z"}
+    cassette = record(
+        str(tmp_path / "cassette.sqlite"),
+        {
+            issues_url: [
+                {"created_at": "2026-03-01T00:00:00Z"},
+                {"created_at": "2026-03-02T00:00:00Z", "pull_request": {}},
+                {"created_at": "2025-12-01T00:00:00Z"},
+            ],
+            pulls_url: [{"created_at": "2026-03-02T00:00:00Z"}],
+            commits_url: [{"sha": "abc", "commit": {"author": commit_date, "committer": commit_date}}],
+        },
+    )
+    dashboard = collector(cassette)
+
+    with pytest.raises(CassetteMiss):
+        dashboard.search_issue_and_pull_request_counts(REPO)
+    assert dashboard.count_issues_and_pull_requests(REPO) == (1, 1)
+    commits = dashboard.get_branch_commits_beyond(REPO, "main", "feature")
+    assert [sha for sha, _ in commits] == ["abc"]
@@ -0,0 +1,220 @@
+import os
+import subprocess
+from datetime import datetime, timedelta, timezone
+
+import git
+import pytest
+
+import github_classroom_spider
+from github_classroom_spider import _parse_numstat_record, iter_numstat_commits, list_branch_commits
+
+CHINA_TZ = timezone(timedelta(hours=8))
+SEMESTAR_RANGE = (datetime(2025, 2, 1, tzinfo=CHINA_TZ), datetime(2025, 6, 30, 23, 59, 59, tzinfo=CHINA_TZ))
+
+
+def commit(repo_path, message, date, files=None):
+    # files: {路径: 内容}，为 None 时提交一个空commit
+    for path, content in (files or {}).items():
+        full_path = os.path.join(repo_path, path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        with open(full_path, "wb") as f:
+            f.write(content)
+        subprocess.run(["git", "add", path], cwd=repo_path, check=True)
+    env = {
+        **os.environ,
+        "GIT_AUTHOR_NAME": "Student",
+        "GIT_AUTHOR_EMAIL": "student@example.com",
+        "GIT_COMMITTER_NAME": "Student",
+        "GIT_COMMITTER_EMAIL": "student@example.com",
+        "GIT_AUTHOR_DATE": date,
+        "GIT_COMMITTER_DATE": date,
+    }
+    subprocess.run(["git", "commit", "-q", "--allow-empty", "-m", message], cwd=repo_path, env=env, check=True)
+    return subprocess.run(
+        ["git", "rev-parse", "HEAD"], cwd=repo_path, capture_output=True, text=True, check=True
+    ).stdout.strip()
+
+
+@pytest.fixture
+def repo_path(tmp_path):
+    path = str(tmp_path / "repo")
+    subprocess.run(["git", "init", "-q", "-b", "main", path], check=True)
+    return path
+
+
+def test_window_keeps_in_range_commits_behind_an_old_commit(repo_path):
+    # rebase 后时间被打乱：学期内的commit排在一个学期前的commit后面
+    skewed = commit(repo_path, "skewed", "2025-03-01T10:00:00+08:00")
+    commit(repo_path, "old template", "2024-12-01T10:00:00+08:00")
+    recent = commit(repo_path, "recent", "2025-03-02T10:00:00+08:00")
+    commit(repo_path, "after semestar", "2025-07-01T00:00:00+08:00")
+
+    shas = list_branch_commits(git.Repo(repo_path), "main", semestar_range=SEMESTAR_RANGE)
+    assert shas == [recent, skewed]
+
+
+def test_window_bounds_are_inclusive_and_exclude_tips(repo_path):
+    first = commit(repo_path, "start", "2025-02-01T00:00:00+08:00")
+    second = commit(repo_path, "end", "2025-06-30T23:59:59+08:00")
+    repo = git.Repo(repo_path)
+
+    assert list_branch_commits(repo, "main", semestar_range=SEMESTAR_RANGE) == [second, first]
+    assert list_branch_commits(repo, "main", [first], SEMESTAR_RANGE) == [second]
+
+
+def test_parse_numstat_record_counts_binary_files_as_zero():
+    record = (
+        "0123abcd\x1fAlice\x1falice@example.com\x1f2025-03-01T10:00:00+08:00\x1f修复登录\n\nbody\n\x1f\n"
+        "3\t1\tsrc/app.py\n-\t-\tdocs/logo.png\n0\t5\tREADME.md\n"
+    ).encode("utf-8")
+    commit = _parse_numstat_record(record)
+    assert commit == {
+        "hexsha": "0123abcd",
+        "author_name": "Alice",
+        "author_email": "alice@example.com",
+        "committed_datetime": "2025-03-01T10:00:00+08:00",
+        "message": "修复登录\n\nbody",
+        "insertions": 3,
+        "deletions": 6,
+        "files_changed": 3,
+        "files": {"src/app.py": (3, 1), "docs/logo.png": (0, 0), "README.md": (0, 5)},
+    }
+
+
+def test_parse_numstat_record_without_file_changes():
+    commit = _parse_numstat_record(b"0123abcd\x1fA\x1fa@x\x1f2025-03-01T10:00:00+08:00\x1fempty\n\x1f\n")
+    assert (commit["insertions"], commit["deletions"], commit["files_changed"], commit["files"]) == (0, 0, 0, {})
+
+
+def test_numstat_matches_gitpython_for_root_binary_and_merge_commits(repo_path):
+    root = commit(
+        repo_path,
+        "root",
+        "2025-03-01T10:00:00+08:00",
+        {"a.txt": b"1\n2\n3\n", "logo.png": b"\x89PNG\x00\x01\x02"},
+    )
+    commit(repo_path, "edit", "2025-03-02T10:00:00+08:00", {"a.txt": b"1\nchanged\n3\n4\n", "logo.png": b"\x00\x03"})
+    subprocess.run(["git", "checkout", "-q", "-b", "feature"], cwd=repo_path, check=True)
+    commit(repo_path, "feature", "2025-03-03T10:00:00+08:00", {"f.txt": b"x\ny\n"})
+    subprocess.run(["git", "checkout", "-q", "main"], cwd=repo_path, check=True)
+    commit(repo_path, "main", "2025-03-04T10:00:00+08:00", {"m.txt": b"m\n"})
+    env = {**os.environ, "GIT_COMMITTER_DATE": "2025-03-05T10:00:00+08:00", "GIT_AUTHOR_DATE": "2025-03-05T10:00:00+08:00"}
+    subprocess.run(
+        ["git", "-c", "user.name=S", "-c", "user.email=s@x", "merge", "-q", "--no-ff", "-m", "merge", "feature"],
+        cwd=repo_path, env=env, check=True,
+    )
+    repo = git.Repo(repo_path)
+    shas = list_branch_commits(repo, "main")
+
+    commits = {c["hexsha"]: c for c in iter_numstat_commits(repo_path, shas)}
+    assert list(commits) == shas
+    for sha in shas:
+        stats = repo.commit(sha).stats
+        assert commits[sha]["insertions"] == stats.total["insertions"], sha
+        assert commits[sha]["deletions"] == stats.total["deletions"], sha
+        assert commits[sha]["files_changed"] == stats.total["files"], sha
+        assert commits[sha]["files"] == {path: (s["insertions"], s["deletions"]) for path, s in stats.files.items()}
+    # 根提交与空树比较；merge commit 只与第一个父提交比较（即 feature 分支带来的改动）
+    assert commits[root]["files"] == {"a.txt": (3, 0), "logo.png": (0, 0)}
+    assert commits[shas[0]]["files"] == {"f.txt": (2, 0)}
+    assert list(iter_numstat_commits(repo_path, [])) == []
+
+
+TEAM_REPO = "team-project-25spring-1"
+
+
+@pytest.fixture
+def spider(spider, tmp_path):
+    repo_path = tmp_path / "repos" / "team-project-25spring-submissions" / TEAM_REPO
+    subprocess.run(["git", "init", "-q", "-b", "main", str(repo_path)], check=True)
+    spider.repo_path = str(repo_path)
+    return spider
+
+
+@pytest.fixture
+def scans(monkeypatch):
+    # 记录每次 scan_local_repo 的 previous_tips 和返回结果
+    calls = []
+    scan_local_repo = github_classroom_spider.scan_local_repo
+
+    def recording_scan(*args):
+        result = scan_local_repo(*args)
+        calls.append({"previous_tips": args[4], **result})
+        return result
+
+    monkeypatch.setattr(github_classroom_spider, "scan_local_repo", recording_scan)
+    return calls
+
+
+def local_record(spider):
+    return spider.tmp_data["local_data"]["25spring"][0]
+
+
+def full_scan_record(spider):
+    # 关闭增量扫描、从头扫描得到的结果，作为增量合并结果的对照
+    spider.INCREMENTAL_LOCAL_SCAN = False
+    spider.gather_data_from_local_repos()
+    spider.INCREMENTAL_LOCAL_SCAN = True
+    return local_record(spider)
+
+
+def test_unchanged_tips_skip_the_rescan(spider, scans, monkeypatch):
+    commit(spider.repo_path, "init", "2025-03-01T10:00:00+08:00", {"a.py": b"print(1)\n"})
+    spider.gather_data_from_local_repos()
+    first = local_record(spider)
+
+    monkeypatch.setattr(github_classroom_spider, "iter_numstat_commits", pytest.fail)
+    spider.gather_data_from_local_repos()
+    assert scans[-1]["previous_tips"] == {"main": scans[0]["branch_tips"]["main"]}
+    assert scans[-1]["unchanged"] and scans[-1]["git_processes"] == 0
+    assert local_record(spider) == first
+
+
+def test_new_commits_are_merged_onto_the_previous_scan(spider, scans):
+    first = commit(spider.repo_path, "init", "2025-03-01T10:00:00+08:00", {"a.py": b"1\n2\n"})
+    spider.gather_data_from_local_repos()
+    second = commit(spider.repo_path, "more", "2025-03-02T10:00:00+08:00", {"a.py": b"1\n2\n3\n", "b.md": b"x\n"})
+    spider.gather_data_from_local_repos()
+
+    assert scans[-1]["incremental"]
+    assert [c["commit_hash"] for c in scans[-1]["commits"]] == [second]
+    merged = local_record(spider)
+    assert [c["commit_hash"] for c in merged["commits"]] == [second, first]
+    assert merged["code_line_data"]["ext_status"][".py"] == 3
+    assert merged == full_scan_record(spider)
+
+
+def test_force_push_falls_back_to_a_full_scan(spider, scans):
+    first = commit(spider.repo_path, "init", "2025-03-01T10:00:00+08:00", {"a.py": b"1\n"})
+    commit(spider.repo_path, "dropped", "2025-03-02T10:00:00+08:00", {"a.py": b"1\n2\n3\n"})
+    spider.gather_data_from_local_repos()
+    subprocess.run(["git", "reset", "-q", "--hard", first], cwd=spider.repo_path, check=True)
+    rewritten = commit(spider.repo_path, "rewritten", "2025-03-03T10:00:00+08:00", {"b.py": b"x\n"})
+    spider.gather_data_from_local_repos()
+
+    assert scans[-1]["previous_tips"] is not None and not scans[-1]["incremental"]
+    record = local_record(spider)
+    assert [c["commit_hash"] for c in record["commits"]] == [rewritten, first]
+    assert record["code_line_data"]["ext_status"][".py"] == 2
+    assert record == full_scan_record(spider)
+
+
+def test_signature_or_member_change_forces_a_full_rescan(spider, scans):
+    commit(spider.repo_path, "init", "2025-03-01T10:00:00+08:00", {"a.py": b"1\n", "b.md": b"x\n"})
+    spider.gather_data_from_local_repos()
+
+    spider.valid_extensions = [".py"]
+    spider.gather_data_from_local_repos()
+    assert scans[-1]["previous_tips"] is None
+    assert local_record(spider)["code_line_data"]["ext_status"] == {".py": 1}
+    spider.gather_data_from_local_repos()
+    assert scans[-1]["unchanged"]
+
+    # 上次未按成员过滤时结果是全集，开始过滤后仍可增量扫描
+    spider.tmp_data["group_members"] = {"25spring": {TEAM_REPO: [{"github_id": "U1"}]}}
+    spider.gather_data_from_local_repos()
+    assert scans[-1]["unchanged"]
+
+    spider.tmp_data["group_members"] = {"25spring": {TEAM_REPO: [{"github_id": "U2"}]}}
+    spider.gather_data_from_local_repos()
+    assert scans[-1]["previous_tips"] is None
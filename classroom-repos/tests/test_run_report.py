@@ -0,0 +1,42 @@
+import threading
+
+from run_report import RunReport
+
+
+def test_count_without_scope_goes_to_unscoped_only():
+    report = RunReport()
+    with report.stage("fetch") as counter:
+        report.count("http_requests")
+        # 其他线程没有上下文：不能计入正在运行的阶段
+        thread = threading.Thread(target=report.count, args=("http_requests", 5))
+        thread.start()
+        thread.join()
+        # bind() 保留当前阶段的归属
+        thread = threading.Thread(target=report.bind(report.count), args=("http_requests", 2))
+        thread.start()
+        thread.join()
+    assert counter["http_requests"] == 3
+    assert report.unscoped["http_requests"] == 5
+
+
+def test_concurrent_stages_report_their_own_thread_cpu():
+    report = RunReport()
+    barrier = threading.Barrier(2)
+
+    def busy(name, loops):
+        with report.stage(name):
+            barrier.wait()
+            total = 0
+            for i in range(loops):
+                total += i * i
+            barrier.wait()
+
+    threads = [threading.Thread(target=busy, args=("idle", 0)), threading.Thread(target=busy, args=("busy", 3_000_000))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    records = {record["stage"]: record for record in report.stages}
+    # idle 阶段等待 busy 阶段期间，进程CPU时间包含 busy 的计算，本线程CPU时间不包含
+    assert records["idle"]["process_cpu_seconds"] > 0.05
+    assert records["idle"]["cpu_seconds"] < records["busy"]["cpu_seconds"] / 5
@@ -0,0 +1,37 @@
+import json
+
+from github_classroom_spider import GithubClassroomSpider
+from stage_store import StageStore
+
+
+def test_semestar_subset_only_loads_and_rewrites_those_semestars(spider, tmp_path):
+    spider.tmp_data["local_data"] = {
+        semestar: [{"repo_name": f"team-project-{semestar}-1", "commits": []}] for semestar in ("24spring", "25spring")
+    }
+    spider.tmp_data["pr"] = {"team-project-24spring-1": [{"number": 1}], "team-project-25spring-1": []}
+    spider.chart_data = {"24spring": {"old": True}, "25spring": {"old": True}}
+    spider.save_all()
+    assert spider.tmp_data.unsaved == set()
+
+    subset = GithubClassroomSpider(repos_dir=str(tmp_path / "repos"), semestars=["25spring"])
+    assert list(subset.tmp_data["local_data"]) == ["25spring"]
+    subset._save_repo_stage("pr", {"team-project-25spring-1": [{"number": 2}]})
+    subset.generate_chart_data()
+
+    store = StageStore(spider.stage_dir)
+    assert list(store.load("local_data")) == ["24spring", "25spring"]
+    assert store.load("pr") == {"team-project-24spring-1": [{"number": 1}], "team-project-25spring-1": [{"number": 2}]}
+    with open(spider.chart_data_path, encoding="utf-8") as f:
+        chart_data = json.load(f)
+    assert chart_data["24spring"] == {"old": True}
+    assert "old" not in chart_data.get("25spring", {})
+
+
+def test_save_all_only_writes_unsaved_stages(spider, monkeypatch):
+    spider.tmp_data["pr"] = {"team-1": []}
+    spider._save_stage("pr")
+    spider.tmp_data["issues"] = {"team-1": []}
+    saved = []
+    monkeypatch.setattr(spider.stage_store, "save", lambda key, value, shards=None: saved.append(key))
+    spider.save_all()
+    assert saved == ["issues"]
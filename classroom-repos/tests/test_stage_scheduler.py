@@ -0,0 +1,93 @@
+import pytest
+
+from stage_scheduler import StageScheduler
+
+
+class Pipeline:
+    """内存中的 tmp_data 与三个阶段：fetch(external) -> filter -> chart，记录每个阶段的运行次数"""
+
+    def __init__(self):
+        self.data = {"raw": 1}
+        self.runs = []
+
+    def fetch(self):
+        self.runs.append("fetch")
+        self.data["fetched"] = self.data["raw"] * 10
+
+    def filter(self):
+        self.runs.append("filter")
+        self.data["filtered"] = self.data["fetched"] + 1
+
+    def chart(self):
+        self.runs.append("chart")
+        self.data["chart"] = [self.data["filtered"]]
+
+    def stages(self):
+        return [
+            {"name": "fetch", "title": "fetch", "func": self.fetch, "inputs": [], "outputs": ["fetched"], "external": True},
+            {"name": "filter", "title": "filter", "func": self.filter, "inputs": ["fetched"], "outputs": ["filtered"]},
+            {"name": "chart", "title": "chart", "func": self.chart, "inputs": ["filtered"], "outputs": ["chart"]},
+        ]
+
+    def fingerprint(self, key):
+        return repr(self.data[key]) if key in self.data else None
+
+    def scheduler(self, state_path, **kwargs):
+        return StageScheduler(self.stages(), self.fingerprint, str(state_path), log=lambda message: None, **kwargs)
+
+
+def test_dependencies_follow_declared_inputs_and_outputs():
+    pipeline = Pipeline()
+    deps = pipeline.scheduler("unused").dependencies(pipeline.stages())
+    assert deps == {"fetch": [], "filter": ["fetch"], "chart": ["filter"]}
+
+
+def test_unchanged_stages_are_skipped_but_external_ones_always_run(tmp_path):
+    pipeline = Pipeline()
+    state_path = tmp_path / "_stage_runs.json"
+    assert pipeline.scheduler(state_path).run() == {"fetch": "done", "filter": "done", "chart": "done"}
+
+    pipeline.runs.clear()
+    assert pipeline.scheduler(state_path).run() == {"fetch": "done", "filter": "skipped", "chart": "skipped"}
+    assert pipeline.runs == ["fetch"]
+
+    # external 阶段带来新数据时，下游阶段重新运行
+    pipeline.runs.clear()
+    pipeline.data["raw"] = 2
+    assert pipeline.scheduler(state_path).run() == {"fetch": "done", "filter": "done", "chart": "done"}
+    assert pipeline.data["chart"] == [21]
+
+
+def test_changed_output_and_skip_unchanged_false_force_a_rerun(tmp_path):
+    pipeline = Pipeline()
+    state_path = tmp_path / "_stage_runs.json"
+    pipeline.scheduler(state_path).run()
+
+    # 输出在上次运行后被改动（或删除）时不能跳过
+    pipeline.runs.clear()
+    del pipeline.data["chart"]
+    pipeline.scheduler(state_path).run()
+    assert pipeline.runs == ["fetch", "chart"]
+
+    pipeline.runs.clear()
+    pipeline.scheduler(state_path, skip_unchanged=False).run(["filter", "chart"])
+    assert pipeline.runs == ["filter", "chart"]
+
+
+def test_failed_stage_blocks_dependents_and_is_not_recorded(tmp_path):
+    pipeline = Pipeline()
+    state_path = tmp_path / "_stage_runs.json"
+
+    def broken():
+        raise RuntimeError("boom")
+
+    stages = pipeline.stages()
+    stages[1]["func"] = broken
+    scheduler = StageScheduler(stages, pipeline.fingerprint, str(state_path), log=lambda message: None)
+    with pytest.raises(RuntimeError, match="boom"):
+        scheduler.run()
+    assert "chart" not in pipeline.runs
+
+    # 修复后重跑：失败的阶段没有被记录为完成，不会被跳过
+    pipeline.runs.clear()
+    assert pipeline.scheduler(state_path).run() == {"fetch": "done", "filter": "done", "chart": "done"}
@@ -0,0 +1,137 @@
+import json
+import os
+
+from stage_store import StageData, StageStore
+
+
+def local_data(*semestars):
+    return {
+        semestar: [{"repo_name": f"team-{i}", "commits": [{"commit_hash": f"{semestar}-{i}"}]} for i in (1, 2)]
+        for semestar in semestars
+    }
+
+
+def test_full_save_removes_semestars_no_longer_present(tmp_path):
+    store = StageStore(str(tmp_path))
+    store.save("local_data", local_data("24spring", "25spring"))
+    store.save("group_members", {"24spring": {}, "25spring": {}})
+
+    store.save("local_data", local_data("25spring"))
+    store.save("group_members", {"25spring": {}})
+
+    assert StageStore(str(tmp_path)).load("local_data") == local_data("25spring")
+    assert StageStore(str(tmp_path)).load("group_members") == {"25spring": {}}
+    assert not os.path.exists(tmp_path / "local_data" / "24spring")
+    assert not os.path.exists(tmp_path / "group_members" / "24spring.json")
+
+
+def test_subset_save_and_unloaded_semestars_keep_other_shards(tmp_path):
+    store = StageStore(str(tmp_path))
+    store.save("local_data", local_data("24spring", "25spring"))
+
+    # 只写改动过的分片：其他学期原样保留
+    store.save("local_data", local_data("25spring"), shards=[("25spring", "team-1")])
+    assert StageStore(str(tmp_path)).load("local_data") == local_data("24spring", "25spring")
+
+    # 只加载了部分学期时，完整保存也不删除未加载的学期
+    store.semestars = {"25spring"}
+    store.save("local_data", store.load("local_data"))
+    assert StageStore(str(tmp_path)).load("local_data") == local_data("24spring", "25spring")
+
+
+def test_removed_repo_shard_is_deleted(tmp_path):
+    store = StageStore(str(tmp_path))
+    store.save("local_data", local_data("25spring"))
+    data = local_data("25spring")
+    data["25spring"].pop()
+
+    store.save("local_data", data, shards=[])
+    assert StageStore(str(tmp_path)).load("local_data") == data
+    assert not os.path.exists(store.record_path("local_data", "25spring", "team-2"))
+
+
+def test_round_trip_every_layout(tmp_path):
+    tmp_data = {
+        "classroom_members": [{"login": "alice", "id": "U1"}],
+        "group_members": {"25spring": {"team-1": [{"github_id": "U1"}]}},
+        "pr": {"team-1": [{"number": 1}], "team-2": []},
+        "local_data": local_data("24spring", "25spring"),
+        "custom": {"nested": [1, 2, 3]},
+    }
+    store = StageStore(str(tmp_path))
+    for key, value in tmp_data.items():
+        store.save(key, value)
+
+    reloaded = StageStore(str(tmp_path))
+    assert reloaded.keys() == sorted(tmp_data)
+    assert {key: reloaded.load(key) for key in tmp_data} == tmp_data
+    assert reloaded.records("local_data") == {"24spring": ["team-1", "team-2"], "25spring": ["team-1", "team-2"]}
+    assert reloaded.load_record("local_data", "25spring", "team-2") == tmp_data["local_data"]["25spring"][1]
+    assert reloaded.load("missing") is None
+
+    reloaded.semestars = {"25spring"}
+    assert reloaded.load("local_data") == local_data("25spring")
+
+
+def test_stage_data_loads_keys_lazily(tmp_path):
+    store = StageStore(str(tmp_path))
+    store.save("pr", {"team-1": []})
+    tmp_data = StageData(store)
+
+    assert dict.keys(tmp_data) == set()
+    assert tmp_data["pr"] == {"team-1": []}
+    assert "issues" not in tmp_data
+    assert tmp_data.get("issues", {}) == {}
+    assert set(dict.keys(tmp_data)) == {"pr"}
+
+
+def test_fingerprint_follows_content_not_writes(tmp_path):
+    store = StageStore(str(tmp_path))
+    assert store.fingerprint("local_data") is None
+    store.save("local_data", local_data("25spring"))
+    first = store.fingerprint("local_data")
+
+    store.save("local_data", local_data("25spring"))
+    assert store.fingerprint("local_data") == first
+
+    data = local_data("25spring")
+    data["25spring"][0]["commits"].append({"commit_hash": "new"})
+    store.save("local_data", data, shards=[("25spring", "team-1")])
+    assert store.fingerprint("local_data") != first
+
+
+def test_legacy_tmp_json_is_migrated(tmp_path):
+    legacy_path = tmp_path / "tmp.json"
+    legacy_path.write_text(json.dumps({"local_data": local_data("25spring"), "pr": {"team-1": []}}))
+
+    store = StageStore(str(tmp_path / "tmp_stages"), legacy_path=str(legacy_path))
+    assert store.load("local_data") == local_data("25spring")
+    assert store.load("pr") == {"team-1": []}
+
+
+def test_unchanged_shards_are_not_rewritten(tmp_path):
+    store = StageStore(str(tmp_path))
+    store.save("local_data", local_data("24spring", "25spring"))
+    paths = [store.record_path("local_data", s, name) for s in ("24spring", "25spring") for name in ("team-1", "team-2")]
+    before = {path: os.stat(path).st_mtime_ns for path in paths}
+    os.utime(paths[0], ns=(1, 1))  # 模拟很早之前写入的文件，被重写时修改时间一定会变
+
+    data = local_data("24spring", "25spring")
+    data["25spring"][1]["commits"].append({"commit_hash": "new"})
+    store.save("local_data", data)
+
+    assert os.stat(paths[0]).st_mtime_ns == 1
+    assert [os.stat(path).st_mtime_ns == before[path] for path in paths[1:]] == [True, True, False]
+    assert StageStore(str(tmp_path)).load("local_data") == data
+
+
+def test_stage_data_tracks_unsaved_keys(tmp_path):
+    store = StageStore(str(tmp_path))
+    store.save("pr", {"team-1": []})
+    tmp_data = StageData(store)
+
+    tmp_data["pr"]["team-1"].append({"number": 1})  # 原地修改不记录
+    tmp_data.setdefault("pr", {})
+    tmp_data.setdefault("local_watermarks", {})
+    tmp_data["issues"] = {}
+    assert tmp_data.unsaved == {"local_watermarks", "issues"}
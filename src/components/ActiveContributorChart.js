@@ -2,6 +2,7 @@ import React, { useEffect, useState } from 'react';
 import {
   BarChart, Bar, XAxis, YAxis, CartesianGrid, Tooltip, ResponsiveContainer
 } from 'recharts';
+import { loadChartData } from './chartData';
 
 function getSemesterKey(selectedSemester) {
   return selectedSemester.replace(/\s/g, '').toLowerCase();
@@ -11,12 +12,9 @@ export default function ActiveContributorChart({ selectedSemester }) {
   const [data, setData] = useState([]);
 
   useEffect(() => {
-    const DATA_URL = `/chart_data.json`;
-    fetch(DATA_URL)
-      .then(res => res.json())
-      .then(json => {
-        const semesterKey = getSemesterKey(selectedSemester);
-        const rawData = json[semesterKey]?.repo_active_contributor_count || [];
+    loadChartData(getSemesterKey(selectedSemester), 'repo_active_contributor_count')
+      .then(section => {
+        const rawData = section || [];
         const sortedData = rawData
           .map(({ group_name, active_contributor_count }) => ({
             repo: group_name,
@@ -2,6 +2,7 @@ import React, { useEffect, useState } from 'react';
 import {
   PieChart, Pie, Tooltip, Cell, ResponsiveContainer, Legend
 } from 'recharts';
+import { loadChartData } from './chartData';
 
 const COLORS = [
   '#8884d8', '#82ca9d', '#ffc658', '#ff8042', '#8dd1e1',
@@ -17,12 +18,9 @@ export default function ActiveContributorPieChart({ selectedSemester }) {
   }
 
   useEffect(() => {
-    const DATA_URL = `/chart_data.json`;
-    fetch(DATA_URL)
-      .then(res => res.json())
-      .then(json => {
-        const semesterKey = getSemesterKey(selectedSemester);
-        const pieData = json[semesterKey]?.active_contributor_pie_chart || {};
+    loadChartData(getSemesterKey(selectedSemester), 'active_contributor_pie_chart')
+      .then(section => {
+        const pieData = section || {};
         const formatted = Object.entries(pieData).map(([people, projectCount]) => ({
           name: `${people}-people-group`,
           value: projectCount
@@ -2,6 +2,7 @@ import React, { useEffect, useState } from 'react';
 import {
   LineChart, Line, XAxis, YAxis, CartesianGrid, Tooltip, ResponsiveContainer
 } from 'recharts';
+import { loadChartData } from './chartData';
 
 export default function BranchDistributionChart({ selectedSemester }) {
   const [distributionData, setDistributionData] = useState([]);
@@ -11,12 +12,9 @@ export default function BranchDistributionChart({ selectedSemester }) {
   }
 
   useEffect(() => {
-    const DATA_URL = `/chart_data.json`;
-    fetch(DATA_URL)
-      .then(res => res.json())
-      .then(json => {
-        const semesterKey = getSemesterKey(selectedSemester);
-        const branchCounts = json[semesterKey]?.branch_count_per_repo?.branch_counts || [];
+    loadChartData(getSemesterKey(selectedSemester), 'branch_count_per_repo')
+      .then(section => {
+        const branchCounts = section?.branch_counts || [];
         // Calculate frequency of each branch count
         const frequencyMap = {};
         branchCounts.forEach(count => {
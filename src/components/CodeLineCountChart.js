@@ -2,6 +2,7 @@ import React, { useEffect, useState } from 'react';
 import {
   BarChart, Bar, XAxis, YAxis, CartesianGrid, Tooltip, ResponsiveContainer, ReferenceLine
 } from 'recharts';
+import { loadChartData } from './chartData';
 
 export default function CodeLineCountChart({ selectedSemester }) {
   const [data, setData] = useState([]);
@@ -12,14 +13,11 @@ export default function CodeLineCountChart({ selectedSemester }) {
   }
 
   useEffect(() => {
-    const DATA_URL = `/chart_data.json`;
-    fetch(DATA_URL)
-      .then(res => res.json())
-      .then(json => {
-        const semesterKey = getSemesterKey(selectedSemester);
-        const groupNames = json[semesterKey]?.code_line_per_repo?.group_names || [];
-        const totalLines = json[semesterKey]?.code_line_per_repo?.total_lines || [];
-        const averageLines = json[semesterKey]?.code_line_per_repo?.average_lines || 0;
+    loadChartData(getSemesterKey(selectedSemester), 'code_line_per_repo')
+      .then(section => {
+        const groupNames = section?.group_names || [];
+        const totalLines = section?.total_lines || [];
+        const averageLines = section?.average_lines || 0;
         const formattedData = groupNames.map((repo, idx) => ({
           repo,
           lines: totalLines[idx] || 0,
@@ -2,6 +2,7 @@ import React, { useEffect, useState } from 'react';
 import {
   LineChart, Line, XAxis, YAxis, CartesianGrid, Tooltip, ResponsiveContainer,
 } from 'recharts';
+import { loadChartData } from './chartData';
 
 export default function CommitDateLineChart({ selectedSemester }) {
   const [data, setData] = useState([]);
@@ -12,13 +13,10 @@ export default function CommitDateLineChart({ selectedSemester }) {
   }
 
   useEffect(() => {
-    const DATA_URL = `/chart_data.json`;
     setLoading(true);
-    fetch(DATA_URL)
-      .then(res => res.json())
-      .then(json => {
-        const semesterKey = getSemesterKey(selectedSemester);
-        const { full_dates = [], counts = [] } = json[semesterKey]?.commit_time_distribution_date || {};
+    loadChartData(getSemesterKey(selectedSemester), 'commit_time_distribution_date')
+      .then(section => {
+        const { full_dates = [], counts = [] } = section || {};
         const dateRanges = {
           '23 Spring': ['2023-02-01', '2023-06-10'],
           '24 Spring': ['2024-02-01', '2024-06-10'],
@@ -2,6 +2,7 @@ import React, { useEffect, useState } from 'react';
 import {
   LineChart, Line, XAxis, YAxis, CartesianGrid, Tooltip, ResponsiveContainer
 } from 'recharts';
+import { loadChartData } from './chartData';
 
 function getSemesterKey(selectedSemester) {
   return selectedSemester.replace(/\s/g, '').toLowerCase();
@@ -12,12 +13,9 @@ export default function CommitDistributionChart({ selectedSemester }) {
   const [keyPoints, setKeyPoints] = useState([]);
 
   useEffect(() => {
-    const DATA_URL = `/chart_data.json`;
-    fetch(DATA_URL)
-      .then(res => res.json())
-      .then(json => {
-        const semesterKey = getSemesterKey(selectedSemester);
-        const commit_counts = json[semesterKey]?.commit_count_per_repo?.commit_counts || [];
+    loadChartData(getSemesterKey(selectedSemester), 'commit_count_per_repo')
+      .then(section => {
+        const commit_counts = section?.commit_counts || [];
         if (!commit_counts || commit_counts.length === 0) return;
         const min = Math.min(...commit_counts);
         const max = Math.max(...commit_counts);
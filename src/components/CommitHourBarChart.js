@@ -2,6 +2,7 @@ import React, { useEffect, useState } from 'react';
 import {
   BarChart, Bar, XAxis, YAxis, CartesianGrid, Tooltip, ResponsiveContainer, ReferenceLine,
 } from 'recharts';
+import { loadChartData } from './chartData';
 
 const SEMESTERS = ['23 Spring', '24 Spring', '25 Spring'];
 
@@ -20,12 +21,9 @@ export default function CommitHourBarChart({ selectedSemester }) {
   }
 
   useEffect(() => {
-    const DATA_URL = `/chart_data.json`;
-    fetch(DATA_URL)
-      .then(res => res.json())
-      .then(json => {
-        const semesterKey = getSemesterKey(selectedSemester);
-        const { hours = [], counts = [] } = json[semesterKey]?.commit_time_distribution_hourly || {};
+    loadChartData(getSemesterKey(selectedSemester), 'commit_time_distribution_hourly')
+      .then(section => {
+        const { hours = [], counts = [] } = section || {};
         const formattedData = hours.map((hour, idx) => ({
           hourLabel: formatHourLabel(hour),
           commits: counts[idx] || 0,
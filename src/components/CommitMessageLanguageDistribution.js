@@ -2,6 +2,7 @@ import React, { useEffect, useState } from 'react';
 import {
   PieChart, Pie, Tooltip, Cell, ResponsiveContainer, Legend
 } from 'recharts';
+import { loadChartData } from './chartData';
 
 const COLORS = ['#8884d8', '#82ca9d', '#ffc658']; // Chinese / English / Mixed
 
@@ -13,12 +14,9 @@ export default function CommitMessageLanguageDistribution({ selectedSemester })
   }
 
   useEffect(() => {
-    const DATA_URL = `/chart_data.json`;
-    fetch(DATA_URL)
-      .then(res => res.json())
-      .then(json => {
-        const semesterKey = getSemesterKey(selectedSemester);
-        const langCounter = json[semesterKey]?.commit_message_info?.lang_counter || {};
+    loadChartData(getSemesterKey(selectedSemester), 'commit_message_info')
+      .then(section => {
+        const langCounter = section?.lang_counter || {};
         if (!langCounter) return;
         const formatted = Object.entries(langCounter).map(([lang, count]) => ({
           name:
@@ -2,6 +2,7 @@ import React, { useEffect, useState } from 'react';
 import {
   LineChart, Line, XAxis, YAxis, CartesianGrid, Tooltip, ResponsiveContainer
 } from 'recharts';
+import { loadChartData } from './chartData';
 
 function getSemesterKey(selectedSemester) {
   return selectedSemester.replace(/\s/g, '').toLowerCase();
@@ -11,12 +12,9 @@ export default function CommitMessageLengthChart({ selectedSemester }) {
   const [distributionData, setDistributionData] = useState([]);
 
   useEffect(() => {
-    const DATA_URL = `/chart_data.json`;
-    fetch(DATA_URL)
-      .then(res => res.json())
-      .then(json => {
-        const semesterKey = getSemesterKey(selectedSemester);
-        const length_distribution = json[semesterKey]?.commit_message_info?.length_distribution || [];
+    loadChartData(getSemesterKey(selectedSemester), 'commit_message_info')
+      .then(section => {
+        const length_distribution = section?.length_distribution || [];
         // Merge every two intervals into one
         const merged = [];
         for (let i = 0; i < length_distribution.length; i += 2) {
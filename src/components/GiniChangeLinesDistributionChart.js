@@ -2,6 +2,7 @@ import React, { useEffect, useState } from 'react';
 import {
   LineChart, Line, XAxis, YAxis, CartesianGrid, Tooltip, ResponsiveContainer
 } from 'recharts';
+import { loadChartData } from './chartData';
 
 export default function GiniAddLinesDistributionChart({ selectedSemester }) {
   const [distributionData, setDistributionData] = useState([]);
@@ -12,12 +13,9 @@ export default function GiniAddLinesDistributionChart({ selectedSemester }) {
   }
 
   useEffect(() => {
-    const DATA_URL = `/chart_data.json`;
-    fetch(DATA_URL)
-      .then(res => res.json())
-      .then(json => {
-        const semesterKey = getSemesterKey(selectedSemester);
-        const gini_add_lines = json[semesterKey]?.contribution_difference?.gini_add_lines || [];
+    loadChartData(getSemesterKey(selectedSemester), 'contribution_difference')
+      .then(section => {
+        const gini_add_lines = section?.gini_add_lines || [];
         if (!gini_add_lines || gini_add_lines.length === 0) return;
         const binWidth = 0.1;
         const numBins = Math.ceil(1 / binWidth);
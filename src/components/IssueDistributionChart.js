@@ -2,6 +2,7 @@ import React, { useEffect, useState } from 'react';
 import {
   LineChart, Line, XAxis, YAxis, CartesianGrid, Tooltip, ResponsiveContainer
 } from 'recharts';
+import { loadChartData } from './chartData';
 
 function getSemesterKey(selectedSemester) {
   return selectedSemester.replace(/\s/g, '').toLowerCase();
@@ -11,12 +12,9 @@ export default function IssueDistributionChart({ selectedSemester }) {
   const [distributionData, setDistributionData] = useState([]);
 
   useEffect(() => {
-    const DATA_URL = `/chart_data.json`;
-    fetch(DATA_URL)
-      .then(res => res.json())
-      .then(json => {
-        const semesterKey = getSemesterKey(selectedSemester);
-        const issue_counts = json[semesterKey]?.issue_count_per_repo?.issue_counts || [];
+    loadChartData(getSemesterKey(selectedSemester), 'issue_count_per_repo')
+      .then(section => {
+        const issue_counts = section?.issue_counts || [];
         if (!issue_counts || issue_counts.length === 0) return;
         const min = Math.min(...issue_counts);
         const max = Math.max(...issue_counts);
@@ -2,6 +2,7 @@ import React, { useEffect, useState } from 'react';
 import {
   PieChart, Pie, Tooltip, Cell, ResponsiveContainer, Legend
 } from 'recharts';
+import { loadChartData } from './chartData';
 
 const STATUS_COLORS = {
   open: '#8884d8',    // Purple
@@ -16,12 +17,9 @@ export default function IssueStatusPieChart({ selectedSemester }) {
   }
 
   useEffect(() => {
-    const DATA_URL = `/chart_data.json`;
-    fetch(DATA_URL)
-      .then(res => res.json())
-      .then(json => {
-        const semesterKey = getSemesterKey(selectedSemester);
-        const issueStatus = json[semesterKey]?.issue_status_distribution || {};
+    loadChartData(getSemesterKey(selectedSemester), 'issue_status_distribution')
+      .then(section => {
+        const issueStatus = section || {};
         const formattedData = Object.entries(issueStatus).map(([status, count]) => ({
           name: status,
           value: count,
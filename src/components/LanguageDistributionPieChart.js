@@ -2,6 +2,7 @@ import React, { useEffect, useState } from 'react';
 import {
   PieChart, Pie, Tooltip, Cell, ResponsiveContainer, Legend
 } from 'recharts';
+import { loadChartData } from './chartData';
 
 const COLORS = [
   '#8884d8', '#8dd1e1', '#82ca9d', '#a4de6c', '#d0ed57',
@@ -17,12 +18,9 @@ export default function LanguageDistributionPieChart({ selectedSemester }) {
   const [data, setData] = useState([]);
 
   useEffect(() => {
-    const DATA_URL = `/chart_data.json`;
-    fetch(DATA_URL)
-      .then(res => res.json())
-      .then(json => {
-        const semesterKey = getSemesterKey(selectedSemester);
-        const { languages = [], counts = [] } = json[semesterKey]?.language_distribution || {};
+    loadChartData(getSemesterKey(selectedSemester), 'language_distribution')
+      .then(section => {
+        const { languages = [], counts = [] } = section || {};
         const rawData = languages.map((lang, idx) => ({
           name: lang,
           value: counts[idx] || 0,
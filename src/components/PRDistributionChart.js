@@ -2,6 +2,7 @@ import React, { useEffect, useState } from 'react';
 import {
   LineChart, Line, XAxis, YAxis, CartesianGrid, Tooltip, ResponsiveContainer
 } from 'recharts';
+import { loadChartData } from './chartData';
 
 function getSemesterKey(selectedSemester) {
   return selectedSemester.replace(/\s/g, '').toLowerCase();
@@ -11,12 +12,9 @@ export default function PRDistributionChart({ selectedSemester }) {
   const [distributionData, setDistributionData] = useState([]);
 
   useEffect(() => {
-    const DATA_URL = `/chart_data.json`;
-    fetch(DATA_URL)
-      .then(res => res.json())
-      .then(json => {
-        const semesterKey = getSemesterKey(selectedSemester);
-        const pr_counts = json[semesterKey]?.pr_count_per_repo?.pr_counts || [];
+    loadChartData(getSemesterKey(selectedSemester), 'pr_count_per_repo')
+      .then(section => {
+        const pr_counts = section?.pr_counts || [];
         if (!pr_counts || pr_counts.length === 0) return;
         const min = Math.min(...pr_counts);
         const max = Math.max(...pr_counts);
@@ -2,6 +2,7 @@ import React, { useEffect, useState } from 'react';
 import {
   PieChart, Pie, Tooltip, Cell, ResponsiveContainer, Legend
 } from 'recharts';
+import { loadChartData } from './chartData';
 
 const STATUS_COLORS = {
   merged: '#82ca9d',   // green
@@ -17,12 +18,9 @@ export default function PRStatusPieChart({ selectedSemester }) {
   }
 
   useEffect(() => {
-    const DATA_URL = `/chart_data.json`;
-    fetch(DATA_URL)
-      .then(res => res.json())
-      .then(json => {
-        const semesterKey = getSemesterKey(selectedSemester);
-        const prStatus = json[semesterKey]?.pr_status_distribution || {};
+    loadChartData(getSemesterKey(selectedSemester), 'pr_status_distribution')
+      .then(section => {
+        const prStatus = section || {};
         const formattedData = Object.entries(prStatus).map(([status, count]) => ({
           name: status,
           value: count,
@@ -2,6 +2,7 @@ import React, { useEffect, useMemo, useState } from 'react';
 import {
   BarChart, Bar, XAxis, YAxis, CartesianGrid, Tooltip, ResponsiveContainer, ReferenceLine
 } from 'recharts';
+import { loadChartData } from './chartData';
 
 function getSemesterKey(selectedSemester) {
   return selectedSemester.replace(/\s/g, '').toLowerCase();
@@ -22,11 +23,9 @@ export default function TeamMetricBarChart({
   const [average, setAverage] = useState(0);
 
   useEffect(() => {
-    fetch('/chart_data.json')
-      .then(res => res.json())
-      .then(json => {
-        const semesterKey = getSemesterKey(selectedSemester);
-        const section = json[semesterKey]?.[sectionKey] || {};
+    loadChartData(getSemesterKey(selectedSemester), sectionKey)
+      .then(data => {
+        const section = data || {};
         const groupNames = section[groupNamesKey] || [];
         const values = section[valuesKey] || [];
         const formattedData = groupNames.map((repo, idx) => ({
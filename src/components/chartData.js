@@ -0,0 +1,33 @@
+// Loads one chart section of one semester.
+// The collectors write per-chart files with content-hashed names plus a manifest to /chart_data/,
+// so each chart downloads only its own few kilobytes. Without a manifest, fall back to /chart_data.json.
+const MANIFEST_URL = '/chart_data/manifest.json';
+const COMBINED_URL = '/chart_data.json';
+
+const requests = new Map();
+
+function fetchJson(url) {
+  if (!requests.has(url)) {
+    const request = fetch(url).then(res => {
+      if (!res.ok) {
+        throw new Error(`Failed to fetch ${url}: ${res.status}`);
+      }
+      return res.json();
+    });
+    request.catch(() => requests.delete(url));
+    requests.set(url, request);
+  }
+  return requests.get(url);
+}
+
+export function loadChartData(semesterKey, chartKey) {
+  return fetchJson(MANIFEST_URL)
+    .catch(() => null)
+    .then(manifest => {
+      if (!manifest) {
+        return fetchJson(COMBINED_URL).then(json => json[semesterKey]?.[chartKey]);
+      }
+      const file = manifest.charts?.[semesterKey]?.[chartKey];
+      return file ? fetchJson(`/chart_data/${file}`) : undefined;
+    });
+}